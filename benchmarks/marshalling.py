@@ -0,0 +1,128 @@
+"""Benchmarks of `marshall_param` and `marshall_result` on payloads
+resembling real API calls, compared to the previous implementation
+based on `isinstance` chains.
+
+Run from the top-level package directory:
+
+    $ python -m benchmarks.marshalling
+"""
+from time import strptime
+from timeit import repeat
+from datetime import datetime
+from xmlrpclib import DateTime
+
+from sklikapi.cipisek.entities import Campaign, Entity, Keyword
+from sklikapi.cipisek.marshalling import (marshall_changes, marshall_param,
+                                          marshall_result)
+
+
+def baseline_param(data):
+    if isinstance(data, Entity):
+        return dict((k, baseline_param(v)) for (k, v) in data)
+    elif isinstance(data, dict):
+        return dict((k, baseline_param(v)) for k, v in data.iteritems())
+    elif isinstance(data, list):
+        return map(baseline_param, data)
+    elif isinstance(data, tuple):
+        return tuple(map(baseline_param, data))
+    elif isinstance(data, datetime):
+        return DateTime(data)
+    return data
+
+
+def baseline_result(data, obj_type=None):
+    recursion = lambda data: baseline_result(data, obj_type)
+    if obj_type and isinstance(data, dict):
+        return obj_type(**dict((k, recursion(v))
+                               for (k, v) in data.iteritems()))
+    elif isinstance(data, dict):
+        return dict((k, recursion(v)) for (k, v) in data.iteritems())
+    elif isinstance(data, list):
+        return map(recursion, data)
+    elif isinstance(data, tuple):
+        return tuple(map(recursion, data))
+    elif isinstance(data, DateTime):
+        return datetime(*strptime(data.value[:-5], "%Y%m%dT%H:%M:%S")[:6])
+    return data
+
+
+def keywords_listing(count):
+    """Result of keywords.list with `count` keywords."""
+    return {
+        'status': 200,
+        'statusMessage': 'OK',
+        'keywords': [
+            {'id': i, 'groupId': i // 100, 'name': 'keyword %d' % i,
+             'matchType': 'phrase', 'deleted': False, 'status': 'active',
+             'disabled': False, 'cpc': 100 + i % 50, 'url': None,
+             'minCpc': 20,
+             'createDate': DateTime('201404%02dT16:27:00+0200' % (1 + i % 28))}
+            for i in xrange(count)
+        ],
+    }
+
+
+def keywords_update(count):
+    """`count` keywords fetched and changed, to be sent by
+    `update_keywords`.
+    """
+    keywords = []
+    for keyword in marshall_result(keywords_listing(count))['keywords']:
+        keyword = Keyword(**keyword).track_changes()
+        keyword.cpc = 120
+        keywords.append(keyword)
+    return keywords
+
+
+def update_param(keywords):
+    """Items of keywords.update as `update_keywords` sends them."""
+    return [marshall_param(marshall_changes(keyword))
+            for keyword in keywords]
+
+
+def baseline_update_param(keywords):
+    return [baseline_param(dict(keyword.iterate_changes()))
+            for keyword in keywords]
+
+
+def campaigns_listing(count):
+    """Raw campaigns of campaigns.list result with `count` campaigns."""
+    return [
+        {'id': i, 'name': 'campaign %d' % i, 'status': 'active',
+         'dayBudget': 10000, 'deleted': False,
+         'createDate': DateTime('20140414T16:27:00+0200'),
+         'startDate': DateTime('20140415T00:00:00+0200'),
+         'regions': [{'type': 'circle', 'latitude': 50.1, 'longitude': 14.4,
+                      'radius': 10}]}
+        for i in xrange(count)
+    ]
+
+
+def ids_param(count):
+    """Params of a call with `count` ids, e.g. keywords.get."""
+    return ({'session': 'x' * 40}, range(count))
+
+
+BENCHMARKS = [
+    ('result keywords.list', keywords_listing(1000),
+     marshall_result, baseline_result),
+    ('param keywords.update', keywords_update(5000),
+     update_param, baseline_update_param),
+    ('result campaigns', campaigns_listing(1000),
+     lambda data: marshall_result(data, Campaign),
+     lambda data: baseline_result(data, Campaign)),
+    ('param keywords.get', ids_param(1000),
+     marshall_param, baseline_param),
+]
+
+
+def main(number=20):
+    for name, payload, current, baseline in BENCHMARKS:
+        times = [min(repeat(lambda: fn(payload), number=number, repeat=3))
+                 / number for fn in (current, baseline)]
+        print '%-24s %8.3f ms %8.3f ms (baseline) %6.1fx' % (
+            name, times[0] * 1000, times[1] * 1000, times[1] / times[0])
+
+
+if __name__ == '__main__':
+    main()
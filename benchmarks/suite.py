@@ -0,0 +1,267 @@
+"""Benchmark suite of entities, marshalling, XML-RPC serialization and
+calls to a local stand-in server. Results are stored as JSON, together
+with the thresholds used to detect regressions when they are compared
+to the results of another version.
+
+Run from the top-level package directory:
+
+    $ python -m benchmarks.suite --output results.json
+    $ python -m benchmarks.suite --compare results.json
+
+or by `python setup.py benchmark`. Compare only results measured
+on the same machine.
+"""
+import sys
+import json
+import platform
+import xmlrpclib
+from optparse import OptionParser
+from contextlib import contextmanager
+from datetime import datetime
+from timeit import default_timer
+
+from sklikapi.cipisek.entities import Campaign, Keyword
+from sklikapi.cipisek.marshalling import marshall_param, marshall_result
+from sklikapi.cipisek.unmarshalling import get_entity_parser
+
+from .marshalling import campaigns_listing, keywords_listing
+
+
+# Number of items of the payloads
+ITEMS = 10000
+
+# Relative slowdown considered a regression by default
+THRESHOLD = 0.25
+
+
+class Benchmark(object):
+    """Benchmark timing the callable yielded by `prepare`, the code
+    after the yield cleans up.
+    """
+
+    def __init__(self, name, prepare, items=1, number=1, repeat=5,
+                 threshold=THRESHOLD):
+        """
+        :param name: Name of the benchmark
+        :param prepare: Generator function yielding the timed callable
+        :param items: Number of items processed by one call
+        :param number: Number of calls timed together
+        :param repeat: Number of timings, the fastest one is reported
+        :param threshold: Relative slowdown considered a regression
+        """
+        self.name = name
+        self.prepare = contextmanager(prepare)
+        self.items = items
+        self.number = number
+        self.repeat = repeat
+        self.threshold = threshold
+
+    def run(self):
+        """Returns dict with the results."""
+        with self.prepare() as fn:
+            timings = []
+            for _ in xrange(self.repeat):
+                start = default_timer()
+                for _ in xrange(self.number):
+                    fn()
+                timings.append((default_timer() - start) / self.number)
+        seconds = min(timings)
+        return {
+            'seconds': seconds,
+            'items_per_second': self.items / seconds,
+            'threshold': self.threshold,
+        }
+
+
+BENCHMARKS = []
+
+
+def benchmark(name, **kwargs):
+    """Registers decorated generator function as :class:`Benchmark`."""
+    def register(prepare):
+        BENCHMARKS.append(Benchmark(name, prepare, **kwargs))
+        return prepare
+    return register
+
+
+def keyword_dicts(count):
+    return marshall_result(keywords_listing(count))['keywords']
+
+
+@benchmark('entity.init', items=ITEMS)
+def entity_init():
+    keywords = keyword_dicts(ITEMS)
+    yield lambda: [Keyword(**keyword) for keyword in keywords]
+
+
+@benchmark('entity.marshall_list', items=ITEMS)
+def entity_marshall_list():
+    keywords = keyword_dicts(ITEMS)
+    yield lambda: Keyword.marshall_list(keywords)
+
+
+@benchmark('entity.iterate', items=ITEMS)
+def entity_iterate():
+    keywords = Keyword.marshall_list(keyword_dicts(ITEMS))
+    yield lambda: [dict(keyword) for keyword in keywords]
+
+
+@benchmark('marshall_param.keywords', items=ITEMS)
+def param_keywords():
+    keywords = Keyword.marshall_list(keyword_dicts(ITEMS))
+    yield lambda: marshall_param(({'session': 'x' * 40}, keywords))
+
+
+@benchmark('marshall_result.keywords', items=ITEMS)
+def result_keywords():
+    result = keywords_listing(ITEMS)
+    yield lambda: marshall_result(result)
+
+
+@benchmark('marshall_result.campaigns', items=ITEMS)
+def result_campaigns():
+    campaigns = campaigns_listing(ITEMS)
+    yield lambda: marshall_result(campaigns, Campaign)
+
+
+@benchmark('xml.dumps.keywords', items=ITEMS)
+def xml_dumps():
+    params = marshall_param(({'session': 'x' * 40},
+                             Keyword.marshall_list(keyword_dicts(ITEMS))))
+    yield lambda: xmlrpclib.dumps(params, 'keywords.update',
+                                  allow_none=True)
+
+
+@benchmark('xml.loads.keywords', items=ITEMS)
+def xml_loads():
+    response = xmlrpclib.dumps((keywords_listing(ITEMS),),
+                               methodresponse=True, allow_none=True)
+    yield lambda: xmlrpclib.loads(response)
+
+
+@benchmark('xml.parse_entities.keywords', items=ITEMS)
+def xml_parse_entities():
+    response = xmlrpclib.dumps((keywords_listing(ITEMS),),
+                               methodresponse=True, allow_none=True)
+
+    def parse():
+        parser, unmarshaller = get_entity_parser({'keywords': Keyword})
+        parser.feed(response)
+        parser.close()
+        return unmarshaller.close()
+    yield parse
+
+
+@contextmanager
+def stand_in_client(**kwargs):
+    """Yields tuple (server, client) of a stand-in server with
+    `ITEMS` keywords and a client connected to it.
+    """
+    from sklikapi.cipisek.client import Client
+    from tests.sklikapi.cipisek.server import StandInServer
+
+    server = StandInServer().start()
+    for keyword in keywords_listing(ITEMS)['keywords']:
+        server.entities['keywords'][keyword['id']] = keyword
+    client = Client(server.url, 'login', 'password', rate_limit=False,
+                    **kwargs)
+    try:
+        yield server, client
+    finally:
+        client.close()
+        server.stop()
+
+
+@benchmark('client.calls', items=100)
+def client_calls():
+    with stand_in_client() as (server, client):
+        def calls():
+            for _ in xrange(100):
+                client.list_campaigns()
+            del server.calls[:], server.params[:]
+        yield calls
+
+
+@benchmark('client.list_keywords', items=ITEMS, repeat=3)
+def client_list_keywords():
+    groups = range(ITEMS // 100)
+    with stand_in_client() as (server, client):
+        yield lambda: client.list_keywords(groups)
+
+
+@benchmark('client.check_keywords', items=ITEMS, repeat=3)
+def client_check_keywords():
+    keywords = Keyword.marshall_list(keyword_dicts(ITEMS))
+    with stand_in_client(concurrency=4) as (server, client):
+        server.batch_limits['keywords.check'] = 500
+
+        def check():
+            client.check_keywords(keywords)
+            del server.calls[:], server.params[:]
+        yield check
+
+
+def run(names=None, out=sys.stdout):
+    """Runs benchmarks (all or those whose names start with any
+    of `names`) and returns their results as JSON-serializable dict.
+    """
+    results = {}
+    for bench in BENCHMARKS:
+        if names and not any(bench.name.startswith(n) for n in names):
+            continue
+        result = results[bench.name] = bench.run()
+        out.write('%-30s %10.3f ms %12.0f items/s\n' % (
+            bench.name, result['seconds'] * 1000,
+            result['items_per_second']))
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'results': results,
+    }
+
+
+def compare(current, baseline):
+    """Returns list of tuples (name, slowdown) of benchmarks slower
+    in `current` results than in `baseline` ones by more than their
+    threshold in `baseline`. Slowdown is relative, e.g. 0.3 means 30 %.
+    """
+    regressions = []
+    for name, result in sorted(current['results'].iteritems()):
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        slowdown = result['seconds'] / base['seconds'] - 1
+        if slowdown > base.get('threshold', THRESHOLD):
+            regressions.append((name, slowdown))
+    return regressions
+
+
+def main(argv=None):
+    """Runs the suite, returns exit status (1 if there are
+    regressions).
+    """
+    parser = OptionParser(usage='%prog [options] [benchmark name prefix...]')
+    parser.add_option('-o', '--output', help='store results as JSON')
+    parser.add_option('-c', '--compare', metavar='FILE',
+                      help='compare results to JSON results in FILE')
+    options, names = parser.parse_args(argv)
+
+    results = run(names)
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if options.compare:
+        with open(options.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline)
+        for name, slowdown in regressions:
+            sys.stdout.write('REGRESSION %s is %.0f %% slower\n'
+                             % (name, slowdown * 100))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
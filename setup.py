@@ -1,6 +1,34 @@
 # -*- coding: utf-8 -*-
 
-from setuptools import setup, find_packages
+from setuptools import setup, find_packages, Command
+
+
+class BenchmarkCommand(Command):
+    """Runs the benchmark suite, see `benchmarks/suite.py`."""
+
+    description = 'run benchmarks'
+    user_options = [
+        ('output=', 'o', 'store results as JSON'),
+        ('compare=', 'c', 'compare results to JSON results in the file'),
+    ]
+
+    def initialize_options(self):
+        self.output = None
+        self.compare = None
+
+    def finalize_options(self):
+        pass
+
+    def run(self):
+        from benchmarks.suite import main
+
+        argv = []
+        if self.output:
+            argv += ['--output', self.output]
+        if self.compare:
+            argv += ['--compare', self.compare]
+        if main(argv):
+            raise SystemExit(1)
 
 
 setup(
@@ -9,9 +37,10 @@ setup(
     author='Eduard Veleba, Michal Wiglasz, Pavel Dedik, Lukas Sevcik',
     description=('Python library for easier access to the Sklik.cz API,'
                  'a pay-per-click advertising system, operated by Seznam.cz.'),
-    packages=find_packages(exclude=['tests']),
+    packages=find_packages(exclude=['tests', 'benchmarks']),
     install_requires=[],
     tests_require=[],
     include_package_data=True,
     test_suite="tests",
+    cmdclass={'benchmark': BenchmarkCommand},
 )
@@ -1 +1,2 @@
 from client import Client
+from asyncclient import AsyncClient
@@ -6,6 +6,22 @@ class AdsClient(BaseClient):
     """Sklik API ads namespace client."""
 
     def list_ads(self, campaigns=None, groups=None, include_deleted=False):
+        filter, display = self._ads_filter(campaigns, groups, include_deleted)
+        return self._call_listing('ads.list', 'ads', Ad, filter, display)
+
+    def iter_ads(self, campaigns=None, groups=None, include_deleted=False,
+                 page_size=None, prefetch=False):
+        """Iterates over ads, fetching them page by page.
+
+        :param page_size: Number of ads fetched at once
+        :param prefetch: Whether to fetch next page in the background
+                         while the current one is being consumed
+        """
+        filter, display = self._ads_filter(campaigns, groups, include_deleted)
+        return self._iter_pages('ads.list', 'ads', Ad, page_size, prefetch,
+                                filter, display)
+
+    def _ads_filter(self, campaigns, groups, include_deleted):
         filter = {
             'includeDeleted': bool(include_deleted),
         }
@@ -17,25 +33,22 @@ class AdsClient(BaseClient):
             display['showCampaignId'] = True
         elif groups:
             filter['groupIds'] = list(groups)
-        result = self._call('ads.list', filter, display)
-        return Ad.marshall_list(result['ads'])
+        return filter, display
 
     def create_ads(self, ads):
-        return self._call('ads.create', list(ads))
+        return self._call_chunked('ads.create', ads)
 
     def get_ads(self, ad_ids):
-        result = self._call('ads.get', list(ad_ids))
-        return Ad.marshall_list(result["ads"])
+        return self._call_get('ads.get', 'ads', Ad, ad_ids)
 
     def check_ads(self, ads):
-        return self._call('ads.check', list(ads))
+        return self._call_chunked('ads.check', ads)
 
     def update_ads(self, ads):
-        ads = [dict(ad.iterate_updatable()) for ad in ads]
-        return self._call('ads.update', ads)
+        return self._call_update('ads.update', ads)
 
     def remove_ads(self, ad_ids):
-        return self._call('ads.remove', list(ad_ids))
+        return self._call_chunked('ads.remove', ad_ids)
 
     def restore_ads(self, ad_ids):
-        return self._call('ads.restore', list(ad_ids))
+        return self._call_chunked('ads.restore', ad_ids)
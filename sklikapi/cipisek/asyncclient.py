@@ -0,0 +1,80 @@
+from .client import Client
+from .concurrency import create_pool
+
+
+_NAMESPACES = ['ads', 'groups', 'keywords', 'campaigns']
+_OPERATIONS = ['list', 'create', 'get', 'check', 'update', 'remove', 'restore']
+
+
+class AsyncClient(object):
+    """Non-blocking Sklik API client.
+
+    Has the same API methods as :class:`Client` (`list_ads`,
+    `get_keywords`, `update_groups`, ...), but each of them returns
+    a :class:`Future` immediately and the call is done by a pool of
+    workers - greenlets if gevent is used, threads otherwise. Even login
+    and limits loading happen in the pool, so the constructor does not
+    block either; its errors are raised by `Future.result()` of the
+    calls.
+
+        client = AsyncClient(url, username, password, workers=50)
+        futures = [client.get_keywords([kw_id]) for kw_id in ids]
+        keywords = [f.result() for f in futures]
+    """
+
+    def __init__(self, url, username, password, workers=10, pool=None,
+                 client_class=Client, **kwargs):
+        """
+        :param url: Sklik API URL, e.g. https://api.sklik.cz/RPC2
+        :param username: Sklik login
+        :param password: Sklik user password
+        :param workers: Number of calls in flight at the same time
+        :param pool: Worker pool, e.g. shared by clients of more accounts,
+                     see :func:`create_pool`
+        :param client_class: Blocking client class doing the calls
+        :param kwargs: Other arguments of :class:`Client`
+        """
+        # only a pool created here is shut down by `close`
+        self._own_pool = pool is None
+        self._pool = pool or create_pool(workers)
+        self._client = self._pool.submit(client_class, url, username,
+                                         password, **kwargs)
+
+    @property
+    def client(self):
+        """Underlying blocking :class:`Client`, waits for login."""
+        return self._client.result()
+
+    def submit(self, fn, *args, **kwargs):
+        """Calls `fn(client, *args, **kwargs)` in the pool, where `client`
+        is the underlying blocking client.
+
+        :return: :class:`Future`
+        """
+        return self._pool.submit(
+            lambda: fn(self._client.result(), *args, **kwargs))
+
+    def close(self):
+        """Stops the workers once the already scheduled calls finish
+        (unless the pool was passed to the constructor) and closes the
+        underlying client. Calls scheduled to a passed pool must have
+        finished before.
+        """
+        if self._own_pool:
+            self._pool.shutdown()
+        if self._client.exception() is None:
+            self._client.result().close()
+
+
+def _async_method(name):
+    def call(self, *args, **kwargs):
+        return self.submit(
+            lambda client: getattr(client, name)(*args, **kwargs))
+    call.__name__ = name
+    call.__doc__ = getattr(Client, name).__doc__
+    return call
+
+
+for _name in ['get_version', 'get_limits'] + [
+        '%s_%s' % (op, ns) for ns in _NAMESPACES for op in _OPERATIONS]:
+    setattr(AsyncClient, _name, _async_method(_name))
@@ -2,12 +2,22 @@ import re
 import sys
 import time
 import logging
+import threading
 
 from warnings import warn
+from itertools import chain, islice
 from xmlrpclib import ServerProxy, ProtocolError
 
 from . import exceptions as exc
-from .marshalling import marshall_param, marshall_result
+from .marshalling import marshall_changes, marshall_param, marshall_result
+from .batch import Batch
+from .entities import Ad, Campaign, Group, Keyword
+from .concurrency import create_pool, imap_unordered
+from .metrics import MetricsRegistry
+from .ratelimit import SlidingWindow
+from .retry import CircuitBreaker, RetryPolicy
+from .tracing import NO_SPAN
+from .transport import create_transport
 
 
 _logger = logging.getLogger('sklikapi')
@@ -27,37 +37,188 @@ def _create_server_proxy(*args, **kwargs):
         return ServerProxy(*args, **kwargs)
 
 
+# Keys of results not merged by bulk operations with refused items
+_STATUS_KEYS = frozenset(['status', 'statusMessage', 'diagnostics', 'session'])
+
+
+def _chunks(items, size):
+    """Yields lists of `size` items (the last one may be shorter)."""
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _merge_results(results):
+    """Merges results of chunks of a bulk operation."""
+    merged = {}
+    for result in results:
+        for key, value in result.iteritems():
+            if key not in merged:
+                merged[key] = list(value) if isinstance(value, list) else value
+            elif isinstance(value, list):
+                merged[key].extend(value)
+    return merged
+
+
+def _request_id(index, used):
+    """Returns `requestId` of the item at `index` of a bulk operation,
+    which is not one of the `used` ones.
+    """
+    request_id = str(index)
+    n = 0
+    while request_id in used:
+        n += 1
+        request_id = '%d-%d' % (index, n)
+    return request_id
+
+
+def _diagnostic_position(diagnostic, requests, size):
+    """Returns position of the item of a chunk of `size` items
+    the `diagnostic` belongs to, or `None` if it cannot be told.
+    Diagnostics are matched by `requestId` (`requests` maps it to the
+    position), by the reported `index` of the item in the chunk or,
+    if the chunk has only one item, to it.
+    """
+    position = requests.get(diagnostic.get('requestId'))
+    if position is not None:
+        return position
+    index = diagnostic.get('index')
+    if isinstance(index, (int, long)) and 0 <= index < size:
+        return index
+    if size == 1:
+        return 0
+    return None
+
+
 class BaseClient(object):
-    """Sklik abstract client base class."""
+    """Sklik abstract client base class.
+
+    One instance can be shared by many threads (or greenlets). When the
+    session expires, only one of them logs in again, the others wait
+    for the new session.
+    """
 
     # How long to wait before re-logging in when session expires (in seconds)
     MALFORMED_SESSION_WAIT = 5
 
-    # How long to wait before retry when IOError/ProtocolError occurs (in seconds)
-    ERROR_RETRY_WAIT = 5
+    # Upper bounds of the random wait before the first retry and before
+    # any retry of a failed call (in seconds), see `RetryPolicy`
+    RETRY_DELAY = 0.5
+    RETRY_MAX_DELAY = 30
+
+    # Maximal time spent by one call including retries (in seconds),
+    # `None` means unlimited
+    RETRY_BUDGET = None
+
+    # Number of consecutive calls failed by IOErrors/ProtocolErrors even
+    # when retried, after which calls fail fast for
+    # `CIRCUIT_BREAKER_RESET` seconds, `None` disables it
+    CIRCUIT_BREAKER_THRESHOLD = 5
+    CIRCUIT_BREAKER_RESET = 30
+
+    # Default number of items fetched at once by listing iterators
+    LIST_PAGE_SIZE = 1000
+
+    # Default number of ids listed by one call made by `fan_out`
+    FAN_OUT_CHUNK_SIZE = 100
+
+    # How long to wait for a connection to be established (in seconds)
+    CONNECT_TIMEOUT = 10
+
+    # Maximal number of idle keep-alive connections kept open
+    CONNECTION_POOL_SIZE = 10
+
+    # How long to keep an idle connection open (in seconds)
+    CONNECTION_IDLE_TIMEOUT = 60
+
+    # Requests larger than this are gzipped (in bytes), `None` disables it
+    REQUEST_GZIP_THRESHOLD = None
+
+    # Ids of diagnostics of items refused by bulk operations because
+    # of transient failures, such items are retried
+    RETRY_DIAGNOSTICS = frozenset(['internal_error'])
+
+    # Namespaces of bulk operations whose items are sent with `requestId`
+    # set by the client (only their entities declare it)
+    REQUEST_ID_NAMESPACES = frozenset(
+        namespace for namespace, entity_class in (
+            ('ads', Ad), ('campaigns', Campaign), ('groups', Group),
+            ('keywords', Keyword))
+        if 'requestId' in entity_class._slots)
 
     def __init__(self, url, username, password, debug=False, timeout=None,
-                 retries=0):
+                 retries=0, rate_limit=True, concurrency=1, cache=None,
+                 retry_policy=None, circuit_breaker=None, metrics=None,
+                 tracer=None):
         """Sklik API client. Only "cipisek" API version is supported.
 
         :param url: Sklik API URL, e.g. https://api.sklik.cz/RPC2
         :param username: Sklik login
         :param password: Sklik user password
         :param debug: Use XML-RPC verbose mode
-        :param timeout: Currently not implemented
+        :param timeout: How long to wait for a response (in seconds),
+                        `TimeoutError` is raised (or the call retried)
+                        if it does not come in time, `None` means
+                        forever; see also `deadline`
         :param retries: Number of retries in the case of timeout or
                         ServerError
+        :param rate_limit: Whether to throttle calls to stay within
+                           the API call limits
+        :param concurrency: Number of chunks of bulk operations sent
+                            at the same time
+        :param cache: :class:`FileCache` for API version, limits and
+                      session reused by the next client, which then
+                      does not need to call the API when constructed
+        :param retry_policy: :class:`RetryPolicy` used instead of the one
+                             created from `retries` and `RETRY_*`
+        :param circuit_breaker: :class:`CircuitBreaker` used instead of
+                                the one created from `CIRCUIT_BREAKER_*`,
+                                may be shared by more clients
+        :param metrics: :class:`MetricsRegistry` recording the calls,
+                        may be shared by more clients; a new one
+                        is created by default
+        :param tracer: :class:`Tracer` emitting timed spans of phases
+                       of the calls, `None` disables tracing
         """
         self.__session = None
+        self.__session_cached = False
+        self.__login_lock = threading.Lock()
         self.__user_id = None
+        self._cache = cache
+        self._cache_key = '%s %s' % (url, username)
+        self.rate_limiter = None
+        self.concurrency = concurrency
+        self._pool = None
+        self._pool_lock = threading.Lock()
 
         if not username or not password:
             raise Exception('Username and password must not be empty')
 
-        self._proxy = _create_server_proxy(url, verbose=debug, allow_none=True)
-        self.retries = retries
-
-        versionName, versionNumber = self.get_version()
+        self._transport = create_transport(
+            url, pool_size=self.CONNECTION_POOL_SIZE,
+            pool_idle_timeout=self.CONNECTION_IDLE_TIMEOUT,
+            encode_threshold=self.REQUEST_GZIP_THRESHOLD,
+            timeout=timeout, connect_timeout=self.CONNECT_TIMEOUT)
+        self._transport.tracer = self.tracer = tracer
+        self._proxy = _create_server_proxy(url, transport=self._transport,
+                                           verbose=debug, allow_none=True)
+        if retry_policy is None:
+            retry_policy = RetryPolicy(retries, self.RETRY_DELAY,
+                                       self.RETRY_MAX_DELAY,
+                                       self.RETRY_BUDGET)
+        self.retry_policy = retry_policy
+        self.retries = retry_policy.retries
+        if circuit_breaker is None and self.CIRCUIT_BREAKER_THRESHOLD:
+            circuit_breaker = CircuitBreaker(self.CIRCUIT_BREAKER_THRESHOLD,
+                                             self.CIRCUIT_BREAKER_RESET)
+        self.circuit_breaker = circuit_breaker
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+
+        versionName, versionNumber = self._cached('version', url,
+                                                  self.get_version)
         _logger.debug('Sklik API version %s %s', versionName, versionNumber)
 
         if versionName != 'cipisek':
@@ -66,27 +227,113 @@ class BaseClient(object):
             )
 
         self.__auth = (username, password)
-        self._login()
+        session = cache and cache.get('session', self._cache_key)
+        if session:
+            self.__session = session
+            self.__session_cached = True
+        else:
+            self._login()
 
         # load limits
-        limits = self.get_limits()
+        try:
+            limits = self._cached('limits', self._cache_key, self.get_limits)
+        except exc.SessionError:
+            if not self.__session_cached:
+                raise
+            self._login()
+            limits = self._cached('limits', self._cache_key, self.get_limits)
         self.antidos_count = limits['antiDosCallCount']
         self.antidos_interval = limits['antiDosTimeInterval']
         self.batch_limits = limits['batchCallLimits']
 
+        if rate_limit and self.antidos_count and self.antidos_interval:
+            self.rate_limiter = SlidingWindow(self.antidos_count,
+                                              self.antidos_interval)
+            # logging in and loading the limits count as well, even when
+            # done by the client which cached them
+            self.rate_limiter.reserve(2)
+
     def __del__(self):
-        """Logs out."""
+        self.close()
 
-        if self.__session is None:
-            return
+    def close(self):
+        """Logs out, closes idle connections and stops the workers
+        of `concurrency`. If cache is used, the session is cached instead.
+        Called when the client is garbage collected, the client must not
+        be used afterwards.
+        """
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
 
-        res = self._proxy.client.logout({'session': self.__session})
-        self._check_login_result(res)
+        session, self.__session = self.__session, None
+        try:
+            if session is None:
+                return
+
+            if self._cache is not None:
+                self._cache.set('session', self._cache_key, session)
+                return
+
+            res = self._proxy.client.logout({'session': session})
+            self._check_login_result(res)
+        finally:
+            self._transport.close()
 
     def _login(self):
-        res = self._proxy.client.login(*self.__auth)
+        at = self._throttle(1, 'client.login')
+        try:
+            res = self._proxy.client.login(*self.__auth)
+        finally:
+            self._answered(at, 1)
         self._check_login_result(res)
         self.__session = res["session"]
+        self.__session_cached = False
+        if self._cache is not None:
+            self._cache.set('session', self._cache_key, self.__session)
+
+    def _relogin(self, expired_session, wait=True):
+        """Logs in again unless another thread has already replaced
+        the expired session, in which case it just returns. Only one
+        thread logs in, the others wait for the new session.
+        """
+        with self.__login_lock:
+            if self.__session != expired_session:
+                return
+            if wait:
+                self._sleep(self.MALFORMED_SESSION_WAIT)
+            self._login()
+
+    def _cached(self, kind, key, load):
+        if self._cache is None:
+            return load()
+        value = self._cache.get(kind, key)
+        if value is None:
+            value = load()
+            self._cache.set(kind, key, value)
+        return value
+
+    @property
+    def remaining_calls(self):
+        """Number of calls which can be made right now without being
+        throttled, `None` if the calls are not rate-limited.
+        """
+        if self.rate_limiter is None:
+            return None
+        return self.rate_limiter.remaining
+
+    @property
+    def transfer_stats(self):
+        """:class:`TransferStats` of all calls made by the client."""
+        return self._transport.stats
+
+    @property
+    def last_transfer_stats(self):
+        """:class:`TransferStats` of the last call made by the client
+        in the current thread.
+        """
+        return self._transport.last_stats
 
     def get_batch_limit(self, operation):
         if operation in self.batch_limits:
@@ -128,52 +375,532 @@ class BaseClient(object):
         return struct
 
     def _marshall_and_call(self, method, *args, **kwargs):
-        args = (self._get_user_struct(),) + marshall_param(args)
+        if self.tracer is not None:
+            return self._traced_marshall_and_call(method, *args, **kwargs)
+        args = marshall_param(args)
         kwargs = marshall_param(kwargs)
-        result = marshall_result(self._call_and_retry(method, *args, **kwargs))
+        result = self._call_and_retry(method, *args, **kwargs)
+        if not self._transport.parses_entities:
+            # otherwise already done by the parser
+            result = marshall_result(result)
+        return result
+
+    def _traced_marshall_and_call(self, method, *args, **kwargs):
+        tracer = self.tracer
+        with self._call_span(method):
+            with tracer.span('marshall_param'):
+                args = marshall_param(args)
+                kwargs = marshall_param(kwargs)
+            result = self._call_and_retry(method, *args, **kwargs)
+            if not self._transport.parses_entities:
+                with tracer.span('marshall_result'):
+                    result = marshall_result(result)
         return result
 
+    def _span(self, name, **attributes):
+        """Returns span of phase `name` of the current call, which does
+        nothing if tracing is disabled.
+        """
+        if self.tracer is None:
+            return NO_SPAN
+        return self.tracer.span(name, **attributes)
+
+    def _call_span(self, method):
+        """Returns `call` span of API `method` (see `_span`), which does
+        nothing if the current span already is one, so that the calls
+        made by `_call_listing` and `_call_get` are not traced twice.
+        """
+        if self.tracer is None:
+            return NO_SPAN
+        current = self.tracer.current()
+        if current is not None and current.name == 'call' \
+                and current.attributes.get('method') == method:
+            return NO_SPAN
+        return self.tracer.span('call', method=method)
+
     def _call_and_retry(self, method, *args, **kwargs):
-        method = getattr(self._proxy, method)
-        for n in xrange(self.retries + 1):
-            try:
-                result = method(*args, **kwargs)
-                self._check_result(result)
-                return result
-
-            except exc.InvalidDataError:
-                # in fact not-an-error
-                raise
+        """Calls API `method`, user struct is prepended to `args`."""
+        fn = getattr(self._proxy, method)
+        return self._observed(method, self._retry,
+                              lambda user: fn(user, *args, **kwargs),
+                              self._check_result, name=method)
+
+    def _observed(self, method, fn, *args, **kwargs):
+        """Returns `fn(*args, **kwargs)`, records its duration as call
+        of `method` in `metrics`.
+        """
+        start = time.time()
+        error = True
+        try:
+            result = fn(*args, **kwargs)
+            error = False
+            return result
+        finally:
+            self.metrics.observe_call(method, time.time() - start, error)
+
+    def _multicall_and_retry(self, calls):
+        """Sends list of `(method, args)` tuples as a single
+        `system.multicall` request, user struct is prepended to each `args`.
+
+        :return: list of raw results, see `system.multicall` spec
+        """
+        def multicall(user):
+            return self._proxy.system.multicall([
+                {'methodName': method, 'params': [user] + list(args)}
+                for method, args in calls
+            ])
+        with self._span('call', method='system.multicall',
+                        calls=len(calls)):
+            return self._observed('system.multicall', self._retry,
+                                  multicall, self._check_multicall_result,
+                                  cost=len(calls), name='system.multicall')
+
+    def _throttle(self, cost, name):
+        """Waits until `cost` calls can be made within the API limits.
+
+        :return: time reserved for the calls by `rate_limiter`, to be
+                 passed to `_answered` once they are, `None` if the calls
+                 are not rate-limited
+        """
+        if self.rate_limiter is None:
+            return None
+        at = self.rate_limiter.reserve(cost)
+        wait = at - time.time()
+        if wait > 0:
+            _logger.debug('Throttled for %.3f s to stay within API limits.',
+                          wait)
+            self.metrics.add(name, 'throttle_seconds', wait)
+            with self._span('throttle'):
+                self._sleep(wait)
+        return at
+
+    def _answered(self, at, cost):
+        if at is not None:
+            self.rate_limiter.done(at, cost)
+
+    def deadline(self, seconds):
+        """Returns context manager within which calls made by the current
+        thread have to finish in `seconds`, including retries, re-logging
+        in and waiting for the rate limits. `DeadlineExceededError` is
+        raised as soon as it is clear they cannot.
+
+            with client.deadline(30):
+                client.update_keywords(keywords)
+
+        Bulk operations and listings keep the deadline of the calling
+        thread in the calls they make in parallel.
+        """
+        return self._transport.deadline(time.time() + seconds)
 
-            except (ProtocolError, IOError) as e:
-                if n >= self.retries:
+    def _bind_deadline(self, fn):
+        """Returns `fn` called within the deadline of the current thread,
+        to be run by another thread.
+        """
+        deadline = self._transport.get_deadline()
+        if deadline is None:
+            return fn
+
+        def bound(*args, **kwargs):
+            with self._transport.deadline(deadline):
+                return fn(*args, **kwargs)
+        return bound
+
+    def _sleep(self, seconds):
+        """Waits `seconds` unless the deadline comes first."""
+        remaining = self._transport.remaining()
+        if remaining is not None and seconds >= remaining:
+            raise exc.DeadlineExceededError(
+                'Deadline would be exceeded by waiting %.3f s' % seconds)
+        time.sleep(seconds)
+
+    def _retry(self, call, check, cost=1, name=None):
+        """Calls `call(user_struct)` and checks its result by `check`,
+        retries on errors as allowed by `retry_policy`. Safe to be used
+        by more threads at once.
+
+        :param name: API method name under which retries, re-logins,
+                     throttling and bytes are recorded in `metrics`
+        """
+        policy = self.retry_policy
+        breaker = self.circuit_breaker
+        transport = self._transport
+        start = time.time()
+        n = 0
+        responded = True
+        try:
+            while True:
+                try:
+                    # throttled before the breaker lets the call through,
+                    # so that the trial call is made whenever it is let;
+                    # the retries of the call are let through as well
+                    at = self._throttle(cost, name)
+                    if breaker is not None and n == 0:
+                        breaker.before_call()
+                    user = self._get_user_struct()
+                    responded = False
+                    last_stats = transport.last_stats
+                    try:
+                        with self._span('xmlrpc', attempt=n):
+                            result = call(user)
+                        responded = True
+                    finally:
+                        self._answered(at, cost)
+                        if breaker is not None and responded:
+                            breaker.success()
+                        stats = transport.last_stats
+                        if stats is not last_stats:
+                            self.metrics.add(name, 'request_bytes',
+                                             stats.request_wire_bytes)
+                            self.metrics.add(name, 'response_bytes',
+                                             stats.response_wire_bytes)
+                    check(result)
+                    return result
+
+                except (exc.InvalidDataError, exc.DeadlineExceededError,
+                        exc.CircuitOpenError):
+                    # in fact not-an-error, there is no time left, or the API
+                    # keeps failing
                     raise
-                else:
-                    time.sleep(self.ERROR_RETRY_WAIT)
-                    _logger.info('%s! Retrying.', str(e))
 
-            except exc.SessionError as e:
-                _logger.info('%s! Re-logging in and retrying.', str(e))
-                if n >= self.retries:
-                    raise
-                else:
-                    time.sleep(self.MALFORMED_SESSION_WAIT)
-                    self._login()
-
-            except exc.SklikApiError as e:
-                match = re.match(
-                    r'Too many requests. Has to wait ([0-9]+)\[s\].', str(e))
-                if match:
-                    wait = int(match.group(1)) + 1
-                    time.sleep(wait)
-                elif n >= self.retries:
-                    raise
-                else:
-                    _logger.info('%s! Retrying.', str(e))
+                except (ProtocolError, IOError, exc.TimeoutError) as e:
+                    wait = policy.backoff(n, time.time() - start)
+                    if wait is None:
+                        raise
+                    _logger.info('%s! Retrying in %.3f s.', str(e), wait)
+                    self._sleep(wait)
+
+                except exc.SessionError as e:
+                    expired = user['session']
+                    if self.__session_cached or self.__session != expired:
+                        # the session came from cache or another thread has
+                        # already logged in meanwhile, try again for free
+                        _logger.info('%s! Logging in if needed and retrying.',
+                                     str(e))
+                        self.metrics.add(name, 'relogins')
+                        self._relogin(expired, wait=False)
+                        return self._retry(call, check, cost, name)
+
+                    _logger.info('%s! Re-logging in and retrying.', str(e))
+                    if n >= self.retries:
+                        raise
+                    else:
+                        self.metrics.add(name, 'relogins')
+                        self._relogin(expired)
+
+                except exc.SklikApiError as e:
+                    match = re.match(
+                        r'Too many requests. Has to wait ([0-9]+)\[s\].',
+                        str(e))
+                    if match:
+                        wait = policy.backoff(n, time.time() - start,
+                                              minimum=int(match.group(1)) + 1)
+                        if wait is None:
+                            raise
+                        _logger.info('%s! Retrying in %.3f s.', str(e), wait)
+                        self._sleep(wait)
+                    elif n >= self.retries:
+                        raise
+                    else:
+                        _logger.info('%s! Retrying.', str(e))
+
+                n += 1
+                self.metrics.add(name, 'retries')
+        except Exception:
+            if breaker is not None and not responded:
+                # the breaker counts calls given up on, not the attempts,
+                # which would limit the retries
+                breaker.failure()
+            raise
+
+    def batch(self):
+        """Returns :class:`Batch` context manager, calls queued in it
+        are sent as a single `system.multicall` request on exit.
+
+            with client.batch() as b:
+                groups = b.call('groups.get', [group_id])
+                ads = b.call('ads.list', {'groupIds': [group_id]}, {})
+            groups.result()['groups']
+        """
+        return Batch(self)
 
     def _call(self, *args, **kwargs):
         return self._marshall_and_call(*args, **kwargs)
 
+    def _parsing(self, **entities):
+        """Returns context manager within which results of the calls
+        made by the current thread are converted to entities directly
+        by the response parser, e.g. `self._parsing(ads=Ad)` converts
+        items of `result['ads']` to :class:`Ad`.
+        """
+        return self._transport.unmarshalling(entities)
+
+    def _call_listing(self, method, key, entity_class, *args):
+        """Calls `method` and returns its result `key` as list
+        of `entity_class` instances built by the response parser.
+        """
+        with self._call_span(method):
+            with self._parsing(**{key: entity_class}):
+                result = self._call(method, *args)
+            return self._entities(method, entity_class, result[key])
+
+    def _call_get(self, method, key, entity_class, ids):
+        """Calls bulk operation `method` with `ids` (see `_call_chunked`)
+        and returns its result `key` as list of `entity_class` instances
+        built by the response parser.
+        """
+        with self._call_span(method):
+            with self._parsing(**{key: entity_class}):
+                result = self._call_chunked(method, ids)
+            return self._entities(method, entity_class, result[key])
+
+    def _entities(self, method, entity_class, items):
+        """Converts `items` fetched from the API by `method` to
+        `entity_class` instances tracking their changes.
+        """
+        with self._span('entities', method=method, items=len(items)):
+            entities = entity_class.marshall_list(items)
+            for entity in entities:
+                entity.track_changes()
+        return entities
+
+    def _call_chunked(self, method, items, *args):
+        """Calls bulk operation `method` with `items` split into chunks
+        not exceeding its batch limit. Results of the chunks are merged,
+        lists in them are concatenated in the order of `items`.
+
+        Items of namespaces in `REQUEST_ID_NAMESPACES` are sent with
+        `requestId` set to their index in `items` unless they have one,
+        so that diagnostics can be matched to the refused items, other
+        diagnostics are matched by position (see `_diagnostic_position`).
+        Items refused because of transient
+        failures (see `RETRY_DIAGNOSTICS`) are resent up to `retries`
+        times. If some items are refused anyway, the others are sent
+        anyway and `InvalidDataError` with diagnostics of all the refused
+        items, `result` of the accepted ones and `failed` items is raised
+        at the end.
+
+        `None` items are skipped, the others keep their indices. If all
+        the items are skipped, nothing is sent and `{}` is returned.
+        """
+        limit = self.get_batch_limit(method)
+        skipped = []
+
+        def enumerated(items):
+            for index, item in enumerate(items):
+                if item is None:
+                    skipped.append(index)
+                else:
+                    yield index, item
+
+        items = enumerated(items)
+        if limit:
+            # chunks are created lazily, so only the one being sent has
+            # to be kept in memory if `items` is an iterator
+            chunks = _chunks(items, limit)
+        else:
+            chunks = iter([list(items)])
+
+        call = self._bind_deadline(
+            lambda chunk: self._call_chunk(method, chunk, args,
+                                           self.retries))
+        first = next(chunks, [])
+        if not first and skipped:
+            return {}
+        second = next(chunks, None)
+        if second is None:
+            results = [call(first)]
+        elif self.concurrency > 1:
+            pool = self._get_pool()
+            futures = [pool.submit(call, chunk)
+                       for chunk in chain([first, second], chunks)]
+            results = [f.result() for f in futures]
+        else:
+            results = [call(chunk)
+                       for chunk in chain([first, second], chunks)]
+
+        merged = _merge_results(result for result, _, _, _ in results)
+        errors = [d for _, _, diagnostics, _ in results for d in diagnostics]
+        if errors:
+            refused = all(status == 406 for _, _, _, status in results)
+            failed = [f for _, chunk_failed, _, _ in results
+                      for f in chunk_failed]
+            raise exc.InvalidDataError(406 if refused else 206, errors,
+                                       merged, failed)
+        return merged
+
+    def _call_update(self, method, entities):
+        """Calls update `method` with changes of `entities` (see
+        `Entity.iterate_changes`), those without any change besides
+        their id are not sent.
+        """
+        def changes():
+            for entity in entities:
+                entity_changes = marshall_changes(entity)
+                if set(entity_changes) <= set(['id']):
+                    yield None
+                else:
+                    yield entity_changes
+        return self._call_chunked(method, changes())
+
+    def _call_chunk(self, method, chunk, args, retries):
+        """Calls `method` with `chunk` of (index, item) tuples. Returns
+        tuple (result of the accepted items, list of (index, item,
+        diagnostics) of the refused ones, all diagnostics, status).
+        """
+        namespace = method.partition('.')[0]
+        add_request_ids = namespace in self.REQUEST_ID_NAMESPACES
+        payload = [marshall_param(item) for _, item in chunk]
+        requests = {}
+        for position, data in enumerate(payload):
+            if isinstance(data, dict) and data.get('requestId') is not None:
+                # diagnostics of a requestId used more times cannot be
+                # told apart by it
+                request_id = data['requestId']
+                requests[request_id] = \
+                    None if request_id in requests else position
+        if add_request_ids:
+            for position, (index, _) in enumerate(chunk):
+                data = payload[position]
+                if isinstance(data, dict) and data.get('requestId') is None:
+                    request_id = _request_id(index, requests)
+                    payload[position] = dict(data, requestId=request_id)
+                    requests[request_id] = position
+
+        self.metrics.observe_items(method, len(payload))
+        try:
+            return self._call(method, payload, *args), [], [], 200
+        except exc.InvalidDataError as e:
+            result = dict((key, value)
+                          for key, value in marshall_result(e.result).items()
+                          if key not in _STATUS_KEYS)
+            diagnostics = e.errors() or []
+            status = e.args[0]
+
+        failed = {}
+        uncorrelated = []
+        for diagnostic in diagnostics:
+            position = _diagnostic_position(diagnostic, requests, len(chunk))
+            if position is None:
+                uncorrelated.append(diagnostic)
+            else:
+                failed.setdefault(position, []).append(diagnostic)
+        if status == 406 and uncorrelated:
+            # all the items were refused, those without their own
+            # diagnostics share the uncorrelated ones
+            for position in xrange(len(chunk)):
+                failed.setdefault(position, uncorrelated)
+
+        transient = sorted(
+            position for position, item_diagnostics in failed.iteritems()
+            if all(d.get('id') in self.RETRY_DIAGNOSTICS
+                   for d in item_diagnostics))
+        if transient and retries > 0:
+            _logger.warning('Retrying %d items refused by %s',
+                            len(transient), method)
+            self._sleep(self.retry_policy.delay(self.retries - retries))
+            resolved = set()
+            for position in transient:
+                resolved.update(id(d) for d in failed.pop(position))
+            diagnostics = [d for d in diagnostics if id(d) not in resolved]
+            retried = self._call_chunk(method,
+                                       [chunk[p] for p in transient],
+                                       args, retries - 1)
+            result = _merge_results([result, retried[0]])
+            diagnostics += retried[2]
+            if status == 406 and retried[3] != 406:
+                status = 206
+        else:
+            retried = (None, [], [], None)
+
+        failed = sorted(chunk[position] + (item_diagnostics,)
+                        for position, item_diagnostics
+                        in failed.iteritems()) + retried[1]
+        if not diagnostics:
+            status = 200
+        return result, failed, diagnostics, status
+
+    def _iter_pages(self, method, key, entity_class, page_size, prefetch,
+                    filter, *args):
+        """Calls listing `method` repeatedly, page by page, and yields
+        items of result `key` as `entity_class` instances.
+        Only the current page (and the next one if `prefetch` is set)
+        is kept in memory.
+        """
+        page_size = int(page_size or self.get_batch_limit(method)
+                        or self.LIST_PAGE_SIZE)
+
+        def fetch(offset):
+            page_filter = dict(filter, limit=page_size, offset=offset)
+            return self._call_listing(method, key, entity_class,
+                                      page_filter, *args)
+
+        fetch = self._bind_deadline(fetch)
+        offset = 0
+        page = fetch(offset)
+        while True:
+            last = len(page) < page_size
+            if prefetch and not last:
+                next_page = self._get_pool().submit(fetch, offset + page_size)
+
+            for entity in page:
+                yield entity
+            if last:
+                return
+
+            offset += page_size
+            page = next_page.result() if prefetch else fetch(offset)
+
+    def fan_out(self, listing, ids, arg=None, chunk_size=None, workers=None,
+                **kwargs):
+        """Splits `ids` into chunks, calls `listing` for the chunks in
+        parallel and yields the listed entities as the chunks finish
+        (i.e. in no particular order).
+
+            keywords = client.fan_out(client.list_keywords, group_ids)
+            ads = client.fan_out(client.list_ads, group_ids, arg='groups',
+                                 workers=8)
+
+        :param listing: Listing method, e.g. `client.list_keywords`
+        :param ids: Ids passed to `listing` as the first argument,
+                    or as keyword argument `arg`
+        :param chunk_size: Number of ids listed by one call, defaults to
+                           the batch limit of the listing operation
+        :param workers: Number of calls in flight, defaults to
+                        `concurrency` of the client
+        :param kwargs: Other arguments of `listing`
+        """
+        if chunk_size is None:
+            namespace = getattr(listing, '__name__', '').partition('_')[2]
+            if namespace:
+                chunk_size = self.get_batch_limit(namespace + '.list')
+            chunk_size = chunk_size or self.FAN_OUT_CHUNK_SIZE
+
+        def list_chunk(chunk):
+            if arg is None:
+                return list(listing(chunk, **kwargs))
+            return list(listing(**dict(kwargs, **{arg: chunk})))
+
+        list_chunk = self._bind_deadline(list_chunk)
+        ids = list(ids)
+        chunks = (ids[i:i + chunk_size]
+                  for i in xrange(0, len(ids), chunk_size))
+        # the listings may use the pool of the client themselves (e.g.
+        # to prefetch pages), so they must not occupy its workers
+        window = workers or self.concurrency
+        pool = create_pool(window)
+        try:
+            for entities in imap_unordered(pool, list_chunk, chunks, window):
+                for entity in entities:
+                    yield entity
+        finally:
+            pool.shutdown(wait=False)
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = create_pool(self.concurrency)
+            return self._pool
+
     def _check_login_result(self, res):
         if res["status"] == 400:
             raise exc.ArgumentError(res["statusMessage"], res["problems"])
@@ -182,6 +909,21 @@ class BaseClient(object):
         elif res["status"] != 200:
             raise exc.SklikApiError(res["statusMessage"])
 
+    def _check_multicall_result(self, results):
+        """Refreshes session from successful results. Raises
+        `SessionError` if any of the calls failed on an expired session,
+        so that whole multicall is retried. Other errors are left to be
+        checked by `_check_result` for each call separately.
+        """
+        for res in results:
+            if not isinstance(res, list):
+                continue  # fault
+            res = res[0]
+            if "session" in res:
+                self.__session = res["session"]
+            if res["status"] == 401:
+                raise exc.SessionError(res["statusMessage"])
+
     def _check_result(self, res):
         if "session" in res:
             self.__session = res["session"]
@@ -198,7 +940,8 @@ class BaseClient(object):
         elif res["status"] == 404:
             raise exc.NotFoundError(res["statusMessage"])
         elif res["status"] in [206, 406]:
-            raise exc.InvalidDataError(res["status"], res.get("diagnostics"))
+            raise exc.InvalidDataError(res["status"], res.get("diagnostics"),
+                                       res)
         elif res["status"] == 409:
             warn(res["statusMessage"], exc.NoActionWarning)
         else:
@@ -0,0 +1,87 @@
+from xmlrpclib import Fault
+
+from . import exceptions as exc
+from .marshalling import marshall_param, marshall_result
+
+
+class BatchCall(object):
+    """Pending result of a call queued in :class:`Batch`."""
+
+    def __init__(self, method, args):
+        self.method = method
+        self.args = args
+        self._sent = False
+        self._result = None
+        self._error = None
+
+    def __repr__(self):
+        return '<BatchCall: %s>' % self.method
+
+    @property
+    def sent(self):
+        """Whether the batch containing this call was already sent."""
+        return self._sent
+
+    def result(self):
+        """Returns marshalled call result, raises the same exception as
+        a single call would if the call failed.
+        """
+        if not self._sent:
+            raise exc.SklikApiError('Batch has not been sent yet')
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def _resolve(self, client, res):
+        self._sent = True
+        if not isinstance(res, list):
+            self._error = Fault(res['faultCode'], res['faultString'])
+            return
+        try:
+            client._check_result(res[0])
+        except exc.SklikApiError as e:
+            self._error = e
+        else:
+            self._result = marshall_result(res[0])
+
+
+class Batch(object):
+    """Collects API calls and sends them as a single `system.multicall`
+    request. Use it as a context manager (see `BaseClient.batch`) or
+    call `send` explicitly.
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self._calls = []
+
+    def __len__(self):
+        return len(self._calls)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.send()
+
+    def call(self, method, *args):
+        """Queues call of API `method`, arguments are the same as for
+        `BaseClient._call`.
+
+        :return: :class:`BatchCall`
+        """
+        call = BatchCall(method, marshall_param(args))
+        self._calls.append(call)
+        return call
+
+    def send(self):
+        """Sends all queued calls and resolves their results."""
+        calls, self._calls = self._calls, []
+        if not calls:
+            return
+
+        results = self._client._multicall_and_retry(
+            [(call.method, call.args) for call in calls])
+        for call, res in zip(calls, results):
+            call._resolve(self._client, res)
@@ -0,0 +1,133 @@
+try:
+    import numpy
+except ImportError:
+    # BidEngine is not available
+    numpy = None
+
+from .entities import Keyword
+from .tables import KeywordTable
+
+
+def keyword_columns(keywords):
+    """Returns dict of numpy arrays with columns `id`, `groupId`, `cpc`,
+    `minCpc` and `status` of `keywords` (:class:`KeywordTable` or
+    iterable of keywords). Missing ids are set to -1, missing
+    bids to NaN.
+    """
+    if isinstance(keywords, KeywordTable):
+        column = keywords.column
+    else:
+        keywords = list(keywords)
+        column = lambda key: [getattr(kw, key) for kw in keywords]
+
+    def numbers(key, missing, dtype):
+        return numpy.array([value if type(value) in (int, long, float)
+                            else missing for value in column(key)],
+                           dtype=dtype)
+
+    return {
+        'id': numbers('id', -1, numpy.int64),
+        'groupId': numbers('groupId', -1, numpy.int64),
+        'cpc': numbers('cpc', numpy.nan, numpy.float64),
+        'minCpc': numbers('minCpc', numpy.nan, numpy.float64),
+        'status': numpy.array(column('status'), dtype=object),
+    }
+
+
+class BidEngine(object):
+    """Recomputes cpc of keywords by rules applied to whole columns
+    at once (using numpy). Rules are applied in the order they were
+    added, e.g.::
+
+        engine = BidEngine().multiply({1: 1.2, 2: 0.8}).clamp(100, 5000)
+        engine.apply(client, client.list_keywords(groups, as_table=True))
+
+    Keywords without cpc (using the one of their group) are kept as they
+    are. Resulting cpc is rounded to whole halers.
+    """
+
+    def __init__(self):
+        if numpy is None:
+            raise ImportError('BidEngine requires numpy')
+        self._rules = []
+
+    def rule(self, fn):
+        """Adds rule `fn` called with array of cpc and dict of columns
+        (see `keyword_columns`) returning array of new cpc.
+        """
+        self._rules.append(fn)
+        return self
+
+    def multiply(self, factor, where=None):
+        """Multiplies cpc by `factor`.
+
+        :param factor: Number or dict mapping group ids to numbers
+                       (keywords of the other groups are kept)
+        :param where: Function called with dict of columns returning
+                      boolean array of keywords to change
+        """
+        def multiply(cpc, columns):
+            factors = factor
+            if isinstance(factor, dict):
+                groups, inverse = numpy.unique(columns['groupId'],
+                                               return_inverse=True)
+                factors = numpy.array([factor.get(int(group), 1.0)
+                                       for group in groups])[inverse]
+            return _where(where, columns, cpc * factors, cpc)
+        return self.rule(multiply)
+
+    def clamp(self, minimum=None, maximum=None, where=None):
+        """Limits cpc to the range from `minimum` to `maximum`."""
+        def clamp(cpc, columns):
+            new = cpc
+            if minimum is not None:
+                new = numpy.where(new < minimum, minimum, new)
+            if maximum is not None:
+                new = numpy.where(new > maximum, maximum, new)
+            return _where(where, columns, new, cpc)
+        return self.rule(clamp)
+
+    def floor_to_min_cpc(self, where=None):
+        """Raises cpc lower than the minimal cpc of the keyword to it."""
+        def floor(cpc, columns):
+            min_cpc = columns['minCpc']
+            new = numpy.where(min_cpc > cpc, min_cpc, cpc)
+            return _where(where, columns, new, cpc)
+        return self.rule(floor)
+
+    def compute(self, columns):
+        """Returns array of new cpc for `columns`."""
+        cpc = columns['cpc']
+        # comparisons with missing cpc or minCpc (NaN) are false, which
+        # keeps them, without warning about it
+        with numpy.errstate(invalid='ignore'):
+            for rule in self._rules:
+                cpc = rule(cpc, columns)
+        return numpy.rint(cpc)
+
+    def updates(self, keywords):
+        """Returns list of keywords with id and cpc of those `keywords`
+        (see `keyword_columns`) whose cpc is changed by the rules.
+        """
+        columns = keyword_columns(keywords)
+        cpc = self.compute(columns)
+        changed = ((columns['id'] >= 0) & ~numpy.isnan(cpc)
+                   & (cpc != columns['cpc']))
+        return [Keyword(id=int(id), cpc=int(value))
+                for id, value in zip(columns['id'][changed], cpc[changed])]
+
+    def apply(self, client, keywords):
+        """Updates cpc of `keywords` changed by the rules using
+        `client.update_keywords`, i.e. in batches not exceeding its
+        batch limit. Returns the updates.
+        """
+        updates = self.updates(keywords)
+        if updates:
+            client.update_keywords(updates)
+        return updates
+
+
+def _where(where, columns, new, old):
+    if where is None:
+        return new
+    return numpy.where(where(columns), new, old)
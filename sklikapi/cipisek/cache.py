@@ -0,0 +1,93 @@
+import os
+import json
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # file locking is not available (Windows)
+    fcntl = None
+
+
+class FileCache(object):
+    """Cache of API version, limits and sessions stored in a JSON file,
+    so that short-lived processes can skip the calls made by the client
+    constructor. The file may be shared by more processes, access to it
+    is serialized by a lock file.
+    """
+
+    # Default time to live of cached items by their kind (in seconds)
+    TTLS = {
+        'version': 24 * 3600,
+        'limits': 3600,
+        'session': 10 * 60,
+    }
+
+    def __init__(self, path, ttls=None, clock=time.time):
+        """
+        :param path: Path to the cache file, it is created with
+                     permissions for the owner only as it contains sessions
+        :param ttls: Dict overriding some of the default `TTLS`
+        :param clock: Function returning current time (in seconds)
+        """
+        self.path = path
+        self.ttls = dict(self.TTLS, **(ttls or {}))
+        self._clock = clock
+
+    def get(self, kind, key):
+        """Returns cached value or `None` if it is missing or expired."""
+        with self._locked(fcntl and fcntl.LOCK_SH):
+            item = self._load().get(self._key(kind, key))
+        if item is None or item['expires'] <= self._clock():
+            return None
+        return item['value']
+
+    def set(self, kind, key, value):
+        """Stores value for the time to live of its `kind`."""
+        expires = self._clock() + self.ttls[kind]
+        self._update(kind, key, {'value': value, 'expires': expires})
+
+    def delete(self, kind, key):
+        self._update(kind, key, None)
+
+    def _update(self, kind, key, item):
+        with self._locked(fcntl and fcntl.LOCK_EX):
+            now = self._clock()
+            data = dict((k, v) for k, v in self._load().iteritems()
+                        if v['expires'] > now)
+            if item is None:
+                data.pop(self._key(kind, key), None)
+            else:
+                data[self._key(kind, key)] = item
+            self._dump(data)
+
+    def _key(self, kind, key):
+        return '%s %s' % (kind, key)
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return {}
+
+    def _dump(self, data):
+        tmp_path = '%s.%d.tmp' % (self.path, os.getpid())
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.rename(tmp_path, self.path)
+
+    @contextmanager
+    def _locked(self, operation):
+        if fcntl is None:
+            yield
+            return
+
+        fd = os.open(self.path + '.lock', os.O_RDWR | os.O_CREAT, 0600)
+        try:
+            fcntl.flock(fd, operation)
+            yield
+        finally:
+            os.close(fd)
@@ -9,30 +9,43 @@ class CampaignsClient(BaseClient):
         filter = {
             'includeDeleted': bool(include_deleted),
         }
-        result = self._call('campaigns.list', filter)
-        return Campaign.marshall_list(result['campaigns'])
+        return self._call_listing('campaigns.list', 'campaigns', Campaign,
+                                  filter)
+
+    def iter_campaigns(self, include_deleted=False, page_size=None,
+                       prefetch=False):
+        """Iterates over campaigns, fetching them page by page.
+
+        :param page_size: Number of campaigns fetched at once
+        :param prefetch: Whether to fetch next page in the background
+                         while the current one is being consumed
+        """
+        filter = {
+            'includeDeleted': bool(include_deleted),
+        }
+        return self._iter_pages('campaigns.list', 'campaigns', Campaign,
+                                page_size, prefetch, filter)
 
     def create_campaigns(self, campaigns):
-        result = self._call('campaigns.create', list(campaigns))
+        result = self._call_chunked('campaigns.create', campaigns)
         return result["campaignIds"]
 
     def get_campaigns(self, campaign_ids):
-        result = self._call('campaigns.get', list(campaign_ids))
-        return Campaign.marshall_list(result["campaigns"])
+        return self._call_get('campaigns.get', 'campaigns', Campaign,
+                              campaign_ids)
 
     def check_campaigns(self, campaigns):
-        self._call('campaigns.check', list(campaigns))
+        self._call_chunked('campaigns.check', campaigns)
         return True
 
     def update_campaigns(self, campaigns):
-        campaigns = [dict(c.iterate_updatable()) for c in campaigns]
-        self._call('campaigns.update', campaigns)
+        self._call_update('campaigns.update', campaigns)
         return True
 
     def remove_campaigns(self, campaign_ids):
-        self._call('campaigns.remove', list(campaign_ids))
+        self._call_chunked('campaigns.remove', campaign_ids)
         return True
 
     def restore_campaigns(self, campaign_ids):
-        self._call('campaigns.restore', list(campaign_ids))
+        self._call_chunked('campaigns.restore', campaign_ids)
         return True
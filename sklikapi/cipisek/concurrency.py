@@ -0,0 +1,193 @@
+import sys
+import threading
+from Queue import Queue
+from itertools import islice
+
+from . import exceptions as exc
+
+
+class Future(object):
+    """Result of an asynchronous call, resolved by a worker pool."""
+
+    def __init__(self, event_class=threading.Event, queue_class=Queue):
+        self._event = event_class()
+        self._queue_class = queue_class
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self._result = None
+        self._exc_info = None
+
+    def done(self):
+        """Whether the call has already finished."""
+        return self._event.is_set()
+
+    def result(self, timeout=None):
+        """Waits for the call to finish and returns its result. If the call
+        raised an exception, the same exception is raised here.
+
+        :param timeout: Maximal time to wait (in seconds), `TimeoutError`
+                        is raised if the call does not finish in time
+        """
+        if not self._event.wait(timeout):
+            raise exc.TimeoutError('Call did not finish in %s s' % timeout)
+        if self._exc_info is not None:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        return self._result
+
+    def exception(self, timeout=None):
+        """Waits for the call to finish and returns exception it raised
+        or `None`.
+        """
+        if not self._event.wait(timeout):
+            raise exc.TimeoutError('Call did not finish in %s s' % timeout)
+        return self._exc_info[1] if self._exc_info else None
+
+    def add_done_callback(self, fn):
+        """Calls `fn(future)` once the call is finished."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def set_result(self, result):
+        self._result = result
+        self._finish()
+
+    def set_exc_info(self, exc_info):
+        self._exc_info = exc_info
+        self._finish()
+
+    def _finish(self):
+        with self._lock:
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            fn(self)
+
+
+def _run(future, fn, args, kwargs):
+    try:
+        result = fn(*args, **kwargs)
+    except BaseException:
+        future.set_exc_info(sys.exc_info())
+    else:
+        future.set_result(result)
+
+
+class ThreadPool(object):
+    """Bounded pool of worker threads, started lazily."""
+
+    queue_class = Queue
+
+    def __init__(self, size=10):
+        self.size = size
+        self._queue = Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedules `fn(*args, **kwargs)` and returns :class:`Future`."""
+        future = Future(queue_class=self.queue_class)
+        self._queue.put((future, fn, args, kwargs))
+        with self._lock:
+            if len(self._workers) < self.size:
+                worker = threading.Thread(target=self._work)
+                worker.daemon = True
+                worker.start()
+                self._workers.append(worker)
+        return future
+
+    def shutdown(self, wait=True):
+        """Stops all workers once the already scheduled calls finish.
+
+        :param wait: Whether to wait for the workers to stop
+        """
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for _ in workers:
+            self._queue.put(None)
+        if wait:
+            for worker in workers:
+                worker.join()
+
+    def _work(self):
+        while True:
+            task = self._queue.get()
+            if task is None:
+                return
+            _run(*task)
+
+
+class GeventPool(object):
+    """Bounded pool of greenlets."""
+
+    def __init__(self, size=10):
+        from gevent.pool import Pool
+        from gevent.queue import Queue as GeventQueue
+
+        self.size = size
+        self.queue_class = GeventQueue
+        self._pool = Pool(size)
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedules `fn(*args, **kwargs)` and returns :class:`Future`."""
+        from gevent.event import Event
+
+        future = Future(Event, self.queue_class)
+        self._pool.spawn(_run, future, fn, args, kwargs)
+        return future
+
+    def shutdown(self, wait=True):
+        """Waits for the already scheduled calls.
+
+        :param wait: Whether to wait for the calls to finish
+        """
+        if wait:
+            self._pool.join()
+
+
+# gevent compatibility
+def create_pool(size=10):
+    """Returns :class:`GeventPool` if gevent is used, :class:`ThreadPool`
+    otherwise.
+    """
+    if 'gevent' in sys.modules:
+        return GeventPool(size)
+    else:
+        return ThreadPool(size)
+
+
+def as_completed(futures):
+    """Yields futures as they finish."""
+    futures = list(futures)
+    if not futures:
+        return
+
+    finished = futures[0]._queue_class()
+    for future in futures:
+        future.add_done_callback(finished.put)
+    for _ in futures:
+        yield finished.get()
+
+
+def imap_unordered(pool, fn, iterable, window):
+    """Calls `fn(item)` for items of `iterable` in `pool` and yields the
+    results as they finish. At most `window` calls are in flight, so
+    `iterable` is consumed only as fast as the results are.
+    """
+    iterable = iter(iterable)
+    finished = pool.queue_class()
+    in_flight = 0
+
+    for item in islice(iterable, window):
+        pool.submit(fn, item).add_done_callback(finished.put)
+        in_flight += 1
+
+    while in_flight:
+        future = finished.get()
+        in_flight -= 1
+        for item in islice(iterable, 1):
+            pool.submit(fn, item).add_done_callback(finished.put)
+            in_flight += 1
+        yield future.result()
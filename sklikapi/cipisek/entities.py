@@ -1,4 +1,5 @@
-from itertools import chain
+from copy import deepcopy
+from itertools import chain, izip
 
 
 class Missing(object):
@@ -18,9 +19,63 @@ class Missing(object):
     def __bool__(self):
         return False
 
+    # keeps the only instance when copied or pickled
+    def __reduce__(self):
+        return 'Missing'
+
 Missing = Missing()
 
 
+class EntityMeta(type):
+    """Metaclass of entities precomputing their slot metadata, i.e. tuple
+    `_slots` of keys from `__slots__` of all parent classes (except the
+    private ones starting with underscore) and frozenset
+    `_updatable_slots`, and generating code which accesses the slots
+    directly, so it does not need to be looked up on every call.
+    """
+
+    def __init__(cls, name, bases, attrs):
+        super(EntityMeta, cls).__init__(name, bases, attrs)
+        cls._slots = tuple(key for key in chain.from_iterable(
+            getattr(klass, '__slots__', []) for klass in cls.__mro__)
+            if not key.startswith('_'))
+        if cls._updatable_attributes is None:
+            cls._updatable_slots = None
+        else:
+            cls._updatable_slots = frozenset(cls._updatable_attributes)
+
+        namespace = {'Missing': Missing}
+        conversions = []
+        for key, target in cls._entity_list_attributes.items():
+            namespace['_' + key] = target
+            conversions.append(
+                '    if self.%(key)s:\n'
+                '        self.%(key)s = _%(key)s.marshall_list(self.%(key)s)\n'
+                % {'key': key})
+        source = (
+            'def _init_slots(self, kwargs):\n'
+            '    get = kwargs.get\n'
+            '%s%s    pass\n'
+            '\n'
+            'def _get_values(self):\n'
+            '    return (%s)\n'
+            '\n'
+            'def _equals(self, other):\n'
+            '    return %s\n'
+        ) % (
+            ''.join('    self.%s = get(%r, Missing)\n' % (key, key)
+                    for key in cls._slots),
+            ''.join(conversions),
+            ''.join('self.%s, ' % key for key in cls._slots),
+            ' and '.join(['True'] + ['self.%s == other.%s' % (key, key)
+                                     for key in cls._slots]),
+        )
+        exec source in namespace
+        cls._init_slots = namespace['_init_slots']
+        cls._get_values = namespace['_get_values']
+        cls._equals = namespace['_equals']
+
+
 class Entity(object):
     """Base class for all sklik entities.
 
@@ -29,7 +84,10 @@ class Entity(object):
     `dict(entity.iterate_all())`
     """
 
-    __slots__ = []
+    __metaclass__ = EntityMeta
+
+    # original values, see `track_changes`
+    __slots__ = ['_original']
 
     """Attributes which contains lists of other entities and should be
     automatically converted to instances of entity type. Keys are
@@ -43,6 +101,11 @@ class Entity(object):
     """
     _updatable_attributes = None
 
+    """Attributes which contains datetimes, i.e. have to be converted
+    from/to `xmlrpclib.DateTime` when sent or received.
+    """
+    _datetime_attributes = []
+
     @classmethod
     def marshall_list(cls, src_list):
         """Converts iterable of dicts/entites to list of instances
@@ -55,37 +118,28 @@ class Entity(object):
 
     def __init__(self, source=None, **kwargs):
         if source:
-            if isinstance(source, type(self)):
-                for key, val in source:
-                    kwargs[key] = val
-            elif isinstance(source, dict):
-                kwargs.update(source)
+            # dicts, and entities and keyword table rows iterating over
+            # their (key, value) pairs
+            kwargs.update(source)
 
-        for key in self._get_slots():
-            setattr(self, key, kwargs.get(key, Missing))
-
-        for key, cls in self._entity_list_attributes.items():
-            val = getattr(self, key)
-            if val:
-                setattr(self, key, cls.marshall_list(val))
+        self._init_slots(kwargs)
+        self._original = None
 
     def __iter__(self):
         return self.iterate_non_missing()
 
     def __eq__(self, other):
-        for key in self._get_slots():
-            if not hasattr(other, key):
-                return False
-            if getattr(self, key) != getattr(other, key):
-                return False
-        return True
+        try:
+            return self._equals(other)
+        except AttributeError:
+            return False
 
     def __ne__(self, other):
         return not self.__eq__(other)
 
     def __repr__(self):
-        vals = ['%s=%s' % (key, repr(getattr(self, key)))
-                for key in self._get_slots()]
+        vals = ['%s=%s' % (key, repr(val))
+                for key, val in self.iterate_all()]
         return '<' + self.__class__.__name__ + ': ' + ', '.join(vals) + '>'
 
     def __str__(self):
@@ -93,38 +147,60 @@ class Entity(object):
 
     def _get_slots(self):
         """Returns all keys from __slots__  of all parent classes."""
-        return chain.from_iterable(getattr(cls, '__slots__', [])
-                                   for cls in type(self).__mro__)
+        return self._slots
 
     def iterate_all(self):
         """Iterate over all values."""
-        return ((key, getattr(self, key))
-                for key in self._get_slots())
+        return izip(self._slots, self._get_values())
 
     def iterate_non_missing(self):
         """Iterate over all values not equal to <Missing>."""
         return ((key, val)
-                for (key, val) in self.iterate_all()
-                if val != Missing)
+                for (key, val) in izip(self._slots, self._get_values())
+                if val is not Missing)
 
     def iterate_updatable(self):
         """Iterate over all values which can be updated."""
-        if self._updatable_attributes is None:
+        if self._updatable_slots is None:
             return self.iterate_non_missing()
+        updatable = self._updatable_slots
         return ((key, val)
-                for (key, val) in self.iterate_all()
-                if val != Missing and key in self._updatable_attributes)
+                for (key, val) in izip(self._slots, self._get_values())
+                if val is not Missing and key in updatable)
+
+    def track_changes(self):
+        """Records current values as the original ones, `iterate_changes`
+        then returns only values changed since. Entities fetched from
+        the API track their changes.
+        """
+        # lists (e.g. of regions) may be changed in place
+        self._original = tuple(deepcopy(val) if type(val) is list else val
+                               for val in self._get_values())
+        return self
+
+    def iterate_changes(self):
+        """Iterate over id and values which can be updated and were
+        changed since `track_changes`. If changes are not tracked,
+        it is the same as `iterate_updatable`.
+        """
+        if self._original is None:
+            return self.iterate_updatable()
+        updatable = self._updatable_slots
+        return ((key, val)
+                for (key, val, original) in izip(self._slots,
+                                                  self._get_values(),
+                                                  self._original)
+                if val is not Missing and (key == 'id' or (
+                    val != original
+                    and (updatable is None or key in updatable))))
 
     @property
     def all_fields_missing(self):
         """Whether all fields are equal to <Missing>."""
-        for f in self.iterate_non_missing():
-            # If at least one field is non-missing, the for cycle
-            # will execute its body. We use for, so we don't need to
-            # convert the iterator to list
-            return False
-        else:
-            return True
+        for val in self._get_values():
+            if val is not Missing:
+                return False
+        return True
 
 
 class Ad(Entity):
@@ -150,6 +226,8 @@ class Ad(Entity):
         'premiseId', 'deleted', 'deletedDate'
     ]
 
+    _datetime_attributes = ['createDate', 'deletedDate']
+
     _updatable_attributes = [
         'id', 'creative1', 'creative2', 'creative3', 'clickthruText',
         'clickthruUrl', 'status', 'premiseMode', 'premiseId'
@@ -174,8 +252,10 @@ class Keyword(Entity):
         'id', 'groupId', 'name', 'matchType', 'deleted', 'status', 'disabled',
         'cpc', 'url', 'createDate', 'minCpc']
 
+    _datetime_attributes = ['createDate']
+
     _updatable_attributes = [
-        'status', 'cpc', 'url'
+        'id', 'status', 'cpc', 'url'
     ]
 
 
@@ -251,6 +331,8 @@ class Campaign(Entity):
         'regions', 'premiseId'
     ]
 
+    _datetime_attributes = ['startDate', 'endDate', 'createDate']
+
     def __init__(self, source=None, **kwargs):
         super(Campaign, self).__init__(source, **kwargs)
         if self.regions is None:
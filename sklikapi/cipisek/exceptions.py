@@ -37,13 +37,20 @@ class ArgumentError(SklikApiError):
 
 
 class InvalidDataError(SklikApiError):
-    """Sklik API invalid data error exception"""
+    """Sklik API invalid data error exception
+
+    Raised by bulk operations if some of the items are refused, `result`
+    then contains result of the accepted items and `failed` list of
+    tuples (index, item, diagnostics) of the refused ones.
+    """
 
     __slots__ = ["__errors"]
 
-    def __init__(self, message, errors):
+    def __init__(self, message, errors, result=None, failed=None):
         SklikApiError.__init__(self, message)
         self.__errors = errors
+        self.result = result
+        self.failed = failed or []
 
     def errors(self):
         return self.__errors
@@ -68,6 +75,21 @@ class AccessError(SklikApiError):
     pass
 
 
+class TimeoutError(SklikApiError):
+    """Sklik API call timed out error exception"""
+    pass
+
+
+class DeadlineExceededError(TimeoutError):
+    """Sklik API operation did not finish before its deadline exception"""
+    pass
+
+
+class CircuitOpenError(SklikApiError):
+    """Sklik API call not made because the API keeps failing exception"""
+    pass
+
+
 class NoActionWarning(SklikApiWarning):
     """Sklik API no action error exception"""
     pass
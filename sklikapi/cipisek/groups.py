@@ -6,34 +6,46 @@ class GroupsClient(BaseClient):
     """Sklik API groups namespace client."""
 
     def list_groups(self, campaigns=None, include_deleted=False):
-        filter = {
+        filter = self._groups_filter(campaigns, include_deleted)
+        return self._call_listing('groups.list', 'groups', Group, filter)
+
+    def iter_groups(self, campaigns=None, include_deleted=False,
+                    page_size=None, prefetch=False):
+        """Iterates over groups, fetching them page by page.
+
+        :param page_size: Number of groups fetched at once
+        :param prefetch: Whether to fetch next page in the background
+                         while the current one is being consumed
+        """
+        filter = self._groups_filter(campaigns, include_deleted)
+        return self._iter_pages('groups.list', 'groups', Group, page_size,
+                                prefetch, filter)
+
+    def _groups_filter(self, campaigns, include_deleted):
+        return {
             'campaignIds': list(campaigns or []),
             'includeDeleted': bool(include_deleted),
         }
-        result = self._call('groups.list', filter)
-        return Group.marshall_list(result['groups'])
 
     def create_groups(self, groups):
-        result = self._call('groups.create', list(groups))
+        result = self._call_chunked('groups.create', groups)
         return result["groupIds"]
 
     def get_groups(self, group_ids):
-        result = self._call('groups.get', list(group_ids))
-        return Group.marshall_list(result["groups"])
+        return self._call_get('groups.get', 'groups', Group, group_ids)
 
     def check_groups(self, groups):
-        self._call('groups.check', list(groups))
+        self._call_chunked('groups.check', groups)
         return True
 
     def update_groups(self, groups):
-        groups = [dict(g.iterate_updatable()) for g in groups]
-        self._call('groups.update', groups)
+        self._call_update('groups.update', groups)
         return True
 
     def remove_groups(self, group_ids):
-        self._call('groups.remove', list(group_ids))
+        self._call_chunked('groups.remove', group_ids)
         return True
 
     def restore_groups(self, group_ids):
-        self._call('groups.restore', list(group_ids))
+        self._call_chunked('groups.restore', group_ids)
         return True
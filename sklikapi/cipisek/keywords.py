@@ -1,4 +1,5 @@
 from .entities import Keyword
+from .tables import KeywordTable
 from .baseclient import BaseClient
 
 
@@ -6,40 +7,69 @@ class KeywordsClient(BaseClient):
     """Sklik API keywords namespace client."""
 
     def list_keywords(self, groups, limit=None, offset=None,
+                      positive=True, negative=True, include_deleted=False,
+                      as_table=False):
+        """Returns keywords of `groups`.
+
+        :param as_table: Whether to return :class:`KeywordTable`, which
+                         needs much less memory than list of keywords
+        """
+        filter = self._keywords_filter(groups, positive, negative,
+                                       include_deleted)
+        if limit:
+            filter['limit'] = int(limit)
+        if offset:
+            filter['offset'] = int(offset)
+        if as_table:
+            table = KeywordTable()
+            # rows are appended as they are parsed
+            with self._parsing(keywords=table.append):
+                result = self._call('keywords.list', filter)
+            # rows of the attempts which failed precede the ones of the
+            # last attempt, which are the only returned in `result`
+            count = len(result['keywords'])
+            if len(table) > count:
+                table = table[len(table) - count:]
+            return table
+        return self._call_listing('keywords.list', 'keywords', Keyword,
+                                  filter)
+
+    def iter_keywords(self, groups, page_size=None, prefetch=False,
                       positive=True, negative=True, include_deleted=False):
-        filter = {
+        """Iterates over keywords of `groups`, fetching them page by page.
+
+        :param page_size: Number of keywords fetched at once
+        :param prefetch: Whether to fetch next page in the background
+                         while the current one is being consumed
+        """
+        filter = self._keywords_filter(groups, positive, negative,
+                                       include_deleted)
+        return self._iter_pages('keywords.list', 'keywords', Keyword,
+                                page_size, prefetch, filter)
+
+    def _keywords_filter(self, groups, positive, negative, include_deleted):
+        return {
             'groupIds': list(groups),
             'positiveKeywords': bool(positive),
             'negativeKeywords': bool(negative),
             'includeDeleted': bool(include_deleted),
         }
-        if limit:
-            filter['limit'] = int(limit)
-        if offset:
-            filter['offset'] = int(offset)
-        result = self._call('keywords.list', filter)
-        return Keyword.marshall_list(result['keywords'])
 
     def create_keywords(self, keywords):
-        result = {}
-        chunks = [keywords[x:x+100] for x in xrange(0, len(keywords), 100)]
-        for chunk in chunks:
-            result.update(self._call('keywords.create', chunk))
+        result = self._call_chunked('keywords.create', keywords)
         return result["positiveKeywordIds"] + result["negativeKeywordIds"]
 
     def get_keywords(self, keyword_ids):
-        result = self._call('keywords.get', list(keyword_ids))
-        return Keyword.marshall_list(result["keywords"])
+        return self._call_get('keywords.get', 'keywords', Keyword, keyword_ids)
 
     def check_keywords(self, keywords):
-        return self._call('keywords.check', list(keywords))
+        return self._call_chunked('keywords.check', keywords)
 
     def update_keywords(self, keywords):
-        keywords = [dict(kw.iterate_updatable()) for kw in keywords]
-        return self._call('keywords.update', keywords)
+        return self._call_update('keywords.update', keywords)
 
     def remove_keywords(self, keyword_ids):
-        return self._call('keywords.remove', list(keyword_ids))
+        return self._call_chunked('keywords.remove', keyword_ids)
 
     def restore_keywords(self, keyword_ids):
-        return self._call('keywords.restore', list(keyword_ids))
+        return self._call_chunked('keywords.restore', keyword_ids)
@@ -1,75 +1,325 @@
-from time import strptime
-from types import GeneratorType
+from types import GeneratorType, InstanceType, NoneType
 from datetime import datetime
-from itertools import imap
+from itertools import imap, repeat
 from functools import wraps
 from xmlrpclib import DateTime
 
-from .entities import Entity
+from .entities import Entity, EntityMeta, Missing
+from .tables import KeywordRow, KeywordTable
+from .unmarshalling import parse_datetime
 
 
-def marshall_param(data):
-    """Converts all `Entity` instances to dicts, recursively.
-    Dicts, lists, and tuples are kept, generators are wrapped by
-    `itertools.imap`, `datetime.datetime` objects are converted to
-    `xmlrpclib.DateTime`. Other data types are left as-is.
+# Types which are never converted, containers holding only these
+# are returned without copying
+_SCALARS = frozenset([str, unicode, int, long, float, bool, NoneType])
+
+
+def _find_handler(handlers, fallbacks, data_type):
+    """Finds handler of `data_type` (probably a subclass of some
+    of the `fallbacks` types) and stores it in `handlers`.
+    """
+    handler = None
+    for base, base_handler in fallbacks:
+        if issubclass(data_type, base):
+            handler = base_handler
+            break
+    handlers[data_type] = handler
+    return handler
+
+
+def _convert_dict(data, convert, *args):
+    """Converts values of dict `data`, copy is made only if some
+    of them changes.
     """
+    converted = None
+    for key, value in data.iteritems():
+        if type(value) in _SCALARS:
+            continue
+        new = convert(value, *args)
+        if new is not value:
+            if converted is None:
+                converted = dict(data)
+            converted[key] = new
+    return data if converted is None else converted
 
-    if isinstance(data, Entity):
-        return dict((k, marshall_param(v))
-                    for (k, v) in data)
 
-    elif isinstance(data, dict):
-        return dict((key, marshall_param(value))
-                    for key, value in data.iteritems())
+def _convert_list(data, convert, *args):
+    """Converts items of list or tuple `data` to list, copy is made
+    only if some of them changes.
+    """
+    converted = None
+    for i, value in enumerate(data):
+        if type(value) in _SCALARS:
+            continue
+        new = convert(value, *args)
+        if new is not value:
+            if converted is None:
+                converted = list(data)
+            converted[i] = new
+    return data if converted is None else converted
+
+
+_ENCODE_SCALAR = """
+    value = entity.%(key)s
+    if %(condition)s:
+        if value.__class__ not in _SCALARS:
+            value = marshall_param(value)
+        result[%(key)r] = value
+"""
+
+_ENCODE_DATETIME = """
+    value = entity.%(key)s
+    if %(condition)s:
+        if value.__class__ is datetime:
+            value = DateTime(value)
+        elif value.__class__ not in _SCALARS:
+            value = marshall_param(value)
+        result[%(key)r] = value
+"""
+
+_ENCODE_LIST = """
+    value = entity.%(key)s
+    if %(condition)s:
+        result[%(key)r] = marshall_param(value)
+"""
 
-    elif isinstance(data, list):
-        return map(marshall_param, data)
+_ENCODE_CHANGES = """
+    original = entity._original
+    if original is None:
+        return encode_updatable(entity)
+"""
 
-    elif isinstance(data, tuple):
-        return tuple(map(marshall_param, data))
 
-    elif isinstance(data, GeneratorType):
-        return imap(marshall_param, data)
+def _encoder_source(name, entity_class, keys, changes=False):
+    """Returns source of function `name` converting values of `keys`
+    of `entity_class` instances to dict. If `changes` is set, only id
+    and values changed since `Entity.track_changes` are converted.
+    """
+    lines = ['def %s(entity):\n' % name]
+    if changes:
+        lines.append(_ENCODE_CHANGES)
+    lines.append('    result = {}\n')
+    for key in keys:
+        if key in entity_class._entity_list_attributes:
+            template = _ENCODE_LIST
+        elif key in entity_class._datetime_attributes:
+            template = _ENCODE_DATETIME
+        else:
+            template = _ENCODE_SCALAR
+        condition = 'value is not Missing'
+        if changes and key != 'id':
+            condition += ' and value != original[%d]' % (
+                entity_class._slots.index(key))
+        lines.append(template % {'key': key, 'condition': condition})
+    lines.append('    return result\n\n')
+    return ''.join(lines)
+
+
+def _compile_encoders(source):
+    namespace = {
+        'Missing': Missing,
+        'DateTime': DateTime,
+        'datetime': datetime,
+        'marshall_param': marshall_param,
+        '_SCALARS': _SCALARS,
+    }
+    exec source in namespace
+    return namespace
 
-    elif isinstance(data, datetime):
-        return DateTime(data)
 
+def _compile_encoder(entity_class):
+    """Generates function converting `entity_class` instances to dicts,
+    which checks types only of the values it does not know.
+    """
+    source = _encoder_source('encode', entity_class, entity_class._slots)
+    return _compile_encoders(source)['encode']
+
+
+def _compile_changes_encoder(entity_class):
+    """Generates function converting id and values of `entity_class`
+    instances which can be updated and were changed (see
+    `Entity.iterate_changes`) to dicts, like `_compile_encoder` does.
+    """
+    updatable = entity_class._updatable_slots
+    if updatable is None:
+        updatable = entity_class._slots
     else:
+        updatable = [key for key in entity_class._slots
+                     if key in updatable]
+    changed = [key for key in entity_class._slots
+               if key == 'id' or key in updatable]
+    source = (
+        _encoder_source('encode_updatable', entity_class, updatable) +
+        _encoder_source('encode_changes', entity_class, changed,
+                        changes=True))
+    return _compile_encoders(source)['encode_changes']
+
+
+def _compile_decoder(entity_class):
+    """Returns function converting dicts to `entity_class` instances,
+    which converts only values of the known types, and values it does
+    not know the same way as `marshall_result`.
+    """
+    def default(value):
+        return marshall_result(value, entity_class)
+
+    def decode_datetime(value):
+        if value.__class__ is DateTime:
+            return parse_datetime(value.value)
+        return default(value)
+
+    decoders = dict.fromkeys(entity_class._datetime_attributes,
+                             decode_datetime)
+    for key, target in entity_class._entity_list_attributes.iteritems():
+        if isinstance(target, EntityMeta):
+            decoders[key] = lambda value, target=target: \
+                marshall_result(value, target)
+    get_decoder = decoders.get
+
+    def decode(data):
+        kwargs = dict(data)
+        for key, value in data.iteritems():
+            if value.__class__ not in _SCALARS:
+                kwargs[key] = get_decoder(key, default)(value)
+        return entity_class(**kwargs)
+
+    return decode
+
+
+_encoders = {}
+_changes_encoders = {}
+_decoders = {}
+
+
+def _get_codec(codecs, compile_codec, entity_class):
+    try:
+        return codecs[entity_class]
+    except KeyError:
+        codec = codecs[entity_class] = compile_codec(entity_class)
+        return codec
+
+
+def _param_entity(data):
+    return _get_codec(_encoders, _compile_encoder, type(data))(data)
+
+
+def _param_row(data):
+    return _convert_dict(dict(data), marshall_param)
+
+
+def _param_dict(data):
+    return _convert_dict(data, marshall_param)
+
+
+def _param_list(data):
+    return _convert_list(data, marshall_param)
+
+
+def _param_tuple(data):
+    return tuple(_convert_list(data, marshall_param))
+
+
+def _param_generator(data):
+    return imap(marshall_param, data)
+
+
+_PARAM_FALLBACKS = [
+    (Entity, _param_entity),
+    (KeywordRow, _param_row),
+    (KeywordTable, _param_list),
+    (dict, _param_dict),
+    (list, _param_list),
+    (tuple, _param_tuple),
+    (GeneratorType, _param_generator),
+    (datetime, DateTime),
+]
+
+_param_handlers = dict.fromkeys(_SCALARS)
+
+
+def marshall_param(data):
+    """Converts all `Entity` instances to dicts, recursively.
+    Dicts, lists, and tuples are kept, generators are wrapped by
+    `itertools.imap`, `datetime.datetime` objects are converted to
+    `xmlrpclib.DateTime`. Other data types are left as-is.
+    """
+    data_type = type(data)
+    try:
+        handler = _param_handlers[data_type]
+    except KeyError:
+        handler = _find_handler(_param_handlers, _PARAM_FALLBACKS, data_type)
+    if handler is None:
         return data
+    return handler(data)
 
 
-def marshall_result(data, obj_type=None):
-    """Lists and tuples are kept, generators are wrapped by
-    `itertools.imap`, `xmlrpclib.DateTime` objects are converted to
-    `datetime.datetime`. Dicts are kept unless `obj_type` is set, in
-    which case dicts are converted to `obj_type` instances.
-    Other data types are left as-is.
+def marshall_changes(entity):
+    """Converts id and values of `entity` which were changed (see
+    `Entity.iterate_changes`) to dict, the same way as `marshall_param`
+    converts whole entities.
     """
-    recursion = lambda data: marshall_result(data, obj_type)
+    return _get_codec(_changes_encoders, _compile_changes_encoder,
+                      type(entity))(entity)
 
-    if obj_type and isinstance(data, dict):
-        kwargs = dict((k, recursion(v))
+
+def _result_dict(data, obj_type):
+    if isinstance(obj_type, EntityMeta):
+        return _get_codec(_decoders, _compile_decoder, obj_type)(data)
+    elif obj_type:
+        kwargs = dict((k, marshall_result(v, obj_type))
                       for (k, v) in data.iteritems())
         return obj_type(**kwargs)
+    return _convert_dict(data, marshall_result, obj_type)
 
-    elif isinstance(data, dict):
-        return dict((k, recursion(v)) for (k, v) in data.iteritems())
 
-    elif isinstance(data, list):
-        return map(recursion, data)
+def _result_list(data, obj_type):
+    if obj_type:
+        return [marshall_result(item, obj_type) for item in data]
+    return _convert_list(data, marshall_result, obj_type)
 
-    elif isinstance(data, tuple):
-        return tuple(map(recursion, data))
 
-    elif isinstance(data, GeneratorType):
-        return imap(recursion, data)
+def _result_tuple(data, obj_type):
+    return tuple(_result_list(data, obj_type))
 
-    elif isinstance(data, DateTime):
-        return datetime(*strptime(data.value[:-5], "%Y%m%dT%H:%M:%S")[:6])
 
-    else:
+def _result_generator(data, obj_type):
+    return imap(marshall_result, data, repeat(obj_type))
+
+
+def _result_instance(data, obj_type):
+    # xmlrpclib.DateTime is an old-style class
+    if isinstance(data, DateTime):
+        return parse_datetime(data.value)
+    return data
+
+
+_RESULT_FALLBACKS = [
+    (dict, _result_dict),
+    (list, _result_list),
+    (tuple, _result_tuple),
+    (GeneratorType, _result_generator),
+]
+
+_result_handlers = dict.fromkeys(_SCALARS)
+_result_handlers[InstanceType] = _result_instance
+
+
+def marshall_result(data, obj_type=None):
+    """Lists and tuples are kept, generators are wrapped by
+    `itertools.imap`, `xmlrpclib.DateTime` objects are converted to
+    `datetime.datetime`. Dicts are kept unless `obj_type` is set, in
+    which case dicts are converted to `obj_type` instances.
+    Other data types are left as-is.
+    """
+    data_type = type(data)
+    try:
+        handler = _result_handlers[data_type]
+    except KeyError:
+        handler = _find_handler(_result_handlers, _RESULT_FALLBACKS,
+                                data_type)
+    if handler is None:
         return data
+    return handler(data, obj_type)
 
 
 def marshall(obj_type=None):
@@ -0,0 +1,202 @@
+import threading
+from bisect import bisect_left
+
+
+# Upper bounds of buckets of call latency (in seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+                   30, 60)
+
+# Upper bounds of buckets of number of items sent by bulk operations
+ITEM_BUCKETS = (1, 10, 50, 100, 250, 500, 1000, 5000, 10000)
+
+# Counters of `MethodMetrics` and their descriptions
+COUNTERS = [
+    ('calls', 'Number of calls'),
+    ('errors', 'Number of calls which raised an error'),
+    ('retries', 'Number of retries'),
+    ('relogins', 'Number of re-logins because of expired session'),
+    ('throttle_seconds', 'Time spent waiting for the rate limiter'),
+    ('request_bytes', 'Bytes of requests sent'),
+    ('response_bytes', 'Bytes of responses received'),
+]
+
+
+class Histogram(object):
+    """Counts of observed values in buckets given by their upper
+    bounds, values greater than the last one fall to the +Inf bucket.
+    """
+
+    __slots__ = ['buckets', 'counts', 'count', 'sum']
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Returns estimate of `q`-quantile interpolated within its bucket
+        (like Prometheus `histogram_quantile`), `None` if there are no
+        values.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0
+                upper = self.buckets[i]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+        }
+
+
+class MethodMetrics(object):
+    """Metrics of calls of one API method."""
+
+    __slots__ = [key for key, _ in COUNTERS] + ['latency', 'items']
+
+    def __init__(self, latency_buckets=LATENCY_BUCKETS,
+                 item_buckets=ITEM_BUCKETS):
+        for key, _ in COUNTERS:
+            setattr(self, key, 0)
+        self.latency = Histogram(latency_buckets)
+        self.items = Histogram(item_buckets)
+
+    def as_dict(self):
+        result = dict((key, getattr(self, key)) for key, _ in COUNTERS)
+        result['latency'] = self.latency.as_dict()
+        result['items'] = self.items.as_dict()
+        return result
+
+
+class MetricsRegistry(object):
+    """Thread-safe registry of :class:`MethodMetrics` by API method name.
+    One registry can be shared by more clients.
+
+        client = Client(url, username, password)
+        ...
+        client.metrics.as_dict()['keywords.list']['latency']['p95']
+        client.metrics.to_prometheus()
+    """
+
+    def __init__(self, latency_buckets=LATENCY_BUCKETS,
+                 item_buckets=ITEM_BUCKETS):
+        """
+        :param latency_buckets: Upper bounds of latency buckets
+                                (in seconds)
+        :param item_buckets: Upper bounds of buckets of number of items
+                             sent by bulk operations
+        """
+        self.latency_buckets = latency_buckets
+        self.item_buckets = item_buckets
+        self._methods = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '<MetricsRegistry: %d methods>' % len(self._methods)
+
+    def _get(self, method):
+        # the caller holds the lock
+        metrics = self._methods.get(method)
+        if metrics is None:
+            metrics = self._methods[method] = MethodMetrics(
+                self.latency_buckets, self.item_buckets)
+        return metrics
+
+    def observe_call(self, method, seconds, error=False):
+        """Records call of `method` which took `seconds` including
+        retries.
+        """
+        with self._lock:
+            metrics = self._get(method)
+            metrics.calls += 1
+            if error:
+                metrics.errors += 1
+            metrics.latency.observe(seconds)
+
+    def observe_items(self, method, count):
+        """Records number of items sent by one call of `method`."""
+        with self._lock:
+            self._get(method).items.observe(count)
+
+    def add(self, method, counter, value=1):
+        """Adds `value` to `counter` of `method`, see `COUNTERS`."""
+        with self._lock:
+            metrics = self._get(method)
+            setattr(metrics, counter, getattr(metrics, counter) + value)
+
+    def reset(self):
+        """Forgets all recorded metrics."""
+        with self._lock:
+            self._methods = {}
+
+    def as_dict(self):
+        """Returns dict of metrics by method name."""
+        with self._lock:
+            return dict((method, metrics.as_dict())
+                        for method, metrics in self._methods.iteritems())
+
+    def to_prometheus(self, prefix='sklikapi'):
+        """Returns the metrics in Prometheus text exposition format."""
+        with self._lock:
+            methods = sorted(self._methods.iteritems())
+            lines = []
+            for key, description in COUNTERS:
+                name = '%s_%s_total' % (prefix, key)
+                lines.append('# HELP %s %s.' % (name, description))
+                lines.append('# TYPE %s counter' % name)
+                lines.extend('%s{method="%s"} %s' % (
+                    name, _escape(method), _number(getattr(metrics, key)))
+                    for method, metrics in methods)
+            for key, name, description in (
+                    ('latency', 'call_duration_seconds',
+                     'Duration of calls including retries'),
+                    ('items', 'batch_items',
+                     'Number of items sent by bulk operations')):
+                name = '%s_%s' % (prefix, name)
+                lines.append('# HELP %s %s.' % (name, description))
+                lines.append('# TYPE %s histogram' % name)
+                for method, metrics in methods:
+                    lines.extend(_histogram_lines(
+                        name, _escape(method), getattr(metrics, key)))
+        return '\n'.join(lines) + '\n'
+
+
+def _histogram_lines(name, method, histogram):
+    cumulative = 0
+    bounds = [_number(bound) for bound in histogram.buckets] + ['+Inf']
+    for bound, count in zip(bounds, histogram.counts):
+        cumulative += count
+        yield '%s_bucket{method="%s",le="%s"} %d' % (name, method, bound,
+                                                      cumulative)
+    yield '%s_sum{method="%s"} %s' % (name, method, _number(histogram.sum))
+    yield '%s_count{method="%s"} %d' % (name, method, histogram.count)
+
+
+def _number(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def _escape(value):
+    return (value.replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
@@ -0,0 +1,101 @@
+import time
+import bisect
+import threading
+
+
+class SlidingWindow(object):
+    """Thread-safe rate limiter allowing at most `count` calls within
+    any `interval` seconds, as the API antidos limits do. Remembers when
+    the last `count` calls were made (or are to be made) and lets a call
+    through once the oldest of them is `interval` seconds old.
+    """
+
+    def __init__(self, count, interval, clock=time.time, sleep=time.sleep):
+        """
+        :param count: Number of calls allowed per `interval`
+        :param interval: Length of the interval (in seconds)
+        :param clock: Function returning current time (in seconds)
+        :param sleep: Function used for waiting
+        """
+        self.count = count
+        self.interval = interval
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._times = []
+
+    def __repr__(self):
+        return '<SlidingWindow: %s calls per %s s, %s remaining>' % (
+            self.count, self.interval, self.remaining)
+
+    @property
+    def remaining(self):
+        """Number of calls which can be made right now without waiting."""
+        with self._lock:
+            self._expire(self._clock())
+            return max(self.count - len(self._times), 0)
+
+    def reserve(self, calls=1):
+        """Reserves time for `calls` made at once (e.g. by one multicall),
+        even if it is in the future.
+
+        :return: the reserved time, see also `done`
+        """
+        with self._lock:
+            at = self._earliest(self._clock(), calls)
+            self._times.extend([at] * calls)
+            return at
+
+    def done(self, at, calls=1):
+        """Moves `calls` reserved for `at` to the current time, when they
+        have been answered. The server may have counted them any time
+        until then, which is not sooner than they were reserved for.
+        """
+        with self._lock:
+            times = self._times
+            now = self._clock()
+            for _ in xrange(calls):
+                i = bisect.bisect_left(times, at)
+                if i < len(times) and times[i] == at:
+                    del times[i]
+                bisect.insort(times, max(at, now))
+
+    def try_acquire(self, calls=1):
+        """Reserves time for `calls` if they can be made right now.
+
+        :return: whether the calls can be made
+        """
+        with self._lock:
+            now = self._clock()
+            if self._earliest(now, calls) > now:
+                return False
+            self._times.extend([now] * calls)
+            return True
+
+    def acquire(self, calls=1):
+        """Reserves time for `calls`, waits until they can be made.
+
+        :return: time spent waiting (in seconds)
+        """
+        wait = self.reserve(calls) - self._clock()
+        if wait > 0:
+            self._sleep(wait)
+        return max(wait, 0)
+
+    def _expire(self, now):
+        times = self._times
+        del times[:bisect.bisect_right(times, now - self.interval)]
+
+    def _earliest(self, now, calls):
+        """Returns the earliest time `calls` can be made at once."""
+        self._expire(now)
+        times = self._times
+        # the calls have to come `interval` after the one `count` calls
+        # before the last of them, and not before the reserved ones
+        previous = len(times) + min(calls, self.count) - self.count - 1
+        at = now
+        if times:
+            at = max(at, times[-1])
+        if previous >= 0:
+            at = max(at, times[previous] + self.interval)
+        return at
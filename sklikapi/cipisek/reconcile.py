@@ -0,0 +1,182 @@
+from .concurrency import create_pool
+from .entities import Ad, Campaign, Group, Keyword, Missing
+
+
+def _ad_key(ad):
+    # the same attributes as compared by `Ad.is_same_as`
+    return (ad.groupId, ad.creative1, ad.creative2, ad.creative3,
+            ad.clickthruText)
+
+
+def _keyword_key(keyword):
+    return (keyword.groupId, keyword.name, keyword.matchType)
+
+
+def _group_key(group):
+    return (group.campaignId, group.name)
+
+
+def _campaign_key(campaign):
+    return campaign.name
+
+
+class Plan(object):
+    """Changes needed to turn current entities of one type into
+    the desired ones, computed by :class:`Reconciler`.
+    """
+
+    # Client namespaces by entity class
+    NAMESPACES = {
+        Campaign: 'campaigns',
+        Group: 'groups',
+        Ad: 'ads',
+        Keyword: 'keywords',
+    }
+
+    def __init__(self, entity_class, create=None, update=None, remove=None):
+        """
+        :param create: List of entities to create
+        :param update: List of entities with id and changed attributes
+        :param remove: List of ids of entities to remove
+        """
+        self.entity_class = entity_class
+        self.create = create or []
+        self.update = update or []
+        self.remove = remove or []
+
+    def __len__(self):
+        """Number of changes in the plan."""
+        return len(self.create) + len(self.update) + len(self.remove)
+
+    def __repr__(self):
+        return '<Plan %s: %d to create, %d to update, %d to remove>' % (
+            self.entity_class.__name__, len(self.create), len(self.update),
+            len(self.remove))
+
+    def report(self):
+        """Returns human readable description of the changes."""
+        name = self.entity_class.__name__
+        lines = [repr(self)]
+        lines.extend('+ %s %s' % (name, dict(entity))
+                     for entity in self.create)
+        lines.extend('~ %s %s' % (name, dict(entity))
+                     for entity in self.update)
+        lines.extend('- %s id=%s' % (name, id) for id in self.remove)
+        return '\n'.join(lines)
+
+    def apply(self, client):
+        """Makes the changes using `client`. Each kind of change is sent
+        by the bulk operation of the namespace, split to chunks by its
+        batch limit. If the client has `concurrency` greater than one,
+        the operations run in parallel (in threads of their own).
+        """
+        ns = self.NAMESPACES[self.entity_class]
+        calls = [(getattr(client, op + '_' + ns), items)
+                 for op, items in (('create', self.create),
+                                   ('update', self.update),
+                                   ('remove', self.remove))
+                 if items]
+        if client.concurrency > 1 and len(calls) > 1:
+            # the operations send their chunks by the pool of the client
+            # and wait for them, so they must not occupy its workers
+            pool = create_pool(len(calls))
+            try:
+                futures = [pool.submit(client._bind_deadline(method), items)
+                           for method, items in calls]
+                for future in futures:
+                    future.result()
+            finally:
+                pool.shutdown(wait=False)
+        else:
+            for method, items in calls:
+                method(items)
+
+
+class Reconciler(object):
+    """Computes and applies minimal changes turning the current entities
+    into the desired ones.
+
+    Desired entities are matched to the current ones by id if they have
+    it, otherwise by their natural key (see `NATURAL_KEYS`). Matched
+    entities are updated if some of their updatable attributes differ,
+    unmatched desired ones are created (without the id they may have)
+    and unmatched current ones are removed. Each level of the campaign
+    tree is reconciled separately, top-down, since new children need
+    ids of their new parents.
+    """
+
+    # Functions returning keys identifying entities without id
+    NATURAL_KEYS = {
+        Campaign: _campaign_key,
+        Group: _group_key,
+        Ad: _ad_key,
+        Keyword: _keyword_key,
+    }
+
+    def __init__(self, client, remove=True):
+        """
+        :param client: :class:`Client` used to get current entities
+                       and to apply plans
+        :param remove: Whether current entities not matching any desired
+                       one should be removed
+        """
+        self.client = client
+        self.remove = remove
+
+    def plan(self, entity_class, desired, current):
+        """Returns :class:`Plan` turning `current` entities
+        of `entity_class` into `desired` ones.
+        """
+        natural_key = self.NATURAL_KEYS[entity_class]
+        by_id = {}
+        by_key = {}
+        for entity in current:
+            by_id[entity.id] = entity
+            by_key.setdefault(natural_key(entity), entity)
+
+        plan = Plan(entity_class)
+        matched = set()
+        for entity in desired:
+            if entity.id is not Missing:
+                existing = by_id.get(entity.id)
+            else:
+                existing = by_key.get(natural_key(entity))
+            if existing is None or existing.id in matched:
+                if entity.id is not Missing:
+                    # the entity does not exist (any more), it gets
+                    # a new id when created
+                    entity = entity_class(entity)
+                    entity.id = Missing
+                plan.create.append(entity)
+                continue
+
+            matched.add(existing.id)
+            changes = dict((key, val)
+                           for key, val in entity.iterate_updatable()
+                           if getattr(existing, key) != val)
+            changes.pop('id', None)
+            if changes:
+                plan.update.append(entity_class(id=existing.id, **changes))
+
+        if self.remove:
+            plan.remove = sorted(id for id in by_id if id not in matched)
+        return plan
+
+    def plan_campaigns(self, desired):
+        return self.plan(Campaign, desired, self.client.list_campaigns())
+
+    def plan_groups(self, campaigns, desired):
+        current = self.client.list_groups(campaigns)
+        return self.plan(Group, desired, current)
+
+    def plan_ads(self, groups, desired):
+        current = self.client.list_ads(groups=groups)
+        return self.plan(Ad, desired, current)
+
+    def plan_keywords(self, groups, desired):
+        current = self.client.list_keywords(groups)
+        return self.plan(Keyword, desired, current)
+
+    def apply(self, plan):
+        plan.apply(self.client)
+        return plan
@@ -0,0 +1,130 @@
+import time
+import random
+import threading
+
+from . import exceptions as exc
+
+
+class RetryPolicy(object):
+    """Decides whether a failed call is retried and how long to wait
+    before it. Waits grow exponentially with the number of attempts and
+    are randomized ("full jitter"), so that clients failing at the same
+    moment do not retry at the same moment too.
+
+    Custom policies used by the client need the `retries` attribute
+    and the `delay` and `backoff` methods.
+    """
+
+    def __init__(self, retries=0, initial_delay=0.5, max_delay=30,
+                 budget=None, random=random.random):
+        """
+        :param retries: Maximal number of retries of one call
+        :param initial_delay: Upper bound of the first wait (in seconds)
+        :param max_delay: Upper bound of any wait (in seconds)
+        :param budget: Maximal time spent by one call including
+                       retries (in seconds), `None` means unlimited
+        :param random: Function returning random float from [0, 1)
+        """
+        self.retries = retries
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self._random = random
+
+    def __repr__(self):
+        return '<RetryPolicy: %s retries, %s-%s s, budget %s s>' % (
+            self.retries, self.initial_delay, self.max_delay, self.budget)
+
+    def delay(self, attempt):
+        """Returns random wait before the retry following the failed
+        `attempt` (counted from zero).
+        """
+        cap = min(self.max_delay, self.initial_delay * 2 ** attempt)
+        return self._random() * cap
+
+    def backoff(self, attempt, elapsed, minimum=0):
+        """Returns how long to wait before retrying a call whose
+        `attempt` (counted from zero) failed `elapsed` seconds after
+        the call started, or `None` if the call should not be retried.
+
+        :param minimum: Wait required by the API (in seconds)
+        """
+        if attempt >= self.retries:
+            return None
+        wait = max(self.delay(attempt), minimum)
+        if self.budget is not None and elapsed + wait > self.budget:
+            return None
+        return wait
+
+
+class CircuitBreaker(object):
+    """Thread-safe circuit breaker of an API endpoint.
+
+    After `threshold` consecutive failures the circuit opens and calls
+    fail fast with `CircuitOpenError` for `reset_timeout` seconds. Then
+    one trial call is let through, its success closes the circuit again,
+    its failure opens it for another `reset_timeout` seconds.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, threshold=5, reset_timeout=30, clock=time.time):
+        """
+        :param threshold: Number of consecutive failures opening
+                          the circuit
+        :param reset_timeout: How long the circuit stays open
+                              (in seconds)
+        :param clock: Function returning current time (in seconds)
+        """
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened = None
+        self._trial = False
+
+    def __repr__(self):
+        return '<CircuitBreaker: %s, %d failures>' % (self.state,
+                                                      self._failures)
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened is None:
+                return self.CLOSED
+            if self._trial or \
+                    self._clock() - self._opened >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self.OPEN
+
+    def before_call(self):
+        """Raises `CircuitOpenError` unless a call may be made now."""
+        with self._lock:
+            if self._opened is None:
+                return
+            remaining = self._opened + self.reset_timeout - self._clock()
+            if remaining > 0 or self._trial:
+                raise exc.CircuitOpenError(
+                    'Circuit is open after %d failures, failing fast'
+                    % self._failures)
+            self._trial = True
+
+    def success(self):
+        """Records successful call, closes the circuit."""
+        with self._lock:
+            self._failures = 0
+            self._opened = None
+            self._trial = False
+
+    def failure(self):
+        """Records failed call, opens the circuit if there are too many
+        consecutive failures or the trial call failed.
+        """
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.threshold:
+                self._opened = self._clock()
+                self._trial = False
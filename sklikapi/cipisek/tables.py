@@ -0,0 +1,338 @@
+from array import array
+
+from .entities import Keyword, Missing
+
+
+class ObjectColumn(object):
+    """Column storing values in a plain list."""
+
+    def __init__(self):
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def __setitem__(self, index, value):
+        self.values[index] = value
+
+    def append(self, value):
+        self.values.append(value)
+
+    def take(self, indices):
+        column = self._empty()
+        values = self.values
+        column.values = [values[i] for i in indices]
+        return column
+
+    def select(self, test):
+        """Returns indices of values passing `test`."""
+        return [i for i, value in enumerate(self.values) if test(value)]
+
+    def _empty(self):
+        return type(self)()
+
+
+class ArrayColumn(ObjectColumn):
+    """Column storing values of the given type in an `array.array`.
+    Values of other types (e.g. `Missing` or `None`) are kept aside
+    in a dict by their index.
+    """
+
+    def __init__(self, typecode, value_type):
+        self.typecode = typecode
+        self.value_type = value_type
+        self.values = array(typecode)
+        self.exceptions = {}
+
+    def __iter__(self):
+        if not self.exceptions:
+            return iter(self._convert(self.values))
+        return (self[i] for i in xrange(len(self.values)))
+
+    def __getitem__(self, index):
+        if self.exceptions:
+            if index < 0:
+                index += len(self.values)
+            if index in self.exceptions:
+                return self.exceptions[index]
+        return self.value_type(self.values[index])
+
+    def __setitem__(self, index, value):
+        if index < 0:
+            index += len(self.values)
+        if type(value) is self.value_type:
+            self.values[index] = value
+            self.exceptions.pop(index, None)
+        else:
+            # raises IndexError for invalid index
+            self.values[index] = 0
+            self.exceptions[index] = value
+
+    def append(self, value):
+        if type(value) is self.value_type:
+            try:
+                self.values.append(value)
+                return
+            except OverflowError:
+                pass
+        self.exceptions[len(self.values)] = value
+        self.values.append(0)
+
+    def take(self, indices):
+        column = self._empty()
+        values = self.values
+        column.values = array(self.typecode, [values[i] for i in indices])
+        if self.exceptions:
+            column.exceptions = dict(
+                (j, self.exceptions[i]) for j, i in enumerate(indices)
+                if i in self.exceptions)
+        return column
+
+    def select(self, test):
+        return [i for i, value in enumerate(self) if test(value)]
+
+    def _convert(self, values):
+        if self.value_type is bool:
+            return map(bool, values)
+        return values
+
+    def _empty(self):
+        return type(self)(self.typecode, self.value_type)
+
+
+class CategoryColumn(ObjectColumn):
+    """Column storing codes of distinct values in an `array.array`,
+    suitable for values repeating a lot, e.g. statuses. Each distinct
+    value is kept only once.
+    """
+
+    def __init__(self):
+        self.codes = array('i')
+        self.categories = []
+        self._index = {}
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        categories = self.categories
+        return (categories[code] for code in self.codes)
+
+    def __getitem__(self, index):
+        return self.categories[self.codes[index]]
+
+    def __setitem__(self, index, value):
+        self.codes[index] = self._code(value)
+
+    def append(self, value):
+        self.codes.append(self._code(value))
+
+    def take(self, indices):
+        column = self._empty()
+        codes = self.codes
+        column.codes = array('i', [codes[i] for i in indices])
+        column.categories = self.categories[:]
+        column._index = self._index.copy()
+        return column
+
+    def select(self, test):
+        matching = set(code for code, value in enumerate(self.categories)
+                       if test(value))
+        return [i for i, code in enumerate(self.codes) if code in matching]
+
+    def _code(self, value):
+        try:
+            return self._index[value]
+        except KeyError:
+            code = self._index[value] = len(self.categories)
+            self.categories.append(value)
+            return code
+
+
+class KeywordRow(object):
+    """View of a `KeywordTable` row behaving like `Keyword`. Attributes
+    are read from the table and changes are written to it.
+    """
+
+    __slots__ = ['_table', '_index']
+
+    def __init__(self, table, index):
+        object.__setattr__(self, '_table', table)
+        object.__setattr__(self, '_index', index)
+
+    def __getattr__(self, key):
+        try:
+            return self._table._columns[key][self._index]
+        except KeyError:
+            raise AttributeError(key)
+
+    def __setattr__(self, key, value):
+        if key not in self._table._columns:
+            raise AttributeError(key)
+        self._table._columns[key][self._index] = value
+
+    def __iter__(self):
+        return self.iterate_non_missing()
+
+    def __eq__(self, other):
+        if not isinstance(other, (Keyword, KeywordRow)):
+            return False
+        return list(self.iterate_all()) == list(other.iterate_all())
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        vals = ['%s=%s' % (key, repr(val))
+                for key, val in self.iterate_all()]
+        return '<KeywordRow: ' + ', '.join(vals) + '>'
+
+    def __str__(self):
+        return repr(self)
+
+    def iterate_all(self):
+        """Iterate over all values."""
+        index = self._index
+        return ((key, column[index])
+                for key, column in self._table._iter_columns())
+
+    def iterate_non_missing(self):
+        """Iterate over all values not equal to <Missing>."""
+        return ((key, val) for key, val in self.iterate_all()
+                if val is not Missing)
+
+    def iterate_updatable(self):
+        """Iterate over all values which can be updated."""
+        updatable = Keyword._updatable_slots
+        return ((key, val) for key, val in self.iterate_non_missing()
+                if key in updatable)
+
+    # rows do not track their changes
+    iterate_changes = iterate_updatable
+
+    @property
+    def all_fields_missing(self):
+        """Whether all fields are equal to <Missing>."""
+        for _ in self.iterate_non_missing():
+            return False
+        return True
+
+    def to_entity(self):
+        """Returns the row as `Keyword` instance."""
+        return Keyword(**dict(self.iterate_all()))
+
+
+class KeywordTable(object):
+    """Columnar collection of keywords, which needs a fraction of memory
+    of the list of `Keyword` instances. Numbers and booleans are stored
+    in arrays, statuses and match types as codes of their distinct
+    values.
+
+    Rows are accessed as `KeywordRow` views created on demand. Indexing
+    by slice, `where` and `filter` return new tables.
+    """
+
+    # Factories of columns by keyword attribute, `ObjectColumn` is used
+    # for the others
+    COLUMN_TYPES = {
+        'id': lambda: ArrayColumn('l', int),
+        'groupId': lambda: ArrayColumn('l', int),
+        'cpc': lambda: ArrayColumn('l', int),
+        'minCpc': lambda: ArrayColumn('l', int),
+        'deleted': lambda: ArrayColumn('b', bool),
+        'disabled': lambda: ArrayColumn('b', bool),
+        'matchType': CategoryColumn,
+        'status': CategoryColumn,
+    }
+
+    def __init__(self, rows=()):
+        """
+        :param rows: Iterable of keywords (`Keyword` instances, dicts
+                     or rows of another table)
+        """
+        self._keys = Keyword._slots
+        self._columns = dict(
+            (key, self.COLUMN_TYPES.get(key, ObjectColumn)())
+            for key in self._keys)
+        for row in rows:
+            self.append(row)
+
+    def __len__(self):
+        return len(self._columns[self._keys[0]])
+
+    def __iter__(self):
+        return (KeywordRow(self, i) for i in xrange(len(self)))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(xrange(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('table index out of range')
+        return KeywordRow(self, index)
+
+    def __repr__(self):
+        return '<KeywordTable: %d rows>' % len(self)
+
+    def append(self, keyword):
+        """Appends `Keyword`, dict or row of another table."""
+        if isinstance(keyword, dict):
+            get = keyword.get
+            for key, column in self._iter_columns():
+                column.append(get(key, Missing))
+        else:
+            for key, column in self._iter_columns():
+                column.append(getattr(keyword, key))
+
+    def column(self, key):
+        """Returns list of values of attribute `key`."""
+        return list(self._columns[key])
+
+    def take(self, indices):
+        """Returns new table with rows at `indices`."""
+        indices = list(indices)
+        table = type(self)()
+        table._columns = dict((key, column.take(indices))
+                              for key, column in self._iter_columns())
+        return table
+
+    def where(self, **conditions):
+        """Returns new table with rows matching all `conditions`. Keys
+        are attribute names, values are either values the attribute
+        has to be equal to or functions testing it, e.g.
+        `table.where(status='active', cpc=lambda cpc: cpc > 100)`.
+        """
+        indices = None
+        for key, condition in conditions.iteritems():
+            test = condition if callable(condition) else \
+                lambda value, condition=condition: value == condition
+            selected = self._columns[key].select(test)
+            if indices is None:
+                indices = selected
+            else:
+                selected = set(selected)
+                indices = [i for i in indices if i in selected]
+        if indices is None:
+            indices = xrange(len(self))
+        return self.take(indices)
+
+    def filter(self, predicate):
+        """Returns new table with rows for which `predicate` called with
+        `KeywordRow` returns true.
+        """
+        return self.take(i for i, row in enumerate(self) if predicate(row))
+
+    def to_entities(self):
+        """Returns list of `Keyword` instances."""
+        return [row.to_entity() for row in self]
+
+    def _iter_columns(self):
+        columns = self._columns
+        return ((key, columns[key]) for key in self._keys)
@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import threading
+from binascii import hexlify
+
+
+def _new_id(size):
+    return hexlify(os.urandom(size))
+
+
+class Span(object):
+    """Timed phase of a call. Spans are nested, `parent_id` is the id
+    of the enclosing span in the same thread, spans of one top-level
+    call share `trace_id`. Times are in seconds since the epoch.
+    """
+
+    __slots__ = ['tracer', 'name', 'trace_id', 'span_id', 'parent_id',
+                 'start', 'end', 'error', 'attributes']
+
+    def __init__(self, tracer, name, attributes, start=None, end=None):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.span_id = _new_id(8)
+        parent = tracer.current()
+        if parent is None:
+            self.trace_id = _new_id(16)
+            self.parent_id = None
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+        self.start = start
+        self.end = end
+        self.error = None
+
+    def __repr__(self):
+        return '<Span %s: %.3f ms>' % (self.name, self.duration * 1000)
+
+    def __enter__(self):
+        self.tracer._stack().append(self)
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.end = time.time()
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self.tracer._stack().pop()
+        self.tracer.sink(self)
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start': self.start,
+            'duration': self.duration,
+            'error': self.error,
+            'attributes': self.attributes,
+        }
+
+    def as_otel(self):
+        """Returns the span as dict in OpenTelemetry (OTLP/JSON) format."""
+        attributes = [{'key': key, 'value': _otel_value(value)}
+                      for key, value in sorted(self.attributes.iteritems())]
+        if self.error is not None:
+            attributes.append({'key': 'error.type',
+                               'value': {'stringValue': self.error}})
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 3,  # SPAN_KIND_CLIENT
+            'startTimeUnixNano': str(int(self.start * 1e9)),
+            'endTimeUnixNano': str(int(self.end * 1e9)),
+            'attributes': attributes,
+            'status': {'code': 2 if self.error else 0},
+        }
+        if self.parent_id is not None:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+def _otel_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, (int, long)):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': unicode(value)}
+
+
+class _NoSpan(object):
+    """Span doing nothing, used when tracing is disabled."""
+
+    __slots__ = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+class Tracer(object):
+    """Emits :class:`Span` of each phase of API calls to `sink`. Pass
+    it to the client to enable tracing:
+
+        client = Client(url, username, password,
+                        tracer=Tracer(JsonLinesSink('spans.jsonl')))
+
+    Spans of a call are `call` (with `method`), its phases
+    `marshall_param`, `throttle`, `xmlrpc` (one for each attempt,
+    consisting of `serialize`, `send` and `parse`), `marshall_result`
+    and `entities`. `send` includes connecting and waiting for the
+    response, `parse` includes reading of the response body, which
+    is parsed while being read.
+    """
+
+    def __init__(self, sink):
+        """
+        :param sink: Callable called with each finished :class:`Span`,
+                     e.g. :class:`JsonLinesSink`
+        """
+        self.sink = sink
+        self._local = threading.local()
+
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            stack = self._local.stack = []
+            return stack
+
+    def current(self):
+        """Returns the innermost span of the current thread or `None`."""
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def span(self, name, **attributes):
+        """Returns span to be used as a context manager timing its
+        block.
+        """
+        return Span(self, name, attributes)
+
+    def record(self, name, start, end, **attributes):
+        """Emits span of a phase which has already finished."""
+        self.sink(Span(self, name, attributes, start, end))
+
+
+class JsonLinesSink(object):
+    """Thread-safe sink writing spans to a file, one JSON object
+    per line.
+    """
+
+    def __init__(self, file, otel=False):
+        """
+        :param file: File name or file-like object
+        :param otel: Whether to write spans in OpenTelemetry (OTLP/JSON)
+                     format, see `Span.as_otel`
+        """
+        if isinstance(file, basestring):
+            file = open(file, 'a')
+        self.file = file
+        self.otel = otel
+        self._lock = threading.Lock()
+
+    def __call__(self, span):
+        data = span.as_otel() if self.otel else span.as_dict()
+        line = json.dumps(data, sort_keys=True) + '\n'
+        with self._lock:
+            self.file.write(line)
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,434 @@
+import sys
+import time
+import zlib
+import errno
+import socket
+import httplib
+import threading
+import urllib
+from contextlib import contextmanager
+
+from xmlrpclib import Transport, SafeTransport, ProtocolError, Fault, getparser
+
+from . import exceptions as exc
+from .unmarshalling import get_entity_parser
+
+
+# Errors signalling that a kept-alive connection was closed by the server
+# while it was sitting in the pool.
+_BROKEN_CONNECTION_ERRNOS = (errno.ECONNRESET, errno.ECONNABORTED, errno.EPIPE)
+
+
+def _is_broken_connection(e):
+    if isinstance(e, (httplib.BadStatusLine, httplib.CannotSendRequest)):
+        return True
+    return (isinstance(e, socket.error)
+            and getattr(e, 'errno', None) in _BROKEN_CONNECTION_ERRNOS)
+
+
+class TransferStats(object):
+    """Byte counters of XML-RPC requests. `*_wire_bytes` are the sizes
+    actually transferred, possibly gzipped.
+    """
+
+    __slots__ = ['requests', 'request_bytes', 'request_wire_bytes',
+                 'response_bytes', 'response_wire_bytes']
+
+    def __init__(self):
+        for key in self.__slots__:
+            setattr(self, key, 0)
+
+    def __repr__(self):
+        vals = ['%s=%d' % (key, getattr(self, key)) for key in self.__slots__]
+        return '<TransferStats: ' + ', '.join(vals) + '>'
+
+    @property
+    def saved_bytes(self):
+        """Number of bytes saved by compression."""
+        return (self.request_bytes - self.request_wire_bytes
+                + self.response_bytes - self.response_wire_bytes)
+
+    def add(self, other):
+        for key in self.__slots__:
+            setattr(self, key, getattr(self, key) + getattr(other, key))
+
+
+class ConnectionPool(object):
+    """Thread-safe pool of idle keep-alive HTTP connections to one host.
+
+    At most `maxsize` idle connections are kept, connections idle for
+    more than `idle_timeout` seconds are closed and evicted.
+    """
+
+    def __init__(self, factory, maxsize=10, idle_timeout=60):
+        """
+        :param factory: Callable returning a new `httplib.HTTPConnection`
+        :param maxsize: Maximal number of idle connections kept
+        :param idle_timeout: Idle connections older than this are evicted
+                             (in seconds)
+        """
+        self._factory = factory
+        self._idle = []  # (connection, released_at), oldest first
+        self._lock = threading.Lock()
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+
+    def __len__(self):
+        return len(self._idle)
+
+    def acquire(self):
+        """Returns tuple (connection, reused). The most recently released
+        connection is preferred, a new one is created if the pool is empty.
+        """
+        with self._lock:
+            self._evict(time.time())
+            if self._idle:
+                return self._idle.pop()[0], True
+        return self._factory(), False
+
+    def release(self, connection):
+        """Returns connection to the pool, closes it if the pool is full."""
+        with self._lock:
+            self._evict(time.time())
+            if len(self._idle) < self.maxsize:
+                self._idle.append((connection, time.time()))
+                return
+        connection.close()
+
+    def clear(self):
+        """Closes all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            connection.close()
+
+    def _evict(self, now):
+        while self._idle and now - self._idle[0][1] >= self.idle_timeout:
+            self._idle.pop(0)[0].close()
+
+
+class PooledTransportMixin(object):
+    """Keeps HTTP/1.1 connections alive across XML-RPC requests.
+
+    Unlike the stock transport, which caches a single connection and is
+    not safe to share, this one keeps a pool of connections per host, so
+    one instance can serve many threads (or greenlets) at once.
+
+    Gzipped responses are accepted and decompressed while being parsed,
+    requests larger than `encode_threshold` are gzipped. Transferred
+    bytes are counted in `stats` and `last_stats`.
+
+    Connecting and reading time out after `connect_timeout` and `timeout`
+    seconds, or sooner if the deadline of the current thread (see
+    `deadline`) comes first.
+    """
+
+    # Maximal number of idle connections kept per host
+    pool_size = 10
+
+    # How long an idle connection may stay in the pool (in seconds)
+    pool_idle_timeout = 60
+
+    # Requests larger than this are gzipped (in bytes), `None` disables it
+    encode_threshold = None
+
+    # Size of chunks in which responses are read and parsed (in bytes)
+    read_size = 16 * 1024
+
+    # Socket timeouts of connecting and of each read (in seconds),
+    # `None` means no timeout
+    connect_timeout = None
+    timeout = None
+
+    # :class:`Tracer` emitting spans of requests, `None` disables tracing
+    tracer = None
+
+    def _init_pool(self, pool_size, pool_idle_timeout, encode_threshold,
+                   timeout=None, connect_timeout=None):
+        if timeout is not None:
+            self.timeout = timeout
+        if connect_timeout is not None:
+            self.connect_timeout = connect_timeout
+        if pool_size is not None:
+            self.pool_size = pool_size
+        if pool_idle_timeout is not None:
+            self.pool_idle_timeout = pool_idle_timeout
+        if encode_threshold is not None:
+            self.encode_threshold = encode_threshold
+        self._pools = {}
+        self._pools_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = TransferStats()
+
+    @property
+    def parses_entities(self):
+        """Whether responses in the current thread are parsed by
+        :class:`EntityUnmarshaller`, see `unmarshalling`.
+        """
+        return getattr(self._local, 'entities', None) is not None
+
+    @contextmanager
+    def unmarshalling(self, entities):
+        """Responses received by the current thread within the block are
+        parsed by :class:`EntityUnmarshaller` building `entities`.
+        """
+        previous = getattr(self._local, 'entities', None)
+        self._local.entities = entities
+        try:
+            yield
+        finally:
+            self._local.entities = previous
+
+    @contextmanager
+    def deadline(self, at):
+        """Requests made by the current thread within the block have to
+        finish before time `at` (as returned by `time.time()`), otherwise
+        `DeadlineExceededError` is raised. Nested blocks cannot extend
+        the deadline of the outer ones.
+        """
+        previous = getattr(self._local, 'deadline', None)
+        if previous is not None and (at is None or previous < at):
+            at = previous
+        self._local.deadline = at
+        try:
+            yield
+        finally:
+            self._local.deadline = previous
+
+    def get_deadline(self):
+        """Returns deadline of the current thread or `None`."""
+        return getattr(self._local, 'deadline', None)
+
+    def remaining(self):
+        """Returns seconds left until the deadline of the current thread,
+        `None` if there is no deadline.
+        """
+        deadline = getattr(self._local, 'deadline', None)
+        if deadline is None:
+            return None
+        return deadline - time.time()
+
+    def _timeouts(self):
+        """Returns tuple (connect timeout, read timeout, whether they are
+        limited by the deadline).
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return self.connect_timeout, self.timeout, False
+        if remaining <= 0:
+            raise exc.DeadlineExceededError('Deadline exceeded')
+        connect_timeout, timeout = self.connect_timeout, self.timeout
+        limited = timeout is None or remaining < timeout
+        if connect_timeout is None or remaining < connect_timeout:
+            connect_timeout = remaining
+        return connect_timeout, remaining if limited else timeout, limited
+
+    def getparser(self):
+        entities = getattr(self._local, 'entities', None)
+        if entities is None:
+            return getparser(use_datetime=self._use_datetime)
+        return get_entity_parser(entities)
+
+    @property
+    def last_stats(self):
+        """:class:`TransferStats` of the last request made by the current
+        thread, `None` if there was none.
+        """
+        return getattr(self._local, 'last_stats', None)
+
+    def _get_pool(self, host):
+        with self._pools_lock:
+            pool = self._pools.get(host)
+            if pool is None:
+                pool = ConnectionPool(lambda: self._new_connection(host),
+                                      self.pool_size, self.pool_idle_timeout)
+                self._pools[host] = pool
+            return pool
+
+    def _new_connection(self, host):
+        raise NotImplementedError()
+
+    def make_connection(self, host):
+        return self._new_connection(host)
+
+    def request(self, host, handler, request_body, verbose=0):
+        tracer = self.tracer
+        if tracer is not None:
+            # the request has just been serialized within the current span
+            current = tracer.current()
+            if current is not None:
+                tracer.record('serialize', current.start, time.time(),
+                              request_bytes=len(request_body))
+        pool = self._get_pool(host)
+        timeouts = self._timeouts()
+        while True:
+            connection, reused = pool.acquire()
+            try:
+                return self._pooled_request(pool, connection, host, handler,
+                                            request_body, verbose, timeouts)
+            except Exception as e:
+                if not (reused and _is_broken_connection(e)):
+                    raise
+                # the server has dropped our idle connection, other idle
+                # ones are likely dead as well
+                pool.clear()
+
+    def _pooled_request(self, pool, connection, host, handler, request_body,
+                        verbose, timeouts):
+        if verbose:
+            connection.set_debuglevel(1)
+
+        stats = self._local.stats = TransferStats()
+        stats.requests = 1
+        connect_timeout, timeout, limited = timeouts
+        tracer = self.tracer
+        if tracer is not None:
+            start = time.time()
+        try:
+            if connection.sock is None:
+                connection.timeout = connect_timeout
+                connection.connect()
+            connection.sock.settimeout(timeout)
+
+            self.send_request(connection, handler, request_body)
+            self.send_host(connection, host)
+            self.send_user_agent(connection)
+            self.send_content(connection, request_body)
+
+            response = connection.getresponse(buffering=True)
+            if tracer is not None:
+                sent = time.time()
+                tracer.record('send', start, sent,
+                              request_bytes=stats.request_wire_bytes,
+                              status=response.status)
+            if response.status == 200:
+                self.verbose = verbose
+                result = self.parse_response(response)
+                if tracer is not None:
+                    tracer.record('parse', sent, time.time(),
+                                  response_bytes=stats.response_wire_bytes)
+            else:
+                response.read()
+        except Fault:
+            self._release(pool, connection, response)
+            self._record(stats)
+            raise
+        except socket.timeout:
+            connection.close()
+            if limited:
+                raise exc.DeadlineExceededError(
+                    'Deadline exceeded while waiting for %s' % host)
+            raise exc.TimeoutError('Request to %s timed out' % host)
+        except Exception:
+            # unexpected errors leave connection in a strange state
+            connection.close()
+            raise
+
+        self._release(pool, connection, response)
+        self._record(stats)
+        if response.status != 200:
+            raise ProtocolError(host + handler, response.status,
+                                response.reason, response.msg)
+        return result
+
+    def _record(self, stats):
+        self._local.last_stats = stats
+        with self._stats_lock:
+            self.stats.add(stats)
+
+    def send_content(self, connection, request_body):
+        stats = self._local.stats
+        stats.request_bytes = len(request_body)
+        connection.putheader("Content-Type", "text/xml")
+
+        if (self.encode_threshold is not None
+                and len(request_body) > self.encode_threshold):
+            connection.putheader("Content-Encoding", "gzip")
+            encoder = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            request_body = encoder.compress(request_body) + encoder.flush()
+
+        stats.request_wire_bytes = len(request_body)
+        connection.putheader("Content-Length", str(len(request_body)))
+        connection.endheaders(request_body)
+
+    def parse_response(self, response):
+        """Parses the response while it is being read, gzipped responses
+        are decompressed on the fly.
+        """
+        stats = self._local.stats
+        decoder = None
+        if response.getheader("Content-Encoding", "") == "gzip":
+            decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        p, u = self.getparser()
+        while True:
+            data = response.read(self.read_size)
+            if not data:
+                break
+            stats.response_wire_bytes += len(data)
+            if decoder is not None:
+                data = decoder.decompress(data)
+            stats.response_bytes += len(data)
+            if self.verbose:
+                sys.stdout.write("body: %r\n" % data)
+            p.feed(data)
+
+        if decoder is not None:
+            data = decoder.flush()
+            stats.response_bytes += len(data)
+            p.feed(data)
+        p.close()
+
+        return u.close()
+
+    def _release(self, pool, connection, response):
+        if response.will_close:
+            connection.close()
+        else:
+            pool.release(connection)
+
+    def close(self):
+        with self._pools_lock:
+            pools, self._pools = self._pools.values(), {}
+        for pool in pools:
+            pool.clear()
+
+
+class PooledTransport(PooledTransportMixin, Transport):
+    """XML-RPC over HTTP transport with a keep-alive connection pool."""
+
+    def __init__(self, use_datetime=0, pool_size=None, pool_idle_timeout=None,
+                 encode_threshold=None, timeout=None, connect_timeout=None):
+        Transport.__init__(self, use_datetime=use_datetime)
+        self._init_pool(pool_size, pool_idle_timeout, encode_threshold,
+                        timeout, connect_timeout)
+
+    def _new_connection(self, host):
+        chost, self._extra_headers, x509 = self.get_host_info(host)
+        return httplib.HTTPConnection(chost)
+
+
+class PooledSafeTransport(PooledTransportMixin, SafeTransport):
+    """XML-RPC over HTTPS transport with a keep-alive connection pool."""
+
+    def __init__(self, use_datetime=0, context=None, pool_size=None,
+                 pool_idle_timeout=None, encode_threshold=None, timeout=None,
+                 connect_timeout=None):
+        SafeTransport.__init__(self, use_datetime=use_datetime,
+                               context=context)
+        self._init_pool(pool_size, pool_idle_timeout, encode_threshold,
+                        timeout, connect_timeout)
+
+    def _new_connection(self, host):
+        chost, self._extra_headers, x509 = self.get_host_info(host)
+        return httplib.HTTPSConnection(chost, None, context=self.context,
+                                       **(x509 or {}))
+
+
+def create_transport(url, **kwargs):
+    """Returns pooled transport suitable for the scheme of `url`."""
+    scheme, _ = urllib.splittype(url)
+    if scheme == 'https':
+        return PooledSafeTransport(**kwargs)
+    return PooledTransport(**kwargs)
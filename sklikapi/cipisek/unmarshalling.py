@@ -0,0 +1,180 @@
+from datetime import datetime
+from xml.parsers import expat
+from xmlrpclib import Binary, Fault, ResponseError
+
+
+# Max number of parsed datetimes kept by `parse_datetime`
+DATETIME_CACHE_SIZE = 4096
+
+_datetime_cache = {}
+
+
+def parse_datetime(value):
+    """Parses datetime in the format used by Sklik, e.g.
+    `20140414T16:27:00+0200`. The timezone is ignored.
+    Results are cached as the same dates repeat a lot in listings.
+    """
+    try:
+        return _datetime_cache[value]
+    except KeyError:
+        pass
+    result = datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]),
+                      int(value[9:11]), int(value[12:14]), int(value[15:17]))
+    if len(_datetime_cache) >= DATETIME_CACHE_SIZE:
+        _datetime_cache.clear()
+    _datetime_cache[value] = result
+    return result
+
+
+class EntityUnmarshaller(object):
+    """XML-RPC response unmarshaller converting items of the selected
+    lists in the response struct directly to entities while the response
+    is parsed, so no intermediate dicts need to be walked afterwards.
+    Datetimes are converted to `datetime.datetime`, i.e. the result is
+    the same as the one of `marshall_result` followed by
+    `Entity.marshall_list`.
+
+    Unlike `xmlrpclib.Unmarshaller` it builds the containers in place
+    instead of on a common stack and handles the common tags without
+    any dispatch, which makes it considerably faster.
+    """
+
+    def __init__(self, entities):
+        """
+        :param entities: Dict mapping keys of the response struct to
+                         entity classes (or any callables taking
+                         a dict) its items are converted to
+        """
+        self._entities = entities
+        self._params = []
+        # structs and arrays being built (the innermost is the last one),
+        # entity classes of their items and member names of the structs
+        self._containers = [self._params]
+        self._classes = [None]
+        self._names = [None]
+        # character data of the current element, `data` is its `append`
+        self._data = []
+        self.data = self._data.append
+        self._typed = False
+        self._type = None
+
+    def close(self):
+        if self._type is None or len(self._containers) > 1:
+            raise ResponseError()
+        if self._type == 'fault':
+            raise Fault(**self._params[0])
+        return tuple(self._params)
+
+    def start(self, tag, attrs):
+        del self._data[:]
+        if tag == 'value':
+            self._typed = False
+        elif tag == 'struct':
+            entity_class = None
+            if self._containers[-1].__class__ is list:
+                entity_class = self._classes[-1]
+            self._containers.append({})
+            self._classes.append(entity_class)
+            self._names.append(None)
+        elif tag == 'array':
+            entity_class = None
+            if len(self._containers) == 2:
+                # array is a member of the response struct
+                entity_class = self._entities.get(self._names[-1])
+            self._containers.append([])
+            self._classes.append(entity_class)
+            self._names.append(None)
+
+    def end(self, tag):
+        # the most frequent tags first
+        if tag == 'member':
+            return
+        if tag == 'value':
+            if self._typed:
+                return
+            # value without a type element is a string
+            tag = 'string'
+        elif tag == 'name':
+            self._names[-1] = _stringify(''.join(self._data))
+            return
+
+        if tag == 'string':
+            value = _stringify(''.join(self._data))
+        elif tag == 'int' or tag == 'i4' or tag == 'i8':
+            value = int(''.join(self._data))
+        elif tag == 'boolean':
+            data = ''.join(self._data)
+            if data == '0':
+                value = False
+            elif data == '1':
+                value = True
+            else:
+                raise TypeError('bad boolean value')
+        elif tag == 'dateTime.iso8601':
+            value = parse_datetime(''.join(self._data))
+        elif tag == 'nil':
+            value = None
+        elif tag == 'double':
+            value = float(''.join(self._data))
+        elif tag == 'struct':
+            value = self._containers.pop()
+            entity_class = self._classes.pop()
+            self._names.pop()
+            if entity_class is not None:
+                value = entity_class(value)
+        elif tag == 'array':
+            value = self._containers.pop()
+            self._classes.pop()
+            self._names.pop()
+        elif tag == 'base64':
+            value = Binary()
+            value.decode(''.join(self._data))
+        elif tag == 'params' or tag == 'fault':
+            self._type = tag
+            return
+        else:
+            return
+
+        container = self._containers[-1]
+        if container.__class__ is list:
+            container.append(value)
+        else:
+            container[self._names[-1]] = value
+        self._typed = True
+
+
+def _stringify(data):
+    # the parser returns UTF-8, like xmlrpclib only ASCII strings
+    # are returned as `str`
+    try:
+        data.decode('ascii')
+        return data
+    except UnicodeError:
+        return data.decode('utf-8')
+
+
+class EntityParser(object):
+    """Expat parser feeding :class:`EntityUnmarshaller`."""
+
+    def __init__(self, target):
+        self._parser = parser = expat.ParserCreate(None, None)
+        # character data between tags are passed at once
+        parser.buffer_text = True
+        parser.returns_unicode = False
+        parser.StartElementHandler = target.start
+        parser.EndElementHandler = target.end
+        parser.CharacterDataHandler = target.data
+
+    def feed(self, data):
+        self._parser.Parse(data, 0)
+
+    def close(self):
+        parser, self._parser = self._parser, None
+        if parser is not None:
+            parser.Parse('', 1)
+
+
+def get_entity_parser(entities):
+    """Returns tuple (parser, unmarshaller) building `entities`."""
+    unmarshaller = EntityUnmarshaller(entities)
+    return EntityParser(unmarshaller), unmarshaller
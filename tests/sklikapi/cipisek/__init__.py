@@ -9,6 +9,10 @@ except ImportError:
 if not hasattr(unittest, 'skipUnless'):
     raise Exception('Please install unittest2 package (unittest.skipUnless attribute is missing)')
 
+from sklikapi.cipisek.client import Client
+
+from .server import StandInServer
+
 SKLIK_LOGIN = os.environ.get('SKLIK_LOGIN')
 SKLIK_PASSWORD = os.environ.get('SKLIK_PASSWORD')
 
@@ -24,3 +28,55 @@ only_with_login = partial(unittest.skipUnless(
 
 def get_client(cls, url=SKLIK_CIPISEK_URL):
     return cls(url, SKLIK_LOGIN, SKLIK_PASSWORD, debug=False)
+
+
+class StandInTestCase(unittest.TestCase):
+    """Test case of clients of a local :class:`StandInServer` started
+    for each test. `prepare_server` can set up the server before
+    `self.client` is created.
+    """
+
+    # Class of the clients and arguments of `self.client` created
+    # by `setUp`, `None` means the tests create their clients
+    client_class = Client
+    client_kwargs = {}
+
+    def setUp(self):
+        self.server = StandInServer()
+        self.prepare_server(self.server)
+        self.server.start()
+        if self.client_kwargs is not None:
+            self.get_client(**self.client_kwargs)
+
+    def tearDown(self):
+        # the client logs out when garbage collected
+        self.__dict__.pop('client', None)
+        self.server.stop()
+
+    def prepare_server(self, server):
+        pass
+
+    def get_client(self, client_class=None, **kwargs):
+        """Returns new client of the server and sets it as `self.client`.
+        Calls made by the client so far are forgotten by the server.
+        """
+        client_class = client_class or self.client_class
+        self.client = client_class(self.server.url, 'login', 'password',
+                                   **kwargs)
+        del self.server.calls[:], self.server.params[:]
+        return self.client
+
+
+class FakeClock(object):
+    """Clock to be passed instead of `time.time`, its `sleep` instead
+    of `time.sleep` only moves it forward.
+    """
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
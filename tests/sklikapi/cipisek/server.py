@@ -0,0 +1,412 @@
+import sys
+import time
+import struct
+import random
+import socket
+import itertools
+import threading
+from collections import deque
+
+from SocketServer import ThreadingMixIn
+from SimpleXMLRPCServer import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
+
+
+class RequestHandler(SimpleXMLRPCRequestHandler):
+    """Keep-alive request handler counting opened connections."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        self.timeout = self.server.handler_timeout
+        SimpleXMLRPCRequestHandler.setup(self)
+        with self.server.lock:
+            self.server.connections += 1
+            self.server.sockets.add(self.connection)
+
+    def do_POST(self):
+        if self.server.down:
+            self.rfile.read(int(self.headers['content-length']))
+            self.send_response(503)
+            self.send_header('Content-length', '0')
+            self.end_headers()
+            return
+        if self.server.loss and random.random() < self.server.loss:
+            self.rfile.read(int(self.headers['content-length']))
+            self._reset()
+            return
+        with self.server.lock:
+            truncate = self.server.truncated_responses > 0
+            if truncate:
+                self.server.truncated_responses -= 1
+        if truncate:
+            # not gzipped, so that the client can parse the first half
+            self.encode_threshold = None
+            self.wfile = _TruncatingFile(self)
+        SimpleXMLRPCRequestHandler.do_POST(self)
+
+    def _reset(self):
+        """Drops the connection, the client gets "connection reset"."""
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER,
+                                   struct.pack('ii', 1, 0))
+        self.close_connection = 1
+        self.connection.close()
+
+    def finish(self):
+        SimpleXMLRPCRequestHandler.finish(self)
+        with self.server.lock:
+            self.server.sockets.discard(self.connection)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _TruncatingFile(object):
+    """Output file of `RequestHandler` sending only the first half
+    of the response body and then dropping the connection.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.file = handler.wfile
+        self.body = False
+
+    def write(self, data):
+        if not self.body:
+            # the body follows the empty line ending the headers
+            self.body = data == '\r\n'
+            return self.file.write(data)
+        self.file.write(data[:len(data) // 2])
+        self.file.flush()
+        # let the client receive the first half before the reset
+        time.sleep(0.05)
+        self.handler._reset()
+        raise socket.error('response truncated')
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+# namespace: (singular name, parent id attribute, parent filter key)
+NAMESPACES = {
+    'campaigns': ('campaign', None, None),
+    'groups': ('group', 'campaignId', 'campaignIds'),
+    'ads': ('ad', 'groupId', 'groupIds'),
+    'keywords': ('keyword', 'groupId', 'groupIds'),
+}
+
+
+_SESSION_EXPIRED = {'status': 401,
+                    'statusMessage': 'Session has expired or is malformed.'}
+
+# Methods not counted by the antidos limits
+_UNLIMITED = frozenset(['api.version', 'system.multicall'])
+
+
+def _ok(**kwargs):
+    kwargs.update(status=200, statusMessage='OK')
+    return kwargs
+
+
+def _diagnostics(items, problems):
+    diagnostics = []
+    for index, (item, problem) in enumerate(zip(items, problems)):
+        if not problem:
+            continue
+        diagnostic = {'id': problem, 'problemMessage': 'Invalid value'}
+        if isinstance(item, dict) and 'requestId' in item:
+            diagnostic['requestId'] = item['requestId']
+        else:
+            diagnostic['index'] = index
+        diagnostics.append(diagnostic)
+    if not diagnostics:
+        return None
+    status = 406 if len(diagnostics) == len(items) else 206
+    return {'status': status, 'statusMessage': 'Invalid data',
+            'diagnostics': diagnostics}
+
+
+class StandInServer(ThreadingMixIn, SimpleXMLRPCServer):
+    """Local stand-in for the Sklik cipisek XML-RPC API.
+
+    Run it in a background thread by `start()` and point the client
+    to `url`, or run this module to serve it on a given port.
+
+    Batch limits are always enforced, the antidos limits only if
+    `enforce_limits` is set. Latency, lost requests, sessions expiring
+    and an outage can be simulated by the attributes below, items are
+    refused as described in `_problem`.
+    """
+
+    daemon_threads = True
+
+    # Server-side keep-alive timeout (in seconds), `None` means forever
+    handler_timeout = None
+
+    # How many times are items with value 'flaky' refused
+    flaky_failures = 1
+
+    # Whether all requests fail with 503 Service Unavailable
+    down = False
+
+    # Delay of each call and maximal random delay added to it (in seconds)
+    latency = 0
+    latency_jitter = 0
+
+    # Probability of a request being dropped by resetting the connection
+    loss = 0
+
+    # How many next responses are cut in half by dropping the connection
+    truncated_responses = 0
+
+    # Whether calls exceeding the antidos limits are refused
+    enforce_limits = False
+
+    # How long a session is valid (in seconds), `None` means forever
+    session_ttl = None
+
+    def __init__(self, address=('127.0.0.1', 0)):
+        SimpleXMLRPCServer.__init__(self, address, RequestHandler,
+                                    logRequests=False, allow_none=True)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.sockets = set()
+        self.calls = []
+        self.params = []
+        self.sessions = {}  # session: time of login
+        self._call_times = deque()
+        self.flaky = {}
+        self.entities = dict((ns, {}) for ns in NAMESPACES)
+        self._ids = itertools.count(1)
+        self.limits = {
+            'antiDosCallCount': 100,
+            'antiDosTimeInterval': 1,
+        }
+        self.batch_limits = dict(
+            ('global.' + op, 100)
+            for op in ('create', 'get', 'check', 'update', 'remove',
+                       'restore'))
+
+        self.register_function(self.api_version, 'api.version')
+        self.register_function(self.api_limits, 'api.limits')
+        self.register_function(self.client_login, 'client.login')
+        self.register_function(self.client_logout, 'client.logout')
+        self.register_multicall_functions()
+
+        for ns in NAMESPACES:
+            for op in ('list', 'get', 'create', 'check', 'update', 'remove',
+                       'restore'):
+                self.register_function(self._make_handler(ns, op),
+                                       '%s.%s' % (ns, op))
+
+    @property
+    def url(self):
+        return 'http://%s:%d/RPC2' % self.server_address
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, args=(0.05,))
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        # wake up handlers waiting on kept-alive connections
+        with self.lock:
+            sockets = list(self.sockets)
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+
+    def handle_error(self, request, client_address):
+        pass
+
+    def _dispatch(self, method, params):
+        with self.lock:
+            self.calls.append(method)
+            self.params.append(params)
+            throttled = self._throttled(method)
+        if self.latency or self.latency_jitter:
+            time.sleep(self.latency + random.random() * self.latency_jitter)
+        if throttled:
+            return throttled
+        return SimpleXMLRPCServer._dispatch(self, method, params)
+
+    def _throttled(self, method):
+        """Returns error result if `method` exceeds the antidos limits."""
+        if not self.enforce_limits or method in _UNLIMITED:
+            return None
+        now = time.time()
+        interval = self.limits['antiDosTimeInterval']
+        times = self._call_times
+        while times and times[0] <= now - interval:
+            times.popleft()
+        if len(times) >= self.limits['antiDosCallCount']:
+            wait = int(times[0] + interval - now)
+            return {'status': 429, 'statusMessage':
+                    'Too many requests. Has to wait %d[s].' % wait}
+        times.append(now)
+        return None
+
+    def expire_sessions(self):
+        """Makes all issued sessions invalid."""
+        self.sessions.clear()
+
+    def _valid_session(self, user):
+        login_time = self.sessions.get(user.get('session'))
+        if login_time is None:
+            return False
+        if self.session_ttl is not None and \
+                time.time() - login_time > self.session_ttl:
+            return False
+        return True
+
+    def _make_handler(self, ns, op):
+        method = getattr(self, '_' + op)
+
+        def handler(user, *args):
+            if not self._valid_session(user):
+                return _SESSION_EXPIRED
+            limit = self._batch_limit(ns, op)
+            if op != 'list' and limit and len(args[0]) > limit:
+                return {'status': 400, 'statusMessage': 'Too many items',
+                        'diagnostics': {'problems': []}}
+            with self.lock:
+                return method(ns, self.entities[ns], *args)
+        return handler
+
+    def _batch_limit(self, ns, op):
+        return self.batch_limits.get('%s.%s' % (ns, op),
+                                     self.batch_limits.get('global.' + op))
+
+    def _list(self, ns, store, filter, display=None):
+        _, parent, parent_key = NAMESPACES[ns]
+        items = sorted(store.values(), key=lambda item: item['id'])
+        if parent_key and filter.get(parent_key):
+            parents = set(filter[parent_key])
+            items = [item for item in items if item.get(parent) in parents]
+        if not filter.get('includeDeleted'):
+            items = [item for item in items if not item['deleted']]
+        offset = filter.get('offset', 0)
+        limit = filter.get('limit', len(items))
+        return _ok(**{ns: items[offset:offset + limit]})
+
+    def _get(self, ns, store, ids):
+        missing = [i for i in ids if i not in store]
+        if missing:
+            return {'status': 404, 'statusMessage': 'Not found'}
+        return _ok(**{ns: [store[i] for i in ids]})
+
+    def _problem(self, item):
+        """Items having any value equal to 'invalid' are refused, the ones
+        having value 'flaky' fail `flaky_failures` times (by requestId).
+        """
+        if not isinstance(item, dict):
+            return None
+        if 'invalid' in item.values():
+            return 'invalid_value'
+        if 'flaky' in item.values():
+            failures = self.flaky.get(item.get('requestId'), 0)
+            if failures < self.flaky_failures:
+                self.flaky[item.get('requestId')] = failures + 1
+                return 'internal_error'
+        return None
+
+    def _create(self, ns, store, items):
+        ids = []
+        problems = [self._problem(item) for item in items]
+        for item, problem in zip(items, problems):
+            if problem:
+                continue
+            item = dict(item, id=next(self._ids), deleted=False)
+            store[item['id']] = item
+            ids.append(item['id'])
+        if ns == 'keywords':
+            result = _ok(positiveKeywordIds=ids, negativeKeywordIds=[])
+        else:
+            result = _ok(**{NAMESPACES[ns][0] + 'Ids': ids})
+        result.update(_diagnostics(items, problems) or {})
+        return result
+
+    def _check(self, ns, store, items):
+        problems = [self._problem(item) for item in items]
+        return _diagnostics(items, problems) or _ok()
+
+    def _update(self, ns, store, items):
+        for item in items:
+            store[item['id']].update(item)
+        return _ok()
+
+    def _remove(self, ns, store, ids):
+        return self._set_deleted(store, ids, True)
+
+    def _restore(self, ns, store, ids):
+        return self._set_deleted(store, ids, False)
+
+    def _set_deleted(self, store, ids, deleted):
+        problems = [None if i in store else 'not_found' for i in ids]
+        for i, problem in zip(ids, problems):
+            if not problem:
+                store[i]['deleted'] = deleted
+        return _diagnostics(ids, problems) or _ok()
+
+    def api_version(self):
+        return _ok(versionName='cipisek', versionNumber='1.0')
+
+    def api_limits(self, user):
+        if not self._valid_session(user):
+            return _SESSION_EXPIRED
+        return _ok(limits=dict(self.limits),
+                   batchCallLimits=[{'name': name, 'limit': limit}
+                                    for name, limit
+                                    in self.batch_limits.items()])
+
+    def client_login(self, username, password):
+        if password != 'password':
+            return {'status': 401, 'statusMessage': 'Wrong credentials'}
+        with self.lock:
+            session = 'session-%d' % next(self._ids)
+            self.sessions[session] = time.time()
+        return _ok(session=session)
+
+    def client_logout(self, user):
+        self.sessions.pop(user.get('session'), None)
+        return _ok()
+
+
+def main(argv=None):
+    """Serves the stand-in API until interrupted, e.g.::
+
+        python -m tests.sklikapi.cipisek.server --port 8080 --latency 0.05
+    """
+    from optparse import OptionParser
+
+    parser = OptionParser(usage='%prog [options]')
+    parser.add_option('--port', type='int', default=8080)
+    parser.add_option('--latency', type='float', default=0)
+    parser.add_option('--jitter', type='float', default=0)
+    parser.add_option('--loss', type='float', default=0,
+                      help='probability of a request being dropped')
+    parser.add_option('--session-ttl', type='float', default=None)
+    parser.add_option('--enforce-limits', action='store_true')
+    options, _ = parser.parse_args(argv)
+
+    server = StandInServer(('127.0.0.1', options.port))
+    server.latency = options.latency
+    server.latency_jitter = options.jitter
+    server.loss = options.loss
+    server.session_ttl = options.session_ttl
+    server.enforce_limits = options.enforce_limits
+    sys.stdout.write('Serving cipisek stand-in API at %s\n' % server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import gc
+
+from sklikapi.cipisek import AsyncClient
+from sklikapi.cipisek.concurrency import create_pool
+from sklikapi.cipisek.entities import Group
+from sklikapi.cipisek.exceptions import AuthenticationError, NotFoundError
+
+from . import StandInTestCase
+
+
+class AsyncClientTest(StandInTestCase):
+
+    client_kwargs = None
+
+    def prepare_server(self, server):
+        for i in xrange(1, 21):
+            server.entities['groups'][i] = {
+                'id': i, 'campaignId': 1, 'name': 'group %d' % i,
+                'deleted': False}
+
+    def tearDown(self):
+        # let clients referenced from tracebacks log out
+        gc.collect()
+        super(AsyncClientTest, self).tearDown()
+
+    def test_calls(self):
+        c = AsyncClient(self.server.url, 'login', 'password', workers=5)
+        futures = [c.get_groups([i]) for i in xrange(1, 21)]
+        groups = [f.result()[0] for f in futures]
+        self.assertEqual([g.id for g in groups], range(1, 21))
+        self.assertIsInstance(groups[0], Group)
+        self.assertEqual(c.list_groups(campaigns=[1]).result(), groups)
+        c.close()
+
+    def test_error(self):
+        c = AsyncClient(self.server.url, 'login', 'password')
+        with self.assertRaises(NotFoundError):
+            c.get_groups([42]).result()
+        c.close()
+
+    def test_login_error(self):
+        c = AsyncClient(self.server.url, 'login', 'wrong')
+        with self.assertRaises(AuthenticationError):
+            c.get_groups([1]).result()
+        c.close()
+
+    def test_close(self):
+        c = AsyncClient(self.server.url, 'login', 'password')
+        c.list_groups().result()
+        c.close()
+        self.assertEqual(self.server.calls[-1], 'client.logout')
+
+    def test_shared_pool(self):
+        pool = create_pool(2)
+        shutdowns = []
+        pool.shutdown = lambda wait=True: shutdowns.append(wait)
+        c = AsyncClient(self.server.url, 'login', 'password', pool=pool)
+        c.get_groups([1]).result()
+        c.close()
+        # the pool may be used by other clients
+        self.assertEqual(shutdowns, [])
+        self.assertEqual(self.server.calls[-1], 'client.logout')
+        del pool.shutdown
+        pool.shutdown()
+
+    def test_method_surface(self):
+        self.assertEqual(AsyncClient.update_keywords.__name__,
+                         'update_keywords')
+        self.assertTrue(hasattr(AsyncClient, 'restore_campaigns'))
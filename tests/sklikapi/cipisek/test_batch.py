@@ -0,0 +1,60 @@
+from sklikapi.cipisek.exceptions import NotFoundError, SklikApiError
+
+from . import StandInTestCase
+
+
+class BatchTest(StandInTestCase):
+
+    client_kwargs = {'retries': 1}
+
+    def prepare_server(self, server):
+        server.entities['groups'][1] = {
+            'id': 1, 'campaignId': 1, 'name': 'group', 'deleted': False}
+        server.entities['ads'][2] = {
+            'id': 2, 'groupId': 1, 'creative1': 'ad', 'deleted': False}
+        server.entities['keywords'][3] = {
+            'id': 3, 'groupId': 1, 'name': 'kw', 'deleted': False}
+
+    def setUp(self):
+        super(BatchTest, self).setUp()
+        self.client.MALFORMED_SESSION_WAIT = 0
+
+    def test_single_request(self):
+        with self.client.batch() as b:
+            groups = b.call('groups.get', [1])
+            ads = b.call('ads.list', {'groupIds': [1]}, {})
+            keywords = b.call('keywords.list', {'groupIds': [1]})
+            self.assertEqual(len(b), 3)
+
+        self.assertEqual(self.server.calls, [
+            'system.multicall', 'groups.get', 'ads.list', 'keywords.list'])
+        self.assertEqual(groups.result()['groups'][0]['name'], 'group')
+        self.assertEqual(ads.result()['ads'][0]['id'], 2)
+        self.assertEqual(keywords.result()['keywords'][0]['name'], 'kw')
+
+    def test_per_call_errors(self):
+        with self.client.batch() as b:
+            missing = b.call('groups.get', [42])
+            existing = b.call('groups.get', [1])
+
+        with self.assertRaises(NotFoundError):
+            missing.result()
+        self.assertEqual(existing.result()['groups'][0]['id'], 1)
+
+    def test_not_sent(self):
+        b = self.client.batch()
+        call = b.call('groups.get', [1])
+        with self.assertRaises(SklikApiError):
+            call.result()
+        b.send()
+        self.assertTrue(call.sent)
+
+    def test_session_expired(self):
+        self.server.expire_sessions()
+        with self.client.batch() as b:
+            groups = b.call('groups.get', [1])
+
+        self.assertEqual(self.server.calls, [
+            'system.multicall', 'groups.get', 'client.login',
+            'system.multicall', 'groups.get'])
+        self.assertEqual(groups.result()['groups'][0]['id'], 1)
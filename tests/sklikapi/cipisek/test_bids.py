@@ -0,0 +1,78 @@
+import warnings
+
+from sklikapi.cipisek.bids import BidEngine, numpy
+from sklikapi.cipisek.entities import Keyword
+from sklikapi.cipisek.tables import KeywordTable
+
+from . import StandInTestCase, unittest
+
+
+KEYWORDS = [
+    {'id': 1, 'groupId': 1, 'cpc': 100, 'minCpc': 50, 'status': 'active'},
+    {'id': 2, 'groupId': 1, 'cpc': 1000, 'minCpc': 50, 'status': 'active'},
+    {'id': 3, 'groupId': 2, 'cpc': 100, 'minCpc': 150, 'status': 'active'},
+    {'id': 4, 'groupId': 2, 'cpc': None, 'minCpc': 50, 'status': 'active'},
+    {'id': 5, 'groupId': 3, 'cpc': 200, 'minCpc': 50, 'status': 'suspend'},
+]
+
+
+def updates(engine, keywords=KEYWORDS):
+    return dict((kw.id, kw.cpc) for kw in engine.updates(
+        Keyword.marshall_list(keywords)))
+
+
+@unittest.skipUnless(numpy, 'numpy is probably not installed')
+class BidEngineTest(unittest.TestCase):
+
+    def test_multiply(self):
+        engine = BidEngine().multiply(1.5)
+        self.assertEqual(updates(engine),
+                         {1: 150, 2: 1500, 3: 150, 5: 300})
+
+    def test_group_factors(self):
+        engine = BidEngine().multiply({1: 0.5, 3: 1.1})
+        self.assertEqual(updates(engine), {1: 50, 2: 500, 5: 220})
+
+    def test_clamp(self):
+        engine = BidEngine().clamp(150, 500)
+        self.assertEqual(updates(engine), {1: 150, 2: 500, 3: 150})
+
+    def test_floor_to_min_cpc(self):
+        engine = BidEngine().multiply(0.4).floor_to_min_cpc()
+        self.assertEqual(updates(engine), {1: 50, 2: 400, 3: 150, 5: 80})
+
+    def test_missing_without_warnings(self):
+        engine = BidEngine().clamp(150, 500).floor_to_min_cpc()
+        keywords = KEYWORDS + [{'id': 6, 'groupId': 3, 'cpc': 100}]
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            self.assertEqual(updates(engine, keywords),
+                             {1: 150, 2: 500, 3: 150, 6: 150})
+        self.assertEqual(caught, [])
+
+    def test_where(self):
+        engine = BidEngine().multiply(
+            2, where=lambda columns: columns['status'] == 'suspend')
+        self.assertEqual(updates(engine), {5: 400})
+
+    def test_unchanged(self):
+        engine = BidEngine().clamp(maximum=10000)
+        self.assertEqual(engine.updates(KeywordTable(KEYWORDS)), [])
+
+
+@unittest.skipUnless(numpy, 'numpy is probably not installed')
+class BidEngineApplyTest(StandInTestCase):
+
+    def prepare_server(self, server):
+        for keyword in KEYWORDS:
+            keyword = dict(keyword, deleted=False)
+            server.entities['keywords'][keyword['id']] = keyword
+        server.batch_limits['keywords.update'] = 2
+
+    def test_apply(self):
+        table = self.client.list_keywords([1, 2, 3], as_table=True)
+        result = BidEngine().multiply(2).apply(self.client, table)
+        self.assertEqual(len(result), 4)
+        self.assertEqual(self.server.calls.count('keywords.update'), 2)
+        self.assertEqual(self.server.entities['keywords'][2]['cpc'], 2000)
+        self.assertIsNone(self.server.entities['keywords'][4]['cpc'])
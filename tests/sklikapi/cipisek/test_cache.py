@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+
+from sklikapi.cipisek.cache import FileCache
+from sklikapi.cipisek.client import Client
+
+from . import FakeClock, StandInTestCase, unittest
+
+
+class FileCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'cache.json')
+        self.clock = FakeClock(1000.0)
+        self.cache = FileCache(self.path, ttls={'limits': 10},
+                               clock=self.clock)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_get_set(self):
+        self.assertIsNone(self.cache.get('limits', 'key'))
+        self.cache.set('limits', 'key', {'a': 1})
+        self.assertEqual(self.cache.get('limits', 'key'), {'a': 1})
+        self.assertIsNone(self.cache.get('session', 'key'))
+
+    def test_shared(self):
+        self.cache.set('session', 'key', 'abc')
+        other = FileCache(self.path, clock=self.clock)
+        self.assertEqual(other.get('session', 'key'), 'abc')
+        self.assertEqual(os.stat(self.path).st_mode & 0777, 0600)
+
+    def test_expiry(self):
+        self.cache.set('limits', 'key', 1)
+        self.clock.now += 10
+        self.assertIsNone(self.cache.get('limits', 'key'))
+
+    def test_delete(self):
+        self.cache.set('limits', 'key', 1)
+        self.cache.delete('limits', 'key')
+        self.assertIsNone(self.cache.get('limits', 'key'))
+
+    def test_corrupted(self):
+        with open(self.path, 'w') as f:
+            f.write('{')
+        self.assertIsNone(self.cache.get('limits', 'key'))
+        self.cache.set('limits', 'key', 1)
+        self.assertEqual(self.cache.get('limits', 'key'), 1)
+
+
+class ClientCacheTest(StandInTestCase):
+
+    client_kwargs = None
+
+    def prepare_server(self, server):
+        server.entities['groups'][1] = {'id': 1, 'deleted': False}
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache = FileCache(os.path.join(self.dir, 'cache.json'))
+        super(ClientCacheTest, self).setUp()
+
+    def tearDown(self):
+        super(ClientCacheTest, self).tearDown()
+        shutil.rmtree(self.dir)
+
+    def _get_client(self):
+        return Client(self.server.url, 'login', 'password', cache=self.cache)
+
+    def test_startup(self):
+        c = self._get_client()
+        self.assertEqual(self.server.calls,
+                         ['api.version', 'client.login', 'api.limits'])
+        del c
+
+        del self.server.calls[:]
+        c = self._get_client()
+        self.assertEqual(self.server.calls, [])
+        self.assertEqual(c.get_batch_limit('groups.get'), 100)
+        self.assertEqual(c.get_groups([1])[0].id, 1)
+        self.assertEqual(self.server.calls, ['groups.get'])
+
+    def test_expired_session(self):
+        self._get_client()
+        self.server.expire_sessions()
+
+        del self.server.calls[:]
+        c = self._get_client()
+        c.MALFORMED_SESSION_WAIT = 1000
+        self.assertEqual(c.get_groups([1])[0].id, 1)
+        self.assertEqual(self.server.calls,
+                         ['groups.get', 'client.login', 'groups.get'])
+
+    def test_expired_session_limits(self):
+        self._get_client()
+        self.server.expire_sessions()
+        self.cache.delete('limits', '%s login' % self.server.url)
+
+        del self.server.calls[:]
+        self._get_client()
+        self.assertEqual(self.server.calls,
+                         ['api.limits', 'client.login', 'api.limits'])
+
+    def test_close(self):
+        c = Client(self.server.url, 'login', 'password')
+        self.assertEqual(len(self.server.sessions), 1)
+        c.close()
+        self.assertEqual(self.server.sessions, {})
+        self.assertEqual(self.server.calls[-1], 'client.logout')
+        c.close()
+        self.assertEqual(self.server.calls.count('client.logout'), 1)
@@ -0,0 +1,49 @@
+from sklikapi.cipisek.entities import Keyword
+
+from . import StandInTestCase
+
+
+class ChangesTest(StandInTestCase):
+
+    def prepare_server(self, server):
+        server.entities['campaigns'][1] = {
+            'id': 1, 'name': 'campaign', 'dayBudget': 10000,
+            'status': 'active', 'deleted': False,
+            'regions': [{'type': 'circle', 'radius': 10}],
+            'negativeKeywords': [{'name': 'free', 'matchType': 'broad'}]}
+
+    def _update_params(self, method='campaigns.update'):
+        return self.server.params[self.server.calls.index(method)][1]
+
+    def test_update_changed(self):
+        campaign = self.client.list_campaigns()[0]
+        campaign.dayBudget = 20000
+        campaign.regions[0].radius = 20
+        self.client.update_campaigns([campaign])
+        self.assertEqual(self._update_params(), [{
+            'id': 1, 'dayBudget': 20000,
+            'regions': [{'type': 'circle', 'radius': 20}]}])
+
+    def test_update_fetched(self):
+        campaign = self.client.get_campaigns([1])[0]
+        campaign.status = 'suspend'
+        self.client.update_campaigns([campaign])
+        self.assertEqual(self._update_params(),
+                         [{'id': 1, 'status': 'suspend'}])
+
+    def test_update_new(self):
+        self.server.entities['keywords'][1] = {'id': 1, 'deleted': False}
+        self.client.update_keywords([Keyword(id=1, name='kw', cpc=100)])
+        self.assertEqual(self._update_params('keywords.update'),
+                         [{'id': 1, 'cpc': 100}])
+
+    def test_update_unchanged(self):
+        self.server.entities['keywords'][1] = {'id': 1, 'deleted': False}
+        self.server.entities['keywords'][2] = {'id': 2, 'deleted': False}
+        first, second = self.client.get_keywords([1, 2])
+        self.client.update_keywords([first, second])
+        self.assertNotIn('keywords.update', self.server.calls)
+        second.cpc = 100
+        self.client.update_keywords([first, second])
+        self.assertEqual(self._update_params('keywords.update'),
+                         [{'id': 2, 'cpc': 100}])
@@ -0,0 +1,159 @@
+import time
+import threading
+
+from sklikapi.cipisek.entities import Ad, Group, Keyword
+from sklikapi.cipisek.exceptions import InvalidDataError
+
+from . import StandInTestCase
+
+
+class ChunkingTest(StandInTestCase):
+
+    client_kwargs = None
+
+    def prepare_server(self, server):
+        server.batch_limits['global.create'] = 3
+        server.batch_limits['groups.get'] = 2
+
+    def _keywords(self, n):
+        return [Keyword(groupId=1, name='kw %d' % i, matchType='broad')
+                for i in xrange(n)]
+
+    def test_batch_limit(self):
+        c = self.get_client()
+        self.assertEqual(c.get_batch_limit('groups.get'), 2)
+        self.assertEqual(c.get_batch_limit('ads.get'), 100)
+        self.assertEqual(c.get_batch_limit('ads.create'), 3)
+
+    def test_create_keywords(self):
+        c = self.get_client()
+        ids = c.create_keywords(self._keywords(7))
+        self.assertEqual(self.server.calls, ['keywords.create'] * 3)
+        self.assertEqual(len(ids), 7)
+        self.assertEqual(ids, sorted(ids))
+
+    def test_get_groups(self):
+        c = self.get_client()
+        ids = c.create_groups([Group(campaignId=1, name='g %d' % i)
+                               for i in xrange(5)])
+        groups = c.get_groups(ids)
+        self.assertEqual(self.server.calls,
+                         ['groups.create'] * 2 + ['groups.get'] * 3)
+        self.assertEqual([g.id for g in groups], ids)
+
+    def test_concurrent(self):
+        c = self.get_client(concurrency=4)
+        ids = c.create_keywords(self._keywords(20))
+        self.assertEqual(self.server.calls, ['keywords.create'] * 7)
+        self.assertEqual(len(ids), 20)
+        self.assertEqual([kw.name for kw in c.get_keywords(ids)],
+                         ['kw %d' % i for i in xrange(20)])
+
+    def test_merged_diagnostics(self):
+        c = self.get_client()
+        ads = [Ad(groupId=1, creative1='ad %d' % i, requestId=str(i))
+               for i in xrange(7)]
+        ads[1].creative1 = ads[5].creative1 = 'invalid'
+
+        with self.assertRaises(InvalidDataError) as cm:
+            c.create_ads(ads)
+        self.assertEqual(self.server.calls, ['ads.create'] * 3)
+        self.assertEqual(cm.exception.args[0], 206)
+        self.assertEqual([d['requestId'] for d in cm.exception.errors()],
+                         ['1', '5'])
+        # valid ads were created anyway
+        self.assertEqual(len(self.server.entities['ads']), 5)
+
+    def test_failed_items(self):
+        c = self.get_client()
+        keywords = self._keywords(7)
+        keywords[2].name = keywords[6].name = 'invalid'
+
+        with self.assertRaises(InvalidDataError) as cm:
+            c.create_keywords(keywords)
+        e = cm.exception
+        self.assertEqual(e.args[0], 206)
+        self.assertEqual([(index, item) for index, item, _ in e.failed],
+                         [(2, keywords[2]), (6, keywords[6])])
+        self.assertEqual(e.failed[0][2][0]['id'], 'invalid_value')
+        self.assertEqual(len(e.result['positiveKeywordIds']), 5)
+        self.assertNotIn('diagnostics', e.result)
+        self.assertEqual(len(e.errors()), 2)
+
+    def test_refused(self):
+        c = self.get_client()
+        with self.assertRaises(InvalidDataError) as cm:
+            c.check_keywords([Keyword(name='invalid')] * 4)
+        self.assertEqual(cm.exception.args[0], 406)
+        self.assertEqual(len(cm.exception.failed), 4)
+
+    def test_retry_transient(self):
+        c = self.get_client(retries=1)
+        c.retry_policy.initial_delay = 0
+        ads = [Ad(groupId=1, creative1='ad %d' % i) for i in xrange(5)]
+        ads[1].creative2 = ads[4].creative2 = 'flaky'
+        ads[3].creative1 = 'invalid'
+
+        with self.assertRaises(InvalidDataError) as cm:
+            c.create_ads(ads)
+        self.assertEqual([index for index, _, _ in cm.exception.failed], [3])
+        self.assertEqual(len(cm.exception.result['adIds']), 4)
+        # only the refused items are sent again
+        self.assertEqual(self.server.calls, ['ads.create'] * 4)
+        self.assertEqual([len(p[1]) for p in self.server.params[-4:]],
+                         [3, 1, 2, 1])
+
+    def test_transient_without_retries(self):
+        c = self.get_client()
+        with self.assertRaises(InvalidDataError) as cm:
+            c.create_ads([Ad(groupId=1, creative1='flaky')])
+        self.assertEqual(cm.exception.failed[0][2][0]['id'], 'internal_error')
+        self.assertEqual(self.server.calls, ['ads.create'])
+
+    def test_close_stops_workers(self):
+        threads = threading.active_count()
+        c = self.get_client(concurrency=4)
+        c.create_keywords(self._keywords(20))
+        self.assertGreater(threading.active_count(), threads)
+        c.close()
+        for _ in xrange(100):
+            if threading.active_count() <= threads:
+                break
+            time.sleep(0.01)
+        self.assertEqual(threading.active_count(), threads)
+
+    def test_request_ids(self):
+        c = self.get_client()
+        c.create_keywords(self._keywords(2))
+        c.create_ads([Ad(groupId=1, creative1='ad')])
+        keywords, ads = [params[1] for params in self.server.params[-2:]]
+        # only ads declare requestId
+        self.assertNotIn('requestId', keywords[0])
+        self.assertEqual(ads[0]['requestId'], '0')
+
+    def test_request_id_collision(self):
+        c = self.get_client()
+        ads = [Ad(groupId=1, creative1='invalid'),
+               Ad(groupId=1, creative1='ad', requestId='0')]
+        with self.assertRaises(InvalidDataError) as cm:
+            c.create_ads(ads)
+        self.assertEqual([index for index, _, _ in cm.exception.failed], [0])
+        sent = self.server.params[-1][1]
+        self.assertNotEqual(sent[0]['requestId'], '0')
+
+    def test_failed_ids(self):
+        c = self.get_client()
+        self.server.entities['keywords'][1] = {'id': 1, 'deleted': False}
+        with self.assertRaises(InvalidDataError) as cm:
+            c.remove_keywords([1, 2, 3])
+        self.assertEqual(cm.exception.args[0], 206)
+        self.assertEqual([(index, item) for index, item, _ in
+                          cm.exception.failed], [(1, 2), (2, 3)])
+        self.assertTrue(self.server.entities['keywords'][1]['deleted'])
+
+    def test_refused_ids(self):
+        c = self.get_client()
+        with self.assertRaises(InvalidDataError) as cm:
+            c.restore_keywords([2, 3])
+        self.assertEqual(cm.exception.args[0], 406)
+        self.assertEqual(len(cm.exception.failed), 2)
@@ -0,0 +1,78 @@
+import time
+
+from sklikapi.cipisek.concurrency import (Future, ThreadPool, as_completed,
+                                          create_pool, imap_unordered)
+from sklikapi.cipisek.exceptions import TimeoutError
+
+from . import unittest
+
+
+class FutureTest(unittest.TestCase):
+
+    def test_result(self):
+        future = Future()
+        self.assertFalse(future.done())
+        future.set_result(42)
+        self.assertTrue(future.done())
+        self.assertEqual(future.result(), 42)
+        self.assertIsNone(future.exception())
+
+    def test_timeout(self):
+        with self.assertRaises(TimeoutError):
+            Future().result(timeout=0.01)
+
+    def test_callback(self):
+        done = []
+        future = Future()
+        future.add_done_callback(done.append)
+        future.set_result(None)
+        future.add_done_callback(done.append)
+        self.assertEqual(done, [future, future])
+
+
+class ThreadPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = ThreadPool(4)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_submit(self):
+        futures = [self.pool.submit(pow, x, 2) for x in xrange(10)]
+        self.assertEqual([f.result() for f in futures],
+                         [x ** 2 for x in xrange(10)])
+        self.assertEqual(len(self.pool._workers), 4)
+
+    def test_exception(self):
+        future = self.pool.submit(int, 'abc')
+        with self.assertRaises(ValueError):
+            future.result()
+        self.assertIsInstance(future.exception(), ValueError)
+
+    def test_as_completed(self):
+        slow = self.pool.submit(time.sleep, 0.1)
+        fast = self.pool.submit(time.sleep, 0)
+        self.assertEqual(list(as_completed([slow, fast])), [fast, slow])
+
+    def test_create_pool(self):
+        self.assertIsInstance(create_pool(), ThreadPool)
+
+
+class ImapUnorderedTest(unittest.TestCase):
+
+    def test_window(self):
+        pool = ThreadPool(4)
+        consumed = []
+
+        def items():
+            for i in xrange(10):
+                consumed.append(i)
+                yield i
+
+        results = imap_unordered(pool, lambda x: x * 2, items(), 3)
+        first = next(results)
+        self.assertIn(first, [0, 2, 4])
+        self.assertEqual(len(consumed), 4)
+        self.assertEqual(sorted([first] + list(results)), range(0, 20, 2))
+        pool.shutdown()
@@ -6,6 +6,12 @@ class MockEntity(Entity):
     __slots__ = ['a', 'b', 'c', 'd']
 
 
+class UpdatableEntity(MockEntity):
+    __slots__ = ['e']
+
+    _updatable_attributes = ['a', 'c', 'e']
+
+
 class EntityTest(unittest.TestCase):
 
     # c is missing
@@ -24,3 +30,45 @@ class EntityTest(unittest.TestCase):
     def test_entity_to_dict(self):
         entity = MockEntity(**self.values)
         self.assertEqual(self.values, dict(entity))
+
+    def test_entity_from_entity(self):
+        entity = MockEntity(self._get_entity(), a='ignored')
+        self.assertEqual(entity, self._get_entity())
+        self.assertEqual(entity.a, self.values['a'])
+
+    def test_entity_from_other_source(self):
+        entity = UpdatableEntity(self._get_entity(), e=1)
+        self.assertEqual(dict(entity), dict(self.values, e=1))
+        with self.assertRaises(TypeError):
+            MockEntity(1)
+
+    def test_equality(self):
+        entity = self._get_entity()
+        self.assertEqual(entity, self._get_entity())
+        self.assertNotEqual(entity, MockEntity(a='headline'))
+        self.assertNotEqual(entity, self.values)
+
+    def test_iterate_updatable(self):
+        entity = UpdatableEntity(self.values, e='extra')
+        self.assertEqual(dict(entity.iterate_updatable()),
+                         {'a': 'headline', 'e': 'extra'})
+        self.assertEqual(entity._slots, ('e', 'a', 'b', 'c', 'd'))
+
+    def test_track_changes(self):
+        entity = UpdatableEntity(a='x', c=[1], e=1).track_changes()
+        self.assertEqual(dict(entity.iterate_changes()), {})
+        entity.e = 2
+        entity.c.append(2)
+        entity.b = 'ignored'
+        self.assertEqual(dict(entity.iterate_changes()), {'c': [1, 2], 'e': 2})
+        entity.e = 1
+        self.assertEqual(dict(entity.iterate_changes()), {'c': [1, 2]})
+
+    def test_untracked_changes(self):
+        entity = UpdatableEntity(a='x', b='y')
+        self.assertEqual(dict(entity.iterate_changes()),
+                         dict(entity.iterate_updatable()))
+
+    def test_all_fields_missing(self):
+        self.assertTrue(MockEntity().all_fields_missing)
+        self.assertFalse(self._get_entity().all_fields_missing)
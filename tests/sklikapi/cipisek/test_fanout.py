@@ -0,0 +1,50 @@
+from sklikapi.cipisek.entities import Ad, Keyword
+
+from . import StandInTestCase
+
+
+class FanOutTest(StandInTestCase):
+
+    client_kwargs = {'concurrency': 4}
+
+    def prepare_server(self, server):
+        for i in xrange(1, 101):
+            server.entities['keywords'][i] = {
+                'id': i, 'groupId': i % 10, 'name': 'kw', 'deleted': False}
+            server.entities['ads'][i] = {
+                'id': i, 'groupId': i % 10, 'deleted': False}
+
+    def test_keywords(self):
+        keywords = list(self.client.fan_out(self.client.list_keywords,
+                                            range(10), chunk_size=3))
+        self.assertEqual(self.server.calls, ['keywords.list'] * 4)
+        self.assertEqual(sorted(kw.id for kw in keywords), range(1, 101))
+        self.assertIsInstance(keywords[0], Keyword)
+
+    def test_keyword_argument(self):
+        ads = list(self.client.fan_out(self.client.list_ads, range(5),
+                                       arg='groups', chunk_size=1,
+                                       workers=2))
+        self.assertEqual(self.server.calls, ['ads.list'] * 5)
+        self.assertEqual(sorted(ad.id for ad in ads),
+                         [i for i in xrange(1, 101) if i % 10 < 5])
+        self.assertIsInstance(ads[0], Ad)
+
+    def test_default_chunk_size(self):
+        self.client.batch_limits['keywords.list'] = 4
+        list(self.client.fan_out(self.client.list_keywords, range(10)))
+        self.assertEqual(self.server.calls, ['keywords.list'] * 3)
+
+        del self.server.calls[:]
+        list(self.client.fan_out(lambda groups: self.client.list_keywords(
+            groups), range(10)))
+        self.assertEqual(self.server.calls, ['keywords.list'])
+
+    def test_prefetching_listing(self):
+        # the listings wait for pages prefetched by the pool of the client
+        self.client.concurrency = 2
+        ads = list(self.client.fan_out(
+            lambda groups: self.client.iter_ads(groups=groups, page_size=2,
+                                                prefetch=True),
+            range(10), chunk_size=1, workers=4))
+        self.assertEqual(sorted(ad.id for ad in ads), range(1, 101))
@@ -0,0 +1,56 @@
+from itertools import islice
+
+from sklikapi.cipisek.entities import Ad, Campaign, Group, Keyword
+
+from . import StandInTestCase
+
+
+class IteratorsTest(StandInTestCase):
+
+    def prepare_server(self, server):
+        entities = server.entities
+        for i in xrange(1, 26):
+            entities['keywords'][i] = {'id': i, 'groupId': 1 + i % 2,
+                                       'name': 'kw %d' % i, 'deleted': False}
+            entities['ads'][i] = {'id': i, 'groupId': 1, 'deleted': False}
+            entities['groups'][i] = {'id': i, 'campaignId': 1,
+                                     'deleted': False}
+            entities['campaigns'][i] = {'id': i, 'deleted': False}
+
+    def test_iter_keywords(self):
+        keywords = list(self.client.iter_keywords([1, 2], page_size=10))
+        self.assertEqual(self.server.calls, ['keywords.list'] * 3)
+        self.assertEqual([kw.id for kw in keywords], range(1, 26))
+        self.assertIsInstance(keywords[0], Keyword)
+
+    def test_filter(self):
+        keywords = list(self.client.iter_keywords([1], page_size=5))
+        self.assertEqual([kw.id for kw in keywords], range(2, 26, 2))
+
+    def test_exact_pages(self):
+        keywords = list(self.client.iter_keywords([1, 2], page_size=5))
+        self.assertEqual(len(keywords), 25)
+        self.assertEqual(self.server.calls, ['keywords.list'] * 6)
+
+    def test_lazy(self):
+        keywords = self.client.iter_keywords([1, 2], page_size=10)
+        self.assertEqual(self.server.calls, [])
+        list(islice(keywords, 10))
+        self.assertEqual(self.server.calls, ['keywords.list'])
+
+    def test_prefetch(self):
+        keywords = self.client.iter_keywords([1, 2], page_size=10,
+                                             prefetch=True)
+        self.assertEqual(next(keywords).id, 1)
+        # the second page is already being fetched
+        self.assertEqual([kw.id for kw in keywords], range(2, 26))
+        self.assertEqual(self.server.calls, ['keywords.list'] * 3)
+
+    def test_other_namespaces(self):
+        c = self.client
+        for items, cls in [(c.iter_ads(groups=[1], page_size=7), Ad),
+                           (c.iter_groups(page_size=7), Group),
+                           (c.iter_campaigns(page_size=7), Campaign)]:
+            items = list(items)
+            self.assertEqual(len(items), 25)
+            self.assertIsInstance(items[0], cls)
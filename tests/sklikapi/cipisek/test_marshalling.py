@@ -1,9 +1,9 @@
 from datetime import datetime
 from xmlrpclib import DateTime
 
-from sklikapi.cipisek.entities import Entity
-from sklikapi.cipisek.marshalling import (marshall_param, marshall_result,
-                                          marshall)
+from sklikapi.cipisek.entities import Campaign, Entity, Region, Vertex
+from sklikapi.cipisek.marshalling import (marshall_changes, marshall_param,
+                                          marshall_result, marshall)
 
 from . import unittest
 
@@ -132,3 +132,70 @@ class MarshallingTest(unittest.TestCase):
         for obj_type, data, expected in tests:
             marshalled = marshall_result(data, obj_type)
             self.assertEqual(marshalled, expected)
+
+    def test_scalar_containers_not_copied(self):
+        data = {'ids': [1, 2, 3], 'filter': {'name': u'abc', 'limit': 10}}
+        self.assertIs(marshall_param(data), data)
+        self.assertIs(marshall_result(data), data)
+
+    def test_input_not_modified(self):
+        py_dt = datetime(2014, 4, 14, 16, 27, 00)
+        data = {'ids': [1, 2], 'items': [{'date': py_dt}, {'a': 1}]}
+        marshalled = marshall_param(data)
+        self.assertIsInstance(marshalled['items'][0]['date'], DateTime)
+        self.assertIs(marshalled['items'][1], data['items'][1])
+        self.assertIs(data['items'][0]['date'], py_dt)
+
+
+class EntityCodecTest(unittest.TestCase):
+
+    py_dt = datetime(2014, 4, 14, 16, 27, 00)
+    xml_dt = DateTime('20140414T16:27:00+0200')
+
+    def test_encode(self):
+        campaign = Campaign(id=1, startDate=self.py_dt, regions=[
+            {'type': 'polygon', 'vertices': [{'latitude': 50.0}]}])
+        self.assertEqual(marshall_param(campaign), {
+            'id': 1,
+            'startDate': DateTime(self.py_dt),
+            'regions': [{'type': 'polygon',
+                         'vertices': [{'latitude': 50.0}]}],
+        })
+
+    def test_encode_unknown_types(self):
+        entity = MockEntity(a=self.py_dt, b=(1, 2))
+        self.assertEqual(marshall_param(entity),
+                         {'a': DateTime(self.py_dt), 'b': (1, 2)})
+
+    def test_encode_changes(self):
+        campaign = Campaign(id=1, name='campaign', createDate=self.py_dt,
+                            regions=[{'type': 'circle', 'radius': 1}])
+        self.assertEqual(marshall_changes(campaign), {
+            'id': 1, 'name': 'campaign',
+            'regions': [{'type': 'circle', 'radius': 1}]})
+        campaign.track_changes()
+        self.assertEqual(marshall_changes(campaign), {'id': 1})
+        campaign.startDate = self.py_dt
+        campaign.regions[0].radius = 2
+        self.assertEqual(marshall_changes(campaign), {
+            'id': 1, 'startDate': DateTime(self.py_dt),
+            'regions': [{'type': 'circle', 'radius': 2}]})
+
+    def test_encode_changes_all_updatable(self):
+        entity = MockEntity(a=1, b=2).track_changes()
+        entity.b = 3
+        entity.c = self.py_dt
+        self.assertEqual(marshall_changes(entity),
+                         {'b': 3, 'c': DateTime(self.py_dt)})
+
+    def test_decode(self):
+        campaign = marshall_result({
+            'id': 1,
+            'createDate': self.xml_dt,
+            'regions': [{'type': 'polygon',
+                         'vertices': [{'latitude': 50.0}]}],
+        }, Campaign)
+        self.assertEqual(campaign.createDate, self.py_dt)
+        self.assertIsInstance(campaign.regions[0], Region)
+        self.assertIsInstance(campaign.regions[0].vertices[0], Vertex)
+        self.assertEqual(campaign.regions[0].vertices[0].latitude, 50.0)
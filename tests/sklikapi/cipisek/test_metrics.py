@@ -0,0 +1,115 @@
+from sklikapi.cipisek.client import Client
+from sklikapi.cipisek.entities import Keyword
+from sklikapi.cipisek.exceptions import NotFoundError
+from sklikapi.cipisek.metrics import Histogram, MetricsRegistry
+
+from . import StandInTestCase, unittest
+
+
+class HistogramTest(unittest.TestCase):
+
+    def test_quantile(self):
+        histogram = Histogram((1, 2, 4))
+        self.assertIsNone(histogram.quantile(0.5))
+        for value in (0.5, 1.5, 1.5, 3):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [1, 2, 1, 0])
+        self.assertEqual(histogram.quantile(0.5), 1.5)
+        self.assertEqual(histogram.quantile(1), 4)
+        self.assertEqual(histogram.sum, 6.5)
+
+    def test_overflow(self):
+        histogram = Histogram((1, 2))
+        histogram.observe(10)
+        self.assertEqual(histogram.counts, [0, 0, 1])
+        self.assertEqual(histogram.quantile(0.99), 2)
+
+
+class MetricsRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = MetricsRegistry(latency_buckets=(0.1, 1),
+                                       item_buckets=(10,))
+        self.metrics.observe_call('ads.list', 0.05)
+        self.metrics.observe_call('ads.list', 0.5, error=True)
+        self.metrics.observe_items('ads.create', 5)
+        self.metrics.add('ads.list', 'retries', 2)
+
+    def test_as_dict(self):
+        metrics = self.metrics.as_dict()
+        self.assertEqual(metrics['ads.list']['calls'], 2)
+        self.assertEqual(metrics['ads.list']['errors'], 1)
+        self.assertEqual(metrics['ads.list']['retries'], 2)
+        self.assertEqual(metrics['ads.list']['latency']['count'], 2)
+        self.assertEqual(metrics['ads.create']['items']['sum'], 5)
+        self.metrics.reset()
+        self.assertEqual(self.metrics.as_dict(), {})
+
+    def test_prometheus(self):
+        lines = self.metrics.to_prometheus().splitlines()
+        self.assertIn('# TYPE sklikapi_calls_total counter', lines)
+        self.assertIn('sklikapi_calls_total{method="ads.list"} 2', lines)
+        self.assertIn('sklikapi_retries_total{method="ads.list"} 2', lines)
+        self.assertIn('# TYPE sklikapi_call_duration_seconds histogram',
+                      lines)
+        self.assertIn('sklikapi_call_duration_seconds_bucket'
+                      '{method="ads.list",le="0.1"} 1', lines)
+        self.assertIn('sklikapi_call_duration_seconds_bucket'
+                      '{method="ads.list",le="+Inf"} 2', lines)
+        self.assertIn('sklikapi_call_duration_seconds_count'
+                      '{method="ads.list"} 2', lines)
+        self.assertIn('sklikapi_batch_items_sum{method="ads.create"} 5',
+                      lines)
+
+
+class ClientMetricsTest(StandInTestCase):
+
+    client_kwargs = {'retries': 1}
+
+    def prepare_server(self, server):
+        server.batch_limits['keywords.check'] = 3
+
+    def setUp(self):
+        super(ClientMetricsTest, self).setUp()
+        self.client.MALFORMED_SESSION_WAIT = 0
+
+    def test_calls(self):
+        self.client.list_campaigns()
+        with self.assertRaises(NotFoundError):
+            self.client.get_groups([1])
+        metrics = self.client.metrics.as_dict()
+        self.assertEqual(metrics['campaigns.list']['calls'], 1)
+        self.assertEqual(metrics['campaigns.list']['errors'], 0)
+        self.assertGreater(metrics['campaigns.list']['request_bytes'], 0)
+        self.assertGreater(metrics['campaigns.list']['response_bytes'], 0)
+        self.assertEqual(metrics['groups.get']['errors'], 1)
+
+    def test_items(self):
+        self.client.check_keywords(
+            [Keyword(groupId=1, name='kw', matchType='broad')] * 7)
+        items = self.client.metrics.as_dict()['keywords.check']['items']
+        self.assertEqual(items['count'], 3)
+        self.assertEqual(items['sum'], 7)
+
+    def test_relogin(self):
+        self.server.expire_sessions()
+        self.client.list_campaigns()
+        metrics = self.client.metrics.as_dict()['campaigns.list']
+        self.assertEqual(metrics['relogins'], 1)
+        self.assertEqual(metrics['retries'], 1)
+        self.assertEqual(metrics['calls'], 1)
+
+    def test_batch(self):
+        with self.client.batch() as b:
+            b.call('campaigns.list', {})
+            b.call('groups.list', {})
+        metrics = self.client.metrics.as_dict()
+        self.assertEqual(metrics['system.multicall']['calls'], 1)
+
+    def test_shared(self):
+        registry = MetricsRegistry()
+        other = Client(self.server.url, 'login', 'password',
+                       metrics=registry)
+        other.list_campaigns()
+        other.close()
+        self.assertEqual(registry.as_dict()['campaigns.list']['calls'], 1)
@@ -0,0 +1,125 @@
+import threading
+import time
+
+from sklikapi.cipisek.baseclient import BaseClient
+from sklikapi.cipisek.ratelimit import SlidingWindow
+
+from . import FakeClock, StandInTestCase, unittest
+
+
+class SlidingWindowTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.window = SlidingWindow(2, 1, clock=self.clock,
+                                    sleep=self.clock.sleep)
+
+    def test_burst(self):
+        self.assertEqual(self.window.remaining, 2)
+        self.assertEqual(self.window.acquire(), 0)
+        self.assertEqual(self.window.acquire(), 0)
+        self.assertEqual(self.window.remaining, 0)
+
+    def test_wait(self):
+        self.window.acquire()
+        self.clock.now += 0.25
+        self.window.acquire()
+        self.assertEqual(self.window.acquire(), 0.75)
+        self.assertEqual(self.clock.now, 1.0)
+        self.assertEqual(self.window.acquire(), 0.25)
+        self.assertEqual(self.clock.now, 1.25)
+
+    def test_window(self):
+        # no interval may contain more than 2 calls, unlike with a bucket
+        # refilled while the calls are made
+        times = []
+        for _ in xrange(10):
+            self.window.acquire()
+            times.append(self.clock.now)
+        for i in xrange(2, len(times)):
+            self.assertGreaterEqual(times[i] - times[i - 2], 1)
+
+    def test_expire(self):
+        self.window.acquire(2)
+        self.clock.now += 1
+        self.assertEqual(self.window.remaining, 2)
+
+    def test_multiple(self):
+        self.window.acquire()
+        self.clock.now += 0.5
+        # both calls have to wait for the first one to expire
+        self.assertEqual(self.window.reserve(2), 1.0)
+        self.assertEqual(self.window.reserve(3), 2.0)
+
+    def test_done(self):
+        at = self.window.reserve(2)
+        self.clock.now += 0.5
+        self.window.done(at, 2)
+        # counted since answered
+        self.assertEqual(self.window.reserve(), 1.5)
+
+    def test_try_acquire(self):
+        self.assertTrue(self.window.try_acquire(2))
+        self.assertFalse(self.window.try_acquire())
+        self.clock.now += 1
+        self.assertTrue(self.window.try_acquire())
+
+    def test_threads(self):
+        window = SlidingWindow(10, 1, clock=self.clock,
+                               sleep=lambda s: None)
+        waits = []
+
+        def work():
+            for _ in xrange(10):
+                waits.append(window.reserve())
+
+        threads = [threading.Thread(target=work) for _ in xrange(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # 40 calls at 10 calls per second, the last ones wait 3 s
+        self.assertEqual(sorted(waits), sorted([0.0, 1.0, 2.0, 3.0] * 10))
+
+
+class ClientRateLimitTest(StandInTestCase):
+
+    client_class = BaseClient
+    client_kwargs = None
+
+    def prepare_server(self, server):
+        server.limits['antiDosCallCount'] = 5
+        server.limits['antiDosTimeInterval'] = 60
+
+    def tearDown(self):
+        # let the client log out
+        self.server.enforce_limits = False
+        super(ClientRateLimitTest, self).tearDown()
+
+    def test_remaining_calls(self):
+        c = self.get_client()
+        # less logging in and loading the limits
+        self.assertEqual(c.remaining_calls, 3)
+        c._call('groups.list', {})
+        self.assertEqual(c.remaining_calls, 2)
+        with c.batch() as b:
+            b.call('groups.list', {})
+            b.call('ads.list', {})
+        self.assertEqual(c.remaining_calls, 0)
+
+    def test_enforced(self):
+        self.server.enforce_limits = True
+        self.server.limits['antiDosTimeInterval'] = 0.5
+        c = self.get_client()
+        start = time.time()
+        for _ in xrange(13):
+            c._call('groups.list', {})
+        # 15 calls including logging in and loading the limits, none
+        # refused by the server
+        self.assertGreaterEqual(time.time() - start, 0.9)
+
+    def test_disabled(self):
+        c = self.get_client(rate_limit=False)
+        self.assertIsNone(c.rate_limiter)
+        self.assertIsNone(c.remaining_calls)
@@ -0,0 +1,111 @@
+from sklikapi.cipisek.entities import Ad, Keyword
+from sklikapi.cipisek.reconcile import Plan, Reconciler
+
+from . import StandInTestCase, unittest
+
+
+class ReconcilerTest(unittest.TestCase):
+
+    current = [
+        Keyword(id=1, groupId=1, name='a', matchType='broad', cpc=100),
+        Keyword(id=2, groupId=1, name='b', matchType='broad', cpc=100),
+        Keyword(id=3, groupId=1, name='c', matchType='broad', cpc=100),
+        Keyword(id=4, groupId=2, name='a', matchType='broad', cpc=100),
+    ]
+
+    def test_plan(self):
+        desired = [
+            Keyword(groupId=1, name='a', matchType='broad', cpc=100),
+            Keyword(groupId=1, name='b', matchType='broad', cpc=200),
+            Keyword(groupId=1, name='c', matchType='phrase', cpc=100),
+            Keyword(id=4, name='x', cpc=300),
+        ]
+        plan = Reconciler(None).plan(Keyword, desired, self.current)
+        self.assertEqual(plan.create, [desired[2]])
+        self.assertEqual(plan.update, [Keyword(id=2, cpc=200),
+                                       Keyword(id=4, cpc=300)])
+        self.assertEqual(plan.remove, [3])
+        self.assertEqual(len(plan), 4)
+        self.assertIn('~ Keyword', plan.report())
+
+    def test_unknown_id(self):
+        desired = Keyword(id=5, groupId=1, name='d', matchType='broad')
+        plan = Reconciler(None).plan(Keyword, [desired], self.current)
+        self.assertEqual(plan.create, [Keyword(groupId=1, name='d',
+                                               matchType='broad')])
+        self.assertEqual(desired.id, 5)
+
+    def test_no_changes(self):
+        plan = Reconciler(None).plan(Keyword, self.current, self.current)
+        self.assertEqual(len(plan), 0)
+
+    def test_duplicates(self):
+        desired = [Keyword(groupId=1, name='a', matchType='broad')] * 2
+        plan = Reconciler(None, remove=False).plan(Keyword, desired,
+                                                   self.current[:1])
+        self.assertEqual(plan.create, desired[1:])
+        self.assertEqual(plan.remove, [])
+
+    def test_ads(self):
+        ad = Ad(id=1, groupId=1, creative1='x', creative2='y',
+                creative3='z', clickthruText='t', status='active')
+        desired = Ad(groupId=1, creative1='x', creative2='y', creative3='z',
+                     clickthruText='t', status='suspend')
+        plan = Reconciler(None).plan(Ad, [desired], [ad])
+        self.assertEqual(plan.update, [Ad(id=1, status='suspend')])
+
+
+class ReconcilerApplyTest(StandInTestCase):
+
+    client_kwargs = {'concurrency': 3}
+
+    def prepare_server(self, server):
+        # ids not colliding with the ones of created keywords
+        for i, name in enumerate(['a', 'b', 'c'], 101):
+            server.entities['keywords'][i] = {
+                'id': i, 'groupId': 1, 'name': name, 'matchType': 'broad',
+                'cpc': 100, 'deleted': False}
+        server.batch_limits['keywords.create'] = 2
+
+    def setUp(self):
+        super(ReconcilerApplyTest, self).setUp()
+        self.reconciler = Reconciler(self.client)
+
+    def tearDown(self):
+        del self.reconciler
+        super(ReconcilerApplyTest, self).tearDown()
+
+    def test_apply(self):
+        desired = [Keyword(groupId=1, name=name, matchType='broad', cpc=100)
+                   for name in 'bcdef']
+        desired[0].cpc = 150
+        del self.server.calls[:]
+        self.reconciler.apply(self.reconciler.plan_keywords([1], desired))
+        self.assertEqual(sorted(self.server.calls),
+                         ['keywords.create', 'keywords.create',
+                          'keywords.list', 'keywords.remove',
+                          'keywords.update'])
+
+        del self.server.calls[:]
+        plan = self.reconciler.plan_keywords([1], desired)
+        self.assertEqual(len(plan), 0)
+        self.reconciler.apply(plan)
+        self.assertEqual(self.server.calls, ['keywords.list'])
+        names = sorted(kw.name for kw in self.client.list_keywords([1]))
+        self.assertEqual(names, list('bcdef'))
+
+    def test_apply_chunked_operations(self):
+        # every operation has more chunks than the client has workers
+        for op in ('create', 'update', 'remove'):
+            self.client.batch_limits['keywords.' + op] = 2
+        self.client.concurrency = 2
+        plan = Plan(Keyword,
+                    create=[Keyword(groupId=1, name='kw %d' % i,
+                                    matchType='broad') for i in xrange(6)],
+                    update=[Keyword(id=101, cpc=100 + i) for i in xrange(6)],
+                    remove=[101, 102, 103, 101, 102, 103])
+        del self.server.calls[:]
+        self.reconciler.apply(plan)
+        self.assertEqual(sorted(self.server.calls),
+                         ['keywords.create'] * 3 + ['keywords.remove'] * 3
+                         + ['keywords.update'] * 3)
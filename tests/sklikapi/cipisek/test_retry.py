@@ -0,0 +1,162 @@
+from xmlrpclib import ProtocolError
+
+from sklikapi.cipisek.baseclient import BaseClient
+from sklikapi.cipisek.exceptions import (
+    CircuitOpenError, DeadlineExceededError, SklikApiError)
+from sklikapi.cipisek.retry import CircuitBreaker, RetryPolicy
+
+from . import FakeClock, StandInTestCase, unittest
+
+
+class RetryPolicyTest(unittest.TestCase):
+
+    def test_exponential(self):
+        policy = RetryPolicy(10, initial_delay=1, max_delay=10,
+                             random=lambda: 1.0)
+        self.assertEqual([policy.delay(n) for n in xrange(6)],
+                         [1, 2, 4, 8, 10, 10])
+
+    def test_jitter(self):
+        policy = RetryPolicy(3, initial_delay=2, random=lambda: 0.25)
+        self.assertEqual(policy.backoff(2, 0), 2.0)
+
+    def test_retries(self):
+        policy = RetryPolicy(2)
+        self.assertIsNotNone(policy.backoff(1, 0))
+        self.assertIsNone(policy.backoff(2, 0))
+
+    def test_budget(self):
+        policy = RetryPolicy(10, initial_delay=4, budget=10,
+                             random=lambda: 0.5)
+        self.assertEqual(policy.backoff(0, 7.5), 2.0)
+        self.assertIsNone(policy.backoff(0, 8.5))
+        self.assertIsNone(policy.backoff(0, 0, minimum=11))
+
+    def test_minimum(self):
+        policy = RetryPolicy(1, random=lambda: 0.0)
+        self.assertEqual(policy.backoff(0, 0, minimum=3), 3)
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(2, 10, clock=self.clock)
+
+    def test_open(self):
+        self.breaker.failure()
+        self.breaker.before_call()
+        self.breaker.failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+    def test_success_resets(self):
+        self.breaker.failure()
+        self.breaker.success()
+        self.breaker.failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open(self):
+        self.breaker.failure()
+        self.breaker.failure()
+        self.clock.now += 10
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.breaker.before_call()
+        # only one trial call at a time
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+        self.breaker.success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_trial_failure(self):
+        self.breaker.failure()
+        self.breaker.failure()
+        self.clock.now += 10
+        self.breaker.before_call()
+        self.breaker.failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.clock.now += 5
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+
+class ClientRetryTest(StandInTestCase):
+
+    client_class = BaseClient
+    client_kwargs = None
+
+    def tearDown(self):
+        self.server.down = False
+        self.server.loss = 0
+        super(ClientRetryTest, self).tearDown()
+
+    def _too_many_requests(self):
+        self.server.register_function(
+            lambda user, *args: {
+                'status': 429,
+                'statusMessage': 'Too many requests. Has to wait 1[s].'},
+            'groups.list')
+
+    def test_protocol_error(self):
+        c = self.get_client(retry_policy=RetryPolicy(2, 0))
+        self.server.down = True
+        with self.assertRaises(ProtocolError):
+            c._call('groups.list', {})
+        self.assertEqual(c.circuit_breaker.state, CircuitBreaker.CLOSED)
+
+    def test_circuit_breaker(self):
+        c = self.get_client(retry_policy=RetryPolicy(5, 0),
+                             circuit_breaker=CircuitBreaker(2, 60))
+        self.server.down = True
+        # each call is retried as many times as allowed, the breaker
+        # counts the calls given up on
+        for _ in xrange(2):
+            with self.assertRaises(ProtocolError):
+                c._call('groups.list', {})
+        metrics = c.metrics.as_dict()['groups.list']
+        self.assertEqual(metrics['retries'], 10)
+        with self.assertRaises(CircuitOpenError):
+            c._call('groups.list', {})
+
+    def test_circuit_breaker_retried(self):
+        c = self.get_client(retry_policy=RetryPolicy(10, 0))
+        self.server.loss = 1
+        with self.assertRaises(IOError):
+            c._call('groups.list', {})
+        metrics = c.metrics.as_dict()['groups.list']
+        self.assertEqual(metrics['retries'], 10)
+        self.server.loss = 0
+        c._call('groups.list', {})
+        self.assertEqual(c.circuit_breaker.state, CircuitBreaker.CLOSED)
+
+    def test_throttled_trial(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(1, 10, clock=clock)
+        c = self.get_client(circuit_breaker=breaker)
+        breaker.failure()
+        clock.now = 10
+
+        def throttle(cost, name):
+            raise DeadlineExceededError('Deadline exceeded')
+        c._throttle = throttle
+        with self.assertRaises(DeadlineExceededError):
+            c._call('groups.list', {})
+        # the trial call was not made, so it can be made later
+        del c._throttle
+        c._call('groups.list', {})
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_too_many_requests(self):
+        c = self.get_client()
+        self._too_many_requests()
+        with self.assertRaises(SklikApiError):
+            c._call('groups.list', {})
+        self.assertEqual(self.server.calls, ['groups.list'])
+
+    def test_too_many_requests_budget(self):
+        c = self.get_client(retry_policy=RetryPolicy(5, budget=1))
+        self._too_many_requests()
+        with self.assertRaises(SklikApiError):
+            c._call('groups.list', {})
+        self.assertEqual(self.server.calls, ['groups.list'])
@@ -0,0 +1,68 @@
+import time
+
+from sklikapi.cipisek.entities import Ad
+from sklikapi.cipisek.exceptions import InvalidDataError, SklikApiError
+from sklikapi.cipisek.retry import RetryPolicy
+
+from . import StandInTestCase
+
+
+class StandInServerTest(StandInTestCase):
+    """Faults simulated by the stand-in server, as seen by the client."""
+
+    client_kwargs = None
+
+    def tearDown(self):
+        self.server.loss = 0
+        self.server.enforce_limits = False
+        super(StandInServerTest, self).tearDown()
+
+    def test_latency(self):
+        c = self.get_client()
+        self.server.latency = 0.1
+        start = time.time()
+        c.list_campaigns()
+        self.assertGreaterEqual(time.time() - start, 0.1)
+
+    def test_loss(self):
+        c = self.get_client()
+        self.server.loss = 1
+        with self.assertRaises(IOError):
+            c.list_campaigns()
+
+    def test_loss_retried(self):
+        c = self.get_client(retry_policy=RetryPolicy(20, 0))
+        # the lost requests must not open the circuit, the pattern
+        # of the losses is random
+        c.circuit_breaker = None
+        self.server.loss = 0.5
+        for _ in xrange(5):
+            c.list_campaigns()
+
+    def test_antidos(self):
+        self.server.enforce_limits = True
+        self.server.limits['antiDosCallCount'] = 3
+        self.server.limits['antiDosTimeInterval'] = 60
+        c = self.get_client(rate_limit=False)
+        c.list_campaigns()
+        with self.assertRaisesRegexp(SklikApiError, 'Too many requests'):
+            c.list_campaigns()
+
+    def test_session_ttl(self):
+        c = self.get_client(retries=1)
+        c.MALFORMED_SESSION_WAIT = 0
+        self.server.session_ttl = 0.05
+        time.sleep(0.1)
+        c.list_campaigns()
+        self.assertEqual(self.server.calls,
+                         ['campaigns.list', 'client.login', 'campaigns.list'])
+
+    def test_partial_failure(self):
+        c = self.get_client()
+        with self.assertRaises(InvalidDataError) as cm:
+            c.create_ads([Ad(groupId=1, creative1='ad'),
+                          Ad(groupId=1, creative1='invalid')])
+        self.assertEqual(cm.exception.args[0], 206)
+        with self.assertRaises(InvalidDataError) as cm:
+            c.create_ads([Ad(groupId=1, creative1='invalid')])
+        self.assertEqual(cm.exception.args[0], 406)
@@ -0,0 +1,116 @@
+from datetime import datetime
+
+from sklikapi.cipisek.entities import Keyword, Missing
+from sklikapi.cipisek.marshalling import marshall_param
+from sklikapi.cipisek.tables import KeywordTable, KeywordRow
+
+from . import StandInTestCase, unittest
+
+
+def keywords(count):
+    return [{'id': i, 'groupId': 1 + i % 3, 'name': u'kw %d' % i,
+             'matchType': 'phrase' if i % 2 else 'broad',
+             'status': 'active', 'deleted': False,
+             'cpc': None if i % 5 == 0 else 100 + i,
+             'createDate': datetime(2014, 4, 14)}
+            for i in xrange(1, count + 1)]
+
+
+class KeywordTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.keywords = keywords(20)
+        self.table = KeywordTable(self.keywords)
+
+    def test_rows(self):
+        self.assertEqual(len(self.table), 20)
+        for row, keyword in zip(self.table, self.keywords):
+            self.assertIsInstance(row, KeywordRow)
+            self.assertEqual(row, Keyword(keyword))
+            self.assertEqual(dict(row), keyword)
+        self.assertIsNone(self.table[4].cpc)
+        self.assertIs(self.table[-1].url, Missing)
+        self.assertIs(self.table[-1].deleted, False)
+        with self.assertRaises(IndexError):
+            self.table[20]
+
+    def test_keywords(self):
+        self.assertEqual(Keyword(self.table[0]), Keyword(self.keywords[0]))
+        self.assertEqual(Keyword.marshall_list(self.table),
+                         Keyword.marshall_list(self.keywords))
+
+    def test_columns(self):
+        columns = self.table._columns
+        self.assertEqual(columns['matchType'].categories, ['phrase', 'broad'])
+        self.assertEqual(columns['cpc'].exceptions,
+                         {4: None, 9: None, 14: None, 19: None})
+        self.assertEqual(self.table.column('id'), range(1, 21))
+
+    def test_set(self):
+        row = self.table[1]
+        row.cpc = 500
+        row.status = 'suspend'
+        self.assertEqual(self.table[1].cpc, 500)
+        self.assertEqual(self.table.column('status').count('suspend'), 1)
+        with self.assertRaises(AttributeError):
+            row.foo = 1
+
+    def test_slice(self):
+        table = self.table[2:6]
+        self.assertEqual(table.column('id'), [3, 4, 5, 6])
+        self.assertIsNone(table[2].cpc)
+        self.assertEqual(self.table[::-5].column('id'), [20, 15, 10, 5])
+
+    def test_where(self):
+        table = self.table.where(matchType='broad',
+                                 groupId=lambda group_id: group_id != 1)
+        self.assertEqual(table.column('id'), [2, 4, 8, 10, 14, 16, 20])
+        self.assertEqual(len(self.table.where()), 20)
+
+    def test_filter(self):
+        table = self.table.filter(lambda row: row.cpc > 110)
+        self.assertEqual(table.column('id'), [11, 12, 13, 14, 16, 17, 18, 19])
+
+    def test_updatable(self):
+        self.assertEqual(dict(self.table[0].iterate_updatable()),
+                         {'id': 1, 'status': 'active', 'cpc': 101})
+
+    def test_marshall(self):
+        entities = Keyword.marshall_list(self.keywords[:2])
+        self.assertEqual(marshall_param(self.table[:2]),
+                         marshall_param(entities))
+        self.assertEqual(self.table.to_entities(),
+                         Keyword.marshall_list(self.keywords))
+
+
+class ClientTableTest(StandInTestCase):
+
+    def prepare_server(self, server):
+        for keyword in keywords(30):
+            server.entities['keywords'][keyword['id']] = keyword
+        server.batch_limits['keywords.check'] = 7
+
+    def test_list_keywords(self):
+        table = self.client.list_keywords([1, 2, 3], as_table=True)
+        self.assertIsInstance(table, KeywordTable)
+        self.assertEqual(table.column('id'), range(1, 31))
+        self.assertEqual(table[0].createDate, datetime(2014, 4, 14))
+        self.assertEqual(table.to_entities(),
+                         self.client.list_keywords([1, 2, 3]))
+
+    def test_chunked_table(self):
+        table = self.client.list_keywords([1, 2, 3], as_table=True)
+        del self.server.calls[:]
+        self.client.check_keywords(table)
+        self.assertEqual(self.server.calls, ['keywords.check'] * 5)
+
+    def test_truncated_response(self):
+        # the response has to be large enough to be partially parsed
+        for keyword in keywords(1000):
+            self.server.entities['keywords'][keyword['id']] = keyword
+        client = self.get_client(retries=2)
+        client.retry_policy.initial_delay = 0
+        self.server.truncated_responses = 1
+        table = client.list_keywords([1, 2, 3], as_table=True)
+        self.assertEqual(self.server.calls.count('keywords.list'), 2)
+        self.assertEqual(table.column('id'), range(1, 1001))
@@ -0,0 +1,48 @@
+import threading
+
+from sklikapi.cipisek.concurrency import ThreadPool
+
+from . import StandInTestCase
+
+
+class SharedClientTest(StandInTestCase):
+
+    client_kwargs = {'retries': 1}
+
+    def prepare_server(self, server):
+        for i in xrange(1, 51):
+            server.entities['groups'][i] = {'id': i, 'deleted': False}
+
+    def setUp(self):
+        super(SharedClientTest, self).setUp()
+        self.client.MALFORMED_SESSION_WAIT = 0.1
+
+    def _login_count(self):
+        return self.server.calls.count('client.login')
+
+    def test_pool(self):
+        pool = ThreadPool(10)
+        futures = [pool.submit(self.client.get_groups, [i])
+                   for i in xrange(1, 51)]
+        self.assertEqual([f.result()[0].id for f in futures], range(1, 51))
+        pool.shutdown()
+
+    def test_single_flight_relogin(self):
+        self.server.expire_sessions()
+        start = threading.Event()
+        results = []
+
+        def work(i):
+            start.wait()
+            results.append(self.client.get_groups([i])[0].id)
+
+        threads = [threading.Thread(target=work, args=(i,))
+                   for i in xrange(1, 21)]
+        for thread in threads:
+            thread.start()
+        start.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(results), range(1, 21))
+        self.assertEqual(self._login_count(), 1)  # the relogin
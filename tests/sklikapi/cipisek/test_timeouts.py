@@ -0,0 +1,82 @@
+import time
+
+from sklikapi.cipisek.baseclient import BaseClient
+from sklikapi.cipisek.client import Client
+from sklikapi.cipisek.entities import Keyword
+from sklikapi.cipisek.exceptions import DeadlineExceededError, TimeoutError
+from sklikapi.cipisek.retry import RetryPolicy
+from sklikapi.cipisek.transport import PooledTransport
+
+from . import StandInTestCase, unittest
+
+
+class DeadlineTest(unittest.TestCase):
+
+    def test_nested(self):
+        transport = PooledTransport()
+        self.assertIsNone(transport.remaining())
+        with transport.deadline(time.time() + 10):
+            with transport.deadline(time.time() + 100):
+                self.assertLessEqual(transport.remaining(), 10)
+            with transport.deadline(time.time() + 1):
+                self.assertLessEqual(transport.remaining(), 1)
+            self.assertGreater(transport.remaining(), 1)
+        self.assertIsNone(transport.get_deadline())
+
+    def test_exceeded(self):
+        transport = PooledTransport()
+        with transport.deadline(time.time() - 1):
+            with self.assertRaises(DeadlineExceededError):
+                transport.request('localhost:1', '/RPC2', '')
+
+
+class ClientTimeoutTest(StandInTestCase):
+
+    client_class = BaseClient
+    client_kwargs = None
+
+    def _slow(self, method, seconds=0.5):
+        self.server.register_function(
+            lambda user, *args: time.sleep(seconds) or {
+                'status': 200, 'statusMessage': 'OK'},
+            method)
+
+    def test_timeout(self):
+        c = self.get_client(timeout=0.1, retry_policy=RetryPolicy(1, 0))
+        self._slow('groups.list')
+        with self.assertRaises(TimeoutError) as cm:
+            c._call('groups.list', {})
+        self.assertNotIsInstance(cm.exception, DeadlineExceededError)
+        self.assertEqual(self.server.calls, ['groups.list'] * 2)
+
+    def test_deadline(self):
+        c = self.get_client(retry_policy=RetryPolicy(3, 0))
+        self._slow('groups.list')
+        start = time.time()
+        with self.assertRaises(DeadlineExceededError):
+            with c.deadline(0.1):
+                c._call('groups.list', {})
+        self.assertLess(time.time() - start, 0.4)
+        self.assertEqual(self.server.calls, ['groups.list'])
+
+    def test_deadline_rate_limit(self):
+        # logging in, loading the limits and one call
+        self.server.limits['antiDosCallCount'] = 3
+        self.server.limits['antiDosTimeInterval'] = 60
+        c = self.get_client()
+        c._call('groups.list', {})
+        with self.assertRaises(DeadlineExceededError):
+            with c.deadline(1):
+                c._call('groups.list', {})
+        self.assertEqual(self.server.calls, ['groups.list'])
+
+    def test_parallel_chunks(self):
+        self.server.batch_limits['keywords.check'] = 1
+        c = self.get_client(Client, concurrency=2)
+        self._slow('keywords.check')
+        keywords = [Keyword(groupId=1, name='kw', matchType='broad')] * 2
+        start = time.time()
+        with self.assertRaises(DeadlineExceededError):
+            with c.deadline(0.1):
+                c.check_keywords(keywords)
+        self.assertLess(time.time() - start, 0.4)
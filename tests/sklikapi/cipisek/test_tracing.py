@@ -0,0 +1,112 @@
+import json
+from StringIO import StringIO
+
+from sklikapi.cipisek.exceptions import NotFoundError
+from sklikapi.cipisek.tracing import JsonLinesSink, Tracer
+
+from . import StandInTestCase, unittest
+
+
+class TracerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.spans = []
+        self.tracer = Tracer(self.spans.append)
+
+    def test_nested(self):
+        with self.tracer.span('outer', method='ads.list') as outer:
+            with self.tracer.span('inner'):
+                pass
+            self.tracer.record('done', outer.start, outer.start + 1)
+        inner, done, outer = self.spans
+        self.assertEqual(inner.parent_id, outer.span_id)
+        self.assertEqual(done.parent_id, outer.span_id)
+        self.assertEqual(done.duration, 1)
+        self.assertEqual(inner.trace_id, outer.trace_id)
+        self.assertIsNone(outer.parent_id)
+        self.assertIsNone(self.tracer.current())
+
+    def test_error(self):
+        with self.assertRaises(ValueError):
+            with self.tracer.span('failing'):
+                raise ValueError()
+        self.assertEqual(self.spans[0].error, 'ValueError')
+
+    def test_json_lines(self):
+        out = StringIO()
+        tracer = Tracer(JsonLinesSink(out))
+        with tracer.span('call', method='ads.list'):
+            pass
+        span = json.loads(out.getvalue())
+        self.assertEqual(span['name'], 'call')
+        self.assertEqual(span['attributes'], {'method': 'ads.list'})
+
+    def test_otel(self):
+        out = StringIO()
+        tracer = Tracer(JsonLinesSink(out, otel=True))
+        with tracer.span('call', method='ads.list', items=3):
+            with tracer.span('inner'):
+                pass
+        inner, call = [json.loads(line)
+                       for line in out.getvalue().splitlines()]
+        self.assertEqual(inner['parentSpanId'], call['spanId'])
+        self.assertEqual(len(call['traceId']), 32)
+        self.assertEqual(call['attributes'], [
+            {'key': 'items', 'value': {'intValue': '3'}},
+            {'key': 'method', 'value': {'stringValue': 'ads.list'}}])
+        self.assertGreaterEqual(int(call['endTimeUnixNano']),
+                                int(call['startTimeUnixNano']))
+
+
+class ClientTracingTest(StandInTestCase):
+
+    client_kwargs = None
+
+    def prepare_server(self, server):
+        server.entities['groups'][1] = {'id': 1, 'deleted': False}
+
+    def setUp(self):
+        super(ClientTracingTest, self).setUp()
+        self.spans = []
+        self.get_client(tracer=Tracer(self.spans.append))
+        del self.spans[:]
+
+    def test_phases(self):
+        self.client.list_groups()
+        names = [span.name for span in self.spans]
+        self.assertEqual(names, ['marshall_param', 'serialize', 'send',
+                                 'parse', 'xmlrpc', 'entities', 'call'])
+        by_name = dict((span.name, span) for span in self.spans)
+        self.assertEqual(by_name['call'].attributes,
+                         {'method': 'groups.list'})
+        self.assertEqual(by_name['send'].parent_id,
+                         by_name['xmlrpc'].span_id)
+        self.assertGreater(by_name['send'].attributes['request_bytes'], 0)
+        self.assertGreater(by_name['parse'].attributes['response_bytes'], 0)
+        self.assertEqual(by_name['entities'].attributes,
+                         {'method': 'groups.list', 'items': 1})
+        self.assertEqual(by_name['entities'].parent_id,
+                         by_name['call'].span_id)
+
+    def test_get(self):
+        self.client.batch_limits['groups.get'] = 1
+        self.server.entities['groups'][2] = {'id': 2, 'deleted': False}
+        self.client.get_groups([1, 2])
+        calls = [span for span in self.spans if span.name == 'call']
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(
+            [span.name for span in self.spans
+             if span.parent_id == calls[0].span_id],
+            ['marshall_param', 'xmlrpc', 'marshall_param', 'xmlrpc',
+             'entities'])
+
+    def test_marshall_result(self):
+        self.client._call('groups.list', {})
+        self.assertIn('marshall_result',
+                      [span.name for span in self.spans])
+
+    def test_error(self):
+        with self.assertRaises(NotFoundError):
+            self.client.get_groups([2])
+        call = [span for span in self.spans if span.name == 'call'][0]
+        self.assertEqual(call.error, 'NotFoundError')
@@ -0,0 +1,130 @@
+import time
+from xmlrpclib import ServerProxy
+
+from sklikapi.cipisek.baseclient import BaseClient
+from sklikapi.cipisek.exceptions import AuthenticationError
+from sklikapi.cipisek.transport import (ConnectionPool, PooledTransport,
+                                        PooledSafeTransport, create_transport)
+
+from . import StandInTestCase, unittest
+
+
+class MockConnection(object):
+
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTest(unittest.TestCase):
+
+    def test_reuse(self):
+        pool = ConnectionPool(MockConnection)
+        conn, reused = pool.acquire()
+        self.assertFalse(reused)
+        pool.release(conn)
+        self.assertEqual(pool.acquire(), (conn, True))
+
+    def test_maxsize(self):
+        pool = ConnectionPool(MockConnection, maxsize=1)
+        conns = [pool.acquire()[0] for _ in xrange(2)]
+        for conn in conns:
+            pool.release(conn)
+        self.assertEqual(len(pool), 1)
+        self.assertFalse(conns[0].closed)
+        self.assertTrue(conns[1].closed)
+
+    def test_idle_eviction(self):
+        pool = ConnectionPool(MockConnection, idle_timeout=0)
+        conn = pool.acquire()[0]
+        pool.release(conn)
+        new, reused = pool.acquire()
+        self.assertFalse(reused)
+        self.assertTrue(conn.closed)
+        self.assertIsNot(new, conn)
+
+    def test_create_transport(self):
+        self.assertIsInstance(create_transport('https://api.sklik.cz/RPC2'),
+                              PooledSafeTransport)
+        self.assertIsInstance(create_transport('http://localhost/RPC2'),
+                              PooledTransport)
+
+
+class PooledTransportTest(StandInTestCase):
+
+    client_kwargs = None
+
+    def _get_proxy(self, **kwargs):
+        transport = PooledTransport(**kwargs)
+        return ServerProxy(self.server.url, transport=transport)
+
+    def test_keep_alive(self):
+        proxy = self._get_proxy()
+        for _ in xrange(5):
+            self.assertEqual(proxy.api.version()['status'], 200)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_idle_timeout(self):
+        proxy = self._get_proxy(pool_idle_timeout=0)
+        for _ in xrange(3):
+            proxy.api.version()
+        self.assertEqual(self.server.connections, 3)
+
+    def test_reconnect(self):
+        self.server.handler_timeout = 0.1
+        proxy = self._get_proxy()
+        proxy.api.version()
+        # let the server drop the idle connection
+        time.sleep(0.3)
+        self.assertEqual(proxy.api.version()['status'], 200)
+        self.assertEqual(self.server.connections, 2)
+
+    def test_gzip_response(self):
+        self.server.entities['keywords'] = dict(
+            (i, {'id': i, 'name': 'keyword %d' % i, 'deleted': False})
+            for i in xrange(1, 1001))
+        c = BaseClient(self.server.url, 'login', 'password')
+        result = c._call('keywords.list', {})
+        self.assertEqual(len(result['keywords']), 1000)
+
+        stats = c.last_transfer_stats
+        self.assertEqual(stats.requests, 1)
+        self.assertLess(stats.response_wire_bytes, stats.response_bytes / 5)
+        self.assertEqual(stats.saved_bytes,
+                         stats.response_bytes - stats.response_wire_bytes)
+        self.assertGreater(c.transfer_stats.requests, 3)
+
+    def test_gzip_request(self):
+        proxy = self._get_proxy(encode_threshold=100)
+        transport = proxy('transport')
+        self.assertEqual(proxy.client.login('login', 'x' * 10000)['status'],
+                         401)
+        stats = transport.last_stats
+        self.assertEqual(stats.request_bytes - stats.request_wire_bytes,
+                         stats.saved_bytes)
+        self.assertLess(stats.request_wire_bytes, 500)
+        self.assertEqual(transport.stats.saved_bytes, stats.saved_bytes)
+
+    def test_client_uses_pool(self):
+        c = BaseClient(self.server.url, 'login', 'password')
+        c.get_limits()
+        self.assertEqual(self.server.connections, 1)
+
+    def test_close_without_session(self):
+        clients = []
+
+        class FailingClient(BaseClient):
+            def _login(self):
+                clients.append(self)
+                raise AuthenticationError('Wrong credentials')
+
+        with self.assertRaises(AuthenticationError):
+            FailingClient(self.server.url, 'login', 'password')
+        clients[0].close()
+        # the server closes the connection closed by the client
+        for _ in xrange(100):
+            if not self.server.sockets:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.server.sockets, set())
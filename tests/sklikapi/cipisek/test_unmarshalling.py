@@ -0,0 +1,97 @@
+from datetime import datetime
+from xmlrpclib import DateTime, Fault, dumps, loads
+
+from sklikapi.cipisek.entities import Campaign, Keyword
+from sklikapi.cipisek.marshalling import marshall_result
+from sklikapi.cipisek.unmarshalling import get_entity_parser, parse_datetime
+
+from . import StandInTestCase, unittest
+
+
+RESPONSE = {
+    'status': 200,
+    'statusMessage': 'OK',
+    'campaigns': [
+        {
+            'id': 1,
+            'name': 'campaign',
+            'createDate': DateTime('20140414T16:27:00+0200'),
+            'regions': [
+                {'type': 'polygon',
+                 'vertices': [{'latitude': 50.0, 'longitude': 14.5},
+                              {'latitude': 49.5, 'longitude': 15.0}]},
+            ],
+            'negativeKeywords': [{'name': 'free', 'matchType': 'broad'}],
+        },
+        {'id': 2, 'name': 'other', 'deleted': True},
+    ],
+    'diagnostics': [{'id': 1, 'type': 'warning'}],
+}
+
+
+def parse(response, entities):
+    parser, unmarshaller = get_entity_parser(entities)
+    parser.feed(dumps((response,), methodresponse=True))
+    parser.close()
+    return unmarshaller.close()[0]
+
+
+class EntityUnmarshallerTest(unittest.TestCase):
+
+    def test_parse_datetime(self):
+        self.assertEqual(parse_datetime('20140414T16:27:00+0200'),
+                         datetime(2014, 4, 14, 16, 27))
+
+    def test_entities(self):
+        result = parse(RESPONSE, {'campaigns': Campaign})
+        expected = marshall_result(RESPONSE)
+        self.assertEqual(result['campaigns'],
+                         Campaign.marshall_list(expected['campaigns']))
+        self.assertEqual(result['campaigns'][0].createDate,
+                         datetime(2014, 4, 14, 16, 27))
+        self.assertIsInstance(result['campaigns'][0].negativeKeywords[0],
+                              Keyword)
+        self.assertEqual(result['diagnostics'], expected['diagnostics'])
+
+    def test_other_keys(self):
+        result = parse(RESPONSE, {'groups': Keyword})
+        self.assertEqual(result, marshall_result(RESPONSE))
+
+    def test_strings(self):
+        response = {'keywords': [{'name': u'k\u0159en'}, {'name': 'kw'}],
+                    u'n\xe1zev': u'\u010dau'}
+        result = parse(response, {})
+        # the same types as the ones returned by xmlrpclib
+        expected = loads(dumps((response,), methodresponse=True))[0][0]
+        self.assertEqual(result, expected)
+        self.assertEqual(map(type, result), map(type, expected))
+        result = parse(response, {'keywords': Keyword})
+        self.assertEqual(result['keywords'][0].name, u'k\u0159en')
+        self.assertIs(type(result['keywords'][1].name), str)
+        self.assertEqual(result[u'n\xe1zev'], u'\u010dau')
+
+    def test_fault(self):
+        parser, unmarshaller = get_entity_parser({})
+        parser.feed(dumps(Fault(500, 'Internal error')))
+        parser.close()
+        with self.assertRaises(Fault) as cm:
+            unmarshaller.close()
+        self.assertEqual(cm.exception.faultCode, 500)
+
+
+class ClientUnmarshallingTest(StandInTestCase):
+
+    def prepare_server(self, server):
+        for i in xrange(1, 6):
+            server.entities['keywords'][i] = {
+                'id': i, 'groupId': 1, 'name': 'kw %d' % i, 'deleted': False}
+
+    def test_list(self):
+        keywords = self.client.list_keywords([1])
+        self.assertEqual([kw.id for kw in keywords], range(1, 6))
+        self.assertIsInstance(keywords[0], Keyword)
+        self.assertFalse(self.client._transport.parses_entities)
+
+    def test_get(self):
+        keywords = self.client.get_keywords([2, 3])
+        self.assertEqual([kw.name for kw in keywords], ['kw 2', 'kw 3'])